@@ -1,3 +1,4 @@
+from typing import List, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -7,6 +8,31 @@ class Settings(BaseSettings):
     db_password: str
     db_name: str
     weather_api_key: str
+    # 影片處理工作：同時執行的工作數上限（推論吃 CPU，預設一次一支）
+    max_concurrent_jobs: int = 1
+    # 一次批次推論的影格數
+    inference_batch_size: int = 1
+    # 解碼 / 推論 / 編碼分在不同執行緒，佇列大小限制暫存的影格數
+    pipelined_processing: bool = False
+    pipeline_queue_size: int = 32
+    # 每幾張影格跑一次偵測；adaptive 時依軌跡速度在 1 ~ max_stride 之間調整
+    detection_stride: int = 1
+    adaptive_stride: bool = False
+    max_stride: int = 8
+    # 動態閘門：diff / mog2，畫面靜止時跳過偵測器；不設定則每張都偵測
+    motion_gate: Optional[str] = None
+    # 攝影機設定名稱（count_footfall/cameras/<name>.json）：計數線、ROI、推論解析度
+    camera: str = "default"
+    # 偵測結果快取（count_footfall/det_cache）：同一支影片重算時重播偵測，不重跑 YOLO
+    detection_cache: bool = False
+    # 每處理幾張影格存一次檢查點，服務重啟後工作從檢查點繼續；0 表示不存檢查點
+    checkpoint_every: int = 1800
+    # 上傳影片結果快取：處理後影片總大小上限（bytes），超過時淘汰最久沒用到的；0 表示不快取
+    result_cache_max_bytes: int = 5 * 1024 ** 3
+    # 啟動時預先載入並暖機的模型權重（JSON 陣列），第一個為預設模型
+    detector_models: List[str] = ["count_footfall/yolo-coco/best.pt"]
+    # 偵測器後端：ultralytics / onnxruntime / openvino；不設定則依模型副檔名判斷（.onnx 用 onnxruntime）
+    detector_backend: Optional[str] = None
 
     model_config = SettingsConfigDict(
         env_file = ".env",
@@ -0,0 +1,159 @@
+# 影片計數結果直接寫入 daily_footfall / hourly_footfall（不再經過自己的 HTTP API）
+
+import hashlib
+from datetime import datetime
+
+DEFAULT_WEATHER = "Unknown"
+
+
+def current_weather():
+    """查一次目前天氣；沒有設定 API key 或查詢失敗時回傳 DEFAULT_WEATHER"""
+    try:
+        from weather import get_weather_main, LAT, LON, API_KEY
+        return get_weather_main(LAT, LON, API_KEY)
+    except Exception as e:
+        print(f"[WARN] weather lookup failed: {e}")
+        return DEFAULT_WEATHER
+
+
+def source_key(source):
+    """來源識別字串（可能很長）轉成固定長度的鍵"""
+    return hashlib.blake2b(source.encode(), digest_size=16).hexdigest()
+
+
+def save_hourly_footfall(pool, buckets, weather=DEFAULT_WEATHER, source=None):
+    """
+    buckets：[((日期 "YYYY-MM-DD", 小時), 計數), ...]
+    source：None 時累加到既有的小時（即時串流每小時寫一次，每次都是新的越線）。
+            給定時為這批計數的來源（例如錄影內容雜湊），先扣掉同一來源上次寫入的各小時，
+            再寫入這次的結果並記在 hourly_footfall_sources；同一支錄影重算（換計數線、
+            重新上傳、工作重試）會取代上次的結果，不會重複計入，其他來源的計數不受影響。
+    同一小時已有資料時加上差額，沒有則新增；整批在同一個交易內完成，
+    每一天只重算一次 total_count 與主要天氣。回傳寫入的天數。
+    """
+    # {日期: {小時: 要加上的數量}}；這次有的小時即使差額為 0 也要確保資料列存在
+    days = {}
+    for (day, hour), count in buckets:
+        days.setdefault(day, {})
+        days[day][int(hour)] = days[day].get(int(hour), 0) + int(count)
+    if not days and source is None:
+        return 0
+
+    conn = pool.get_connection()
+    cursor = conn.cursor()
+    try:
+        previous = {}
+        if source is not None:
+            key = source_key(source)
+            # 鎖住這個來源上次寫入的小時，避免同一來源同時寫入時重複扣除
+            cursor.execute(
+                """
+                SELECT day_date, hour_of_day, count FROM hourly_footfall_sources
+                WHERE source_key = %s
+                FOR UPDATE
+                """,
+                (key,)
+            )
+            for day_date, hour, count in cursor.fetchall():
+                day = day_date.strftime("%Y-%m-%d")
+                previous.setdefault(day, {})[int(hour)] = int(count)
+            cursor.execute("DELETE FROM hourly_footfall_sources WHERE source_key = %s", (key,))
+            rows = [(key, source[:512], day, hour, count)
+                    for day, hours in days.items() for hour, count in hours.items()]
+            if rows:
+                cursor.executemany(
+                    """
+                    INSERT INTO hourly_footfall_sources
+                        (source_key, source, day_date, hour_of_day, count)
+                    VALUES (%s, %s, %s, %s, %s)
+                    """,
+                    rows
+                )
+
+        touched = sorted(set(days) | set(previous))
+        for day in touched:
+            hours = days.get(day, {})
+            old = previous.get(day, {})
+            deltas = {hour: hours.get(hour, 0) - old.get(hour, 0) for hour in set(hours) | set(old)}
+            if hours:
+                weekday = datetime.strptime(day, "%Y-%m-%d").strftime("%A")
+                cursor.execute(
+                    """
+                    INSERT INTO daily_footfall (day_date, weekday, total_count, weather)
+                    VALUES (%s, %s, 0, %s)
+                    ON DUPLICATE KEY
+                      UPDATE id = LAST_INSERT_ID(id)
+                    """,
+                    (day, weekday, weather)
+                )
+                daily_id = cursor.lastrowid
+            else:
+                # 只需要扣掉上次結果的日期：已被刪除就不再建立
+                cursor.execute("SELECT id FROM daily_footfall WHERE day_date = %s", (day,))
+                row = cursor.fetchone()
+                if row is None:
+                    continue
+                daily_id = row[0]
+
+            # 鎖住當天已有的小時資料，避免同時寫入的工作重複新增同一小時
+            cursor.execute(
+                """
+                SELECT hour_of_day FROM hourly_footfall
+                WHERE daily_id = %s
+                FOR UPDATE
+                """,
+                (daily_id,)
+            )
+            existing = {row[0] for row in cursor.fetchall()}
+
+            # 扣除上次結果時不讓計數變成負數（該小時可能已被 API 手動修改）
+            updates = [(delta, daily_id, hour) for hour, delta in sorted(deltas.items())
+                       if hour in existing and delta != 0]
+            inserts = [(daily_id, hour, count, weather) for hour, count in sorted(hours.items())
+                       if hour not in existing]
+            if updates:
+                cursor.executemany(
+                    """
+                    UPDATE hourly_footfall SET count = GREATEST(count + %s, 0)
+                    WHERE daily_id = %s AND hour_of_day = %s
+                    """,
+                    updates
+                )
+            if inserts:
+                cursor.executemany(
+                    """
+                    INSERT INTO hourly_footfall (daily_id, hour_of_day, count, weather)
+                    VALUES (%s, %s, %s, %s)
+                    """,
+                    inserts
+                )
+
+            # 每天只重算一次總數與主要天氣（小時筆數最多的 weather）
+            cursor.execute(
+                """
+                UPDATE daily_footfall d
+                SET d.total_count = (
+                  SELECT COALESCE(SUM(h.count), 0)
+                  FROM hourly_footfall h
+                  WHERE h.daily_id = d.id
+                ),
+                d.weather = COALESCE((
+                  SELECT h.weather
+                  FROM hourly_footfall h
+                  WHERE h.daily_id = d.id
+                  GROUP BY h.weather
+                  ORDER BY COUNT(*) DESC
+                  LIMIT 1
+                ), d.weather)
+                WHERE d.id = %s
+                """,
+                (daily_id,)
+            )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+    return len(touched)
@@ -0,0 +1,139 @@
+# 上傳影片的結果快取：相同內容、相同模型與計數設定的影片不再重新處理
+#
+# 快取鍵 = blake2b(影片內容雜湊 + 模型版本 + 後端 + 攝影機設定 + 會影響計數的參數)
+# 結果記錄在 result_cache 表；處理後影片的總大小超過上限時，依最後使用時間淘汰最舊的輸出檔（LRU）。
+# 淘汰的輸出檔可能仍被已完成的 video_jobs 引用，這些工作會標記為 output_expired，不再提供下載連結。
+
+import hashlib
+import json
+import os
+
+from count_footfall.camera import load_camera_config
+from count_footfall.det_cache import model_id
+from count_footfall.detectors import resolve_backend
+from count_footfall.model_registry import DEFAULT_MODEL_PATH
+
+HASH_ALGORITHM = 'blake2b'
+_CHUNK = 1 << 20
+
+# 會影響計數結果的 process_video 參數；batch_size、pipelined 等只影響速度，不列入
+RESULT_OPTIONS = ('mode', 'stride', 'adaptive_stride', 'max_stride', 'motion_gate', 'tracker_params')
+
+
+def save_upload(stream, path):
+    """一邊把上傳的檔案寫到磁碟一邊計算內容雜湊，不需要再讀一次檔案"""
+    h = hashlib.new(HASH_ALGORITHM)
+    with open(path, 'wb') as f:
+        for chunk in iter(lambda: stream.read(_CHUNK), b''):
+            h.update(chunk)
+            f.write(chunk)
+    return h.hexdigest()
+
+
+def result_cache_key(content_hash, options):
+    model_path = options.get('model_path', DEFAULT_MODEL_PATH)
+    config = {
+        "video": content_hash,
+        "model": model_id(model_path),
+        "backend": resolve_backend(model_path, options.get('backend')),
+        "camera": load_camera_config(options.get('camera')).model_dump(),
+        "options": {k: options.get(k) for k in RESULT_OPTIONS},
+    }
+    return hashlib.blake2b(json.dumps(config, sort_keys=True, default=str).encode(),
+                           digest_size=16).hexdigest()
+
+
+class ResultCache:
+
+    def __init__(self, pool, max_bytes):
+        self.pool = pool
+        self.max_bytes = max_bytes
+
+    def _execute(self, sql, params=()):
+        conn = self.pool.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(sql, params)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _fetchall(self, sql, params=()):
+        conn = self.pool.get_connection()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+            conn.close()
+
+    def lookup(self, cache_key):
+        """命中時更新最後使用時間並回傳該筆資料；輸出檔已被刪除時視為沒有命中"""
+        rows = self._fetchall("SELECT * FROM result_cache WHERE cache_key = %s", (cache_key,))
+        if not rows:
+            return None
+        row = rows[0]
+        if row['output_path'] and not os.path.isfile(row['output_path']):
+            self._execute("DELETE FROM result_cache WHERE cache_key = %s", (cache_key,))
+            return None
+        self._execute(
+            "UPDATE result_cache SET last_used_at = CURRENT_TIMESTAMP(6) WHERE cache_key = %s",
+            (cache_key,)
+        )
+        return row
+
+    def store(self, cache_key, video_path, footfall, output_path):
+        size = os.path.getsize(output_path) if output_path and os.path.isfile(output_path) else 0
+        self._execute(
+            """
+            INSERT INTO result_cache (cache_key, video_path, output_path, footfall, size_bytes)
+            VALUES (%s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                video_path = VALUES(video_path),
+                output_path = VALUES(output_path),
+                footfall = VALUES(footfall),
+                size_bytes = VALUES(size_bytes),
+                last_used_at = CURRENT_TIMESTAMP(6)
+            """,
+            (cache_key, video_path, output_path or '', footfall, size)
+        )
+        self.evict()
+
+    def evict(self):
+        """
+        由最近使用的開始累計大小，超過上限之後的項目連同輸出檔一起刪除，
+        並把引用該輸出檔的工作標記為輸出已過期（計數結果保留）
+        """
+        rows = self._fetchall(
+            "SELECT cache_key, output_path, size_bytes FROM result_cache ORDER BY last_used_at DESC"
+        )
+        used = 0
+        evicted = []
+        for i, row in enumerate(rows):
+            used += row['size_bytes']
+            # 最新的一筆（剛處理完、使用者還沒下載）不淘汰
+            if used > self.max_bytes and i > 0:
+                evicted.append(row)
+
+        for row in evicted:
+            if row['output_path']:
+                # 先更新工作再刪檔：中途失敗時只會多留一個檔案，不會留下指向不存在檔案的下載連結
+                self._execute(
+                    """
+                    UPDATE video_jobs SET output_path = '', output_expired = 1
+                    WHERE cache_key = %s AND output_path = %s
+                    """,
+                    (row['cache_key'], row['output_path'])
+                )
+            if row['output_path'] and os.path.isfile(row['output_path']):
+                os.remove(row['output_path'])
+            self._execute("DELETE FROM result_cache WHERE cache_key = %s", (row['cache_key'],))
+        if evicted:
+            print(f"[INFO] result cache evicted {len(evicted)} outputs "
+                  f"({sum(r['size_bytes'] for r in evicted) / 2**20:.1f} MiB)")
+        return len(evicted)
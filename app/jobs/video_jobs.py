@@ -0,0 +1,438 @@
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from count_footfall.model_registry import preload
+from count_footfall.process import process_video, ProcessingCancelled
+from count_footfall.checkpoint import CHECKPOINT_DIR, remove_checkpoint, remove_parts
+from count_footfall.metrics import PipelineMetrics
+from app.jobs.result_cache import result_cache_key
+
+# 工作狀態
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATUSES = (DONE, FAILED, CANCELLED)
+
+# 進度寫回資料庫的最短間隔（秒），避免每張影格都打一次 DB
+PROGRESS_FLUSH_INTERVAL = 2.0
+
+# 執行中的工作每隔多久更新一次心跳並檢查取消要求（秒）
+HEARTBEAT_INTERVAL = 5.0
+# 心跳超過這麼久沒更新的 running 工作，視為執行它的服務已中斷，重新排入佇列（秒）
+STALE_AFTER = 60
+
+
+class VideoJobManager:
+    """
+    影片處理工作佇列：
+    上傳後立即回傳 job_id，實際的 process_video 交給有上限的 worker pool 執行。
+    工作狀態寫在 video_jobs 表，服務重啟後未完成的工作會重新排入佇列，
+    並從該工作最後一次的檢查點繼續處理。
+    每個 manager 有自己的 instance_id，執行中的工作記下 owner 並定期更新心跳；
+    只有心跳過期的工作才會被重新排隊，多個行程（或 debug reloader）共用同一個資料庫時
+    不會把別的行程正在執行的工作再跑一次。
+    """
+
+    def __init__(self, pool, output_folder, max_workers=1, process_options=None,
+                 preload_models=(), result_cache=None):
+        self.pool = pool
+        self.output_folder = output_folder
+        self.max_workers = max_workers
+        # 啟動時先載入並暖機的模型權重
+        self.preload_models = list(preload_models)
+        # 額外傳給 process_video 的參數，例如 batch_size
+        self.process_options = dict(process_options or {})
+        # result_cache.ResultCache；None 時每次上傳都重新處理
+        self.result_cache = result_cache
+
+        self.instance_id = uuid.uuid4().hex
+        self._executor = None
+        self._heartbeat = None
+        self._lock = threading.Lock()
+        # 序列化 submit 的「查詢進行中的相同工作 → 新增工作」，避免同時上傳相同影片時各自建立一筆
+        self._submit_lock = threading.Lock()
+        self._cancel_events = {}   # job_id -> threading.Event
+        self._progress = {}        # job_id -> (frames_done, frames_total)
+        self._metrics = {}         # job_id -> PipelineMetrics，只保留執行中的工作
+
+    # ---------- 資料庫存取 ----------
+
+    def _execute(self, sql, params=()):
+        conn = self.pool.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(sql, params)
+            conn.commit()
+            return cursor.rowcount
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _fetchall(self, sql, params=()):
+        conn = self.pool.get_connection()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+            conn.close()
+
+    # ---------- 啟動與復原 ----------
+
+    def start(self):
+        """
+        建立 worker pool 與心跳執行緒，並把上次服務中斷時尚未完成的工作重新排入佇列。
+        可重複呼叫，只有第一次會生效。
+        """
+        with self._lock:
+            if self._executor is not None:
+                return
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="video-job",
+            )
+            # 模型載入排在所有工作之前，由 worker 執行，不卡住 API
+            if self.preload_models:
+                self._executor.submit(preload, self.preload_models,
+                                      self.process_options.get('backend'))
+
+            self._heartbeat = threading.Thread(
+                target=self._heartbeat_loop, name="video-job-heartbeat", daemon=True)
+            self._heartbeat.start()
+
+        self._recover_stale()
+        rows = self._fetchall(
+            "SELECT id FROM video_jobs WHERE status = %s ORDER BY created_at",
+            (QUEUED,)
+        )
+        for row in rows:
+            # 排隊中的工作可能同時被別的行程排入；由 _run 的認領決定誰執行
+            with self._lock:
+                enqueued = row['id'] in self._cancel_events
+            if not enqueued:
+                self._enqueue(row['id'])
+
+    def _recover_stale(self):
+        """
+        心跳過期的 running 工作代表執行它的服務已中斷，重新排隊後從檢查點繼續；
+        以條件式 UPDATE 認領，多個行程同時檢查時只有一個會排入
+        """
+        stale = """
+            status = %s AND (heartbeat_at IS NULL
+                             OR heartbeat_at < CURRENT_TIMESTAMP - INTERVAL %s SECOND)
+        """
+        rows = self._fetchall(
+            f"SELECT id, output_path, cancel_requested FROM video_jobs WHERE {stale} ORDER BY created_at",
+            (RUNNING, STALE_AFTER)
+        )
+        for row in rows:
+            if row['cancel_requested']:
+                # 中斷前已要求取消：直接標記取消，不再續跑
+                cancelled = self._execute(
+                    f"UPDATE video_jobs SET status = %s, owner = NULL WHERE id = %s AND {stale}",
+                    (CANCELLED, row['id'], RUNNING, STALE_AFTER)
+                )
+                if cancelled:
+                    self._discard_checkpoint(os.path.join(CHECKPOINT_DIR, f"{row['id']}.ckpt"),
+                                             row['output_path'])
+                continue
+            requeued = self._execute(
+                f"UPDATE video_jobs SET status = %s, frames_done = 0, owner = NULL "
+                f"WHERE id = %s AND {stale}",
+                (QUEUED, row['id'], RUNNING, STALE_AFTER)
+            )
+            if requeued:
+                print(f"[INFO] requeued stale job {row['id']}")
+                self._enqueue(row['id'])
+
+    def _heartbeat_loop(self):
+        """
+        更新這個 manager 執行中工作的心跳、把其他行程收到的取消要求轉給執行中的工作，
+        順便接手其他已中斷服務留下的工作
+        """
+        while True:
+            time.sleep(HEARTBEAT_INTERVAL)
+            try:
+                self._execute(
+                    "UPDATE video_jobs SET heartbeat_at = CURRENT_TIMESTAMP WHERE owner = %s AND status = %s",
+                    (self.instance_id, RUNNING)
+                )
+                self._poll_cancellations()
+                self._recover_stale()
+            except Exception as e:
+                print(f"[WARN] video job heartbeat failed: {e}")
+
+    def _poll_cancellations(self):
+        """cancel() 可能由別的行程處理，取消要求寫在資料庫，由擁有該工作的 manager 設定 event"""
+        rows = self._fetchall(
+            "SELECT id FROM video_jobs WHERE owner = %s AND status = %s AND cancel_requested = 1",
+            (self.instance_id, RUNNING)
+        )
+        for row in rows:
+            with self._lock:
+                event = self._cancel_events.get(row['id'])
+            if event is not None:
+                event.set()
+
+    def _enqueue(self, job_id):
+        with self._lock:
+            self._cancel_events[job_id] = threading.Event()
+        self._executor.submit(self._run, job_id)
+
+    # ---------- 對外介面 ----------
+
+    def submit(self, video_path, content_hash=None):
+        """
+        新增一筆工作並排入佇列，回傳 job_id。
+        有 content_hash 且啟用結果快取時，內容與設定都相同的影片：
+          - 已處理過：直接建立一筆已完成的工作，沿用之前的計數與輸出影片
+          - 正在排隊或處理中：回傳該工作
+        這兩種情況都會刪除這次上傳的重複檔案。
+        查詢與新增在 _submit_lock 內完成，同時上傳相同影片只會建立一筆工作。
+        """
+        self.start()
+        with self._submit_lock:
+            job_id, queued = self._insert_job(video_path, content_hash)
+        if queued:
+            self._enqueue(job_id)
+        return job_id
+
+    def _insert_job(self, video_path, content_hash):
+        """submit 的查詢與新增，呼叫端必須持有 _submit_lock；回傳 (job_id, 是否需要排入佇列)"""
+        cache_key = None
+        if self.result_cache is not None and content_hash:
+            cache_key = result_cache_key(content_hash, self.process_options)
+
+            active = self._fetchall(
+                "SELECT id FROM video_jobs WHERE cache_key = %s AND status IN (%s, %s) LIMIT 1",
+                (cache_key, QUEUED, RUNNING)
+            )
+            if active:
+                self._discard_upload(video_path)
+                return active[0]['id'], False
+
+            hit = self.result_cache.lookup(cache_key)
+            if hit is not None:
+                job_id = uuid.uuid4().hex
+                self._execute(
+                    """
+                    INSERT INTO video_jobs
+                        (id, status, video_path, output_path, footfall, cache_key)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                    """,
+                    (job_id, DONE, hit['video_path'], hit['output_path'], hit['footfall'], cache_key)
+                )
+                if hit['video_path'] != video_path:
+                    self._discard_upload(video_path)
+                return job_id, False
+
+        job_id = uuid.uuid4().hex
+        output_path = os.path.normpath(
+            os.path.join(self.output_folder, f"result_{job_id}.mp4"))
+        self._execute(
+            """
+            INSERT INTO video_jobs (id, status, video_path, output_path, cache_key)
+            VALUES (%s, %s, %s, %s, %s)
+            """,
+            (job_id, QUEUED, video_path, output_path, cache_key)
+        )
+        return job_id, True
+
+    @staticmethod
+    def _discard_upload(video_path):
+        if os.path.isfile(video_path):
+            os.remove(video_path)
+
+    def get(self, job_id):
+        rows = self._fetchall("SELECT * FROM video_jobs WHERE id = %s", (job_id,))
+        if not rows:
+            return None
+        return self._to_dict(rows[0])
+
+    def list_jobs(self, limit=50):
+        rows = self._fetchall(
+            "SELECT * FROM video_jobs ORDER BY created_at DESC LIMIT %s",
+            (limit,)
+        )
+        return [self._to_dict(r) for r in rows]
+
+    def cancel(self, job_id):
+        """
+        取消工作，回傳取消後的工作資料；工作不存在回傳 None。
+        已結束的工作不會被改動，呼叫端可從 status 判斷。
+        執行中的工作若屬於別的行程，由該行程的心跳在 HEARTBEAT_INTERVAL 秒內轉給 worker。
+        """
+        job = self.get(job_id)
+        if job is None or job['status'] in FINISHED_STATUSES:
+            return job
+
+        self._execute(
+            "UPDATE video_jobs SET cancel_requested = 1 WHERE id = %s AND status IN (%s, %s)",
+            (job_id, QUEUED, RUNNING)
+        )
+        with self._lock:
+            event = self._cancel_events.get(job_id)
+        if event is not None:
+            event.set()
+
+        # 還在排隊的工作直接標記取消；執行中的由 worker 收到 event 後自行標記
+        self._execute(
+            "UPDATE video_jobs SET status = %s WHERE id = %s AND status = %s",
+            (CANCELLED, job_id, QUEUED)
+        )
+        return self.get(job_id)
+
+    def metrics(self, job_id):
+        """
+        工作的效能統計（metrics.PipelineMetrics.snapshot()）：
+        執行中的工作回傳即時數據，已結束的回傳完成時存下的數據；
+        還在排隊、沒有數據（例如結果快取命中）或工作不存在時回傳 None
+        """
+        with self._lock:
+            live = self._metrics.get(job_id)
+        if live is not None:
+            return live.snapshot()
+        rows = self._fetchall("SELECT metrics FROM video_jobs WHERE id = %s", (job_id,))
+        if rows and rows[0]['metrics']:
+            return json.loads(rows[0]['metrics'])
+        return None
+
+    # ---------- worker ----------
+
+    def _run(self, job_id):
+        with self._lock:
+            event = self._cancel_events.get(job_id)
+
+        # 只有仍在排隊中的工作才會被執行（排隊時可能已被取消，或已被別的行程認領）
+        claimed = self._execute(
+            """
+            UPDATE video_jobs SET status = %s, owner = %s, heartbeat_at = CURRENT_TIMESTAMP
+            WHERE id = %s AND status = %s
+            """,
+            (RUNNING, self.instance_id, job_id, QUEUED)
+        )
+        if not claimed:
+            self._forget(job_id)
+            return
+
+        job = self._fetchall(
+            "SELECT video_path, output_path, cache_key FROM video_jobs WHERE id = %s",
+            (job_id,)
+        )[0]
+
+        last_flush = [0.0]
+
+        def on_progress(done, total):
+            self._progress[job_id] = (done, total)
+            now = time.monotonic()
+            if now - last_flush[0] >= PROGRESS_FLUSH_INTERVAL:
+                last_flush[0] = now
+                self._execute(
+                    "UPDATE video_jobs SET frames_done = %s, frames_total = %s WHERE id = %s",
+                    (done, total, job_id)
+                )
+
+        metrics = PipelineMetrics()
+        with self._lock:
+            self._metrics[job_id] = metrics
+
+        checkpoint_path = os.path.join(CHECKPOINT_DIR, f"{job_id}.ckpt")
+        try:
+            footfall, output_path = process_video(
+                job['video_path'],
+                output_path=job['output_path'],
+                progress_callback=on_progress,
+                cancel_event=event,
+                checkpoint_path=checkpoint_path,
+                metrics=metrics,
+                **self.process_options,
+            )
+        except ProcessingCancelled:
+            self._discard_checkpoint(checkpoint_path, job['output_path'])
+            self._finish(job_id, CANCELLED, metrics=metrics)
+        except Exception as e:
+            # 檢查點只用於服務中斷後續跑，處理失敗的工作不會再重試
+            self._discard_checkpoint(checkpoint_path, job['output_path'])
+            self._finish(job_id, FAILED, error=str(e), metrics=metrics)
+        else:
+            # count 模式沒有輸出影片，output_path 為 None
+            self._finish(job_id, DONE, footfall=footfall, output_path=output_path or '',
+                         metrics=metrics)
+            if self.result_cache is not None and job['cache_key']:
+                try:
+                    self.result_cache.store(job['cache_key'], job['video_path'],
+                                            footfall, output_path)
+                except Exception as e:
+                    # 快取寫入失敗不影響工作結果
+                    print(f"[WARN] result cache store failed for job {job_id}: {e}")
+        finally:
+            self._forget(job_id)
+
+    @staticmethod
+    def _discard_checkpoint(checkpoint_path, output_path):
+        """不會再續跑的工作：刪除檢查點與已寫出的輸出影片片段"""
+        remove_checkpoint(checkpoint_path)
+        removed = remove_parts(output_path)
+        if removed:
+            print(f"[INFO] removed {removed} output parts of {output_path}")
+
+    def _finish(self, job_id, status, footfall=None, output_path=None, error=None, metrics=None):
+        done, total = self._progress.get(job_id, (0, 0))
+        report = json.dumps(metrics.snapshot()) if metrics is not None else None
+        self._execute(
+            """
+            UPDATE video_jobs
+            SET status = %s, footfall = %s, error = %s,
+                output_path = COALESCE(%s, output_path),
+                frames_done = GREATEST(frames_done, %s),
+                frames_total = GREATEST(frames_total, %s),
+                metrics = COALESCE(%s, metrics)
+            WHERE id = %s AND owner = %s
+            """,
+            (status, footfall, error, output_path, done, total, report, job_id, self.instance_id)
+        )
+
+    def _forget(self, job_id):
+        with self._lock:
+            self._cancel_events.pop(job_id, None)
+            self._metrics.pop(job_id, None)
+        self._progress.pop(job_id, None)
+
+    def _to_dict(self, row):
+        job_id = row['id']
+        done, total = row['frames_done'], row['frames_total']
+        # 執行中的工作用記憶體裡最新的進度，資料庫只是定期落盤
+        if job_id in self._progress:
+            done, total = self._progress[job_id]
+
+        job = {
+            "job_id": job_id,
+            "status": row['status'],
+            "video_path": row['video_path'],
+            "progress": {
+                "frames_done": done,
+                "frames_total": total,
+                "percent": round(done * 100.0 / total, 1) if total else 0.0,
+            },
+            "footfall": row['footfall'],
+            # 輸出影片已被結果快取淘汰，計數仍然有效但無法下載
+            "output_expired": bool(row['output_expired']),
+            "cancel_requested": bool(row['cancel_requested']),
+            "error": row['error'],
+            "created_at": row['created_at'].strftime('%Y-%m-%d %H:%M:%S'),
+            "updated_at": row['updated_at'].strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        if row['status'] == DONE and row['output_path']:
+            job["download_url"] = f"/api/download_video/{row['output_path']}"
+        return job
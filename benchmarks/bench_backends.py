@@ -0,0 +1,68 @@
+# 偵測器後端比較：每個模型 / 後端組合的 fps 與計數漂移（以第一個為基準）
+#
+# 用法（在專案根目錄執行，先以 count_footfall.export_model 匯出 ONNX / INT8）：
+#   python -m benchmarks.bench_backends --video input/reference.mp4 \
+#       --models count_footfall/yolo-coco/best.pt count_footfall/yolo-coco/best.onnx \
+#                count_footfall/yolo-coco/best.int8.onnx
+#   # 同一個 ONNX 檔比較 CPU 與 OpenVINO execution provider
+#   python -m benchmarks.bench_backends --video input/reference.mp4 \
+#       --models best.onnx:onnxruntime best.onnx:openvino
+
+import argparse
+import time
+
+import cv2
+
+from count_footfall.model_registry import get_model
+from count_footfall.process import process_video, MODE_COUNT
+
+
+def parse_case(spec):
+    """"路徑" 或 "路徑:後端" """
+    path, _, backend = spec.partition(':')
+    return path, backend or None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="偵測器後端 fps 與計數漂移比較")
+    parser.add_argument("--video", required=True)
+    parser.add_argument("--models", nargs="+", required=True,
+                        help="模型路徑，可加 :ultralytics / :onnxruntime / :openvino 指定後端")
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--camera", default=None)
+    args = parser.parse_args()
+
+    vs = cv2.VideoCapture(args.video)
+    total = int(vs.get(cv2.CAP_PROP_FRAME_COUNT))
+    vs.release()
+    if total <= 0:
+        raise SystemExit(f"無法讀取影片：{args.video}")
+
+    rows = []
+    for spec in args.models:
+        path, backend = parse_case(spec)
+        # 載入與暖機不算進 fps
+        model = get_model(path, backend)
+        start = time.perf_counter()
+        count, _ = process_video(args.video, path, mode=MODE_COUNT, save_result=False,
+                                 batch_size=args.batch_size, camera=args.camera,
+                                 backend=backend)
+        elapsed = time.perf_counter() - start
+        rows.append((spec, model.stats["backend"], total / elapsed, count,
+                     model.stats["param_bytes"]))
+
+    reference = rows[0][3]
+    base_fps = rows[0][2]
+    print(f"影格數：{total}  基準：{rows[0][0]}（計數 {reference}）")
+    print(f"{'model':<44}{'backend':<13}{'fps':>8}{'speedup':>9}{'count':>7}{'drift':>7}"
+          f"{'drift%':>8}{'size MiB':>10}")
+    for spec, backend, fps, count, size in rows:
+        drift = count - reference
+        pct = 100.0 * abs(drift) / reference if reference else 0.0
+        size_mib = f"{size / 2**20:.1f}" if size else "-"
+        print(f"{spec:<44}{backend:<13}{fps:>8.2f}{fps / base_fps:>9.2f}{count:>7}{drift:>+7}"
+              f"{pct:>7.1f}%{size_mib:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# 比較逐張推論（原本的寫法）與批次推論的速度
+# 批次推論與 process_video 相同：經由 model_registry 取得偵測器後端，
+# 依攝影機設定的 inference_size 與 ROI 呼叫 detect_batch，回傳 (N, 5) 的 dets 陣列
+#
+# 用法（在專案根目錄執行）：
+#   python -m benchmarks.bench_batched_inference --video input/xxx.mp4 \
+#       --model count_footfall/yolo-coco/best.pt --frames 300 --batch-sizes 1 4 8 16
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from count_footfall.camera import load_camera_config, Roi
+from count_footfall.detectors import BACKEND_ULTRALYTICS
+from count_footfall.model_registry import get_model
+from count_footfall.process import detect_batch, CONF_THRESHOLD, PERSON_CLASS_ID
+
+
+def read_frames(video_path, max_frames):
+    vs = cv2.VideoCapture(video_path)
+    frames = []
+    while len(frames) < max_frames:
+        grabbed, frame = vs.read()
+        if not grabbed:
+            break
+        frames.append(frame)
+    vs.release()
+    return frames
+
+
+def legacy_detect(model, frame):
+    # 原本 process_video 的寫法：逐張推論，再用 Python 迴圈過濾每個 box
+    results = model(frame, verbose=False)[0]
+    dets = []
+    for box in results.boxes:
+        if box.conf < CONF_THRESHOLD:
+            continue
+        x1, y1, x2, y2 = box.xyxy[0].tolist()
+        if int(box.cls) == PERSON_CLASS_ID:
+            dets.append([x1, y1, x2, y2, float(box.conf)])
+    return np.array(dets)
+
+
+def bench_legacy(model, frames):
+    start = time.perf_counter()
+    n_dets = sum(len(legacy_detect(model, f)) for f in frames)
+    return time.perf_counter() - start, n_dets
+
+
+def bench_batched(model, frames, batch_size, imgsz=None, roi=None):
+    start = time.perf_counter()
+    n_dets = 0
+    for i in range(0, len(frames), batch_size):
+        n_dets += sum(len(d) for d in detect_batch(model, frames[i:i + batch_size],
+                                                   imgsz=imgsz, roi=roi))
+    return time.perf_counter() - start, n_dets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="逐張 vs 批次 YOLO 推論速度比較")
+    parser.add_argument("--video", required=True)
+    parser.add_argument("--model", default="count_footfall/yolo-coco/best.pt")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--camera", default=None,
+                        help="攝影機設定名稱，批次推論套用其 inference_size 與 ROI")
+    args = parser.parse_args()
+
+    frames = read_frames(args.video, args.frames)
+    if not frames:
+        raise SystemExit(f"無法讀取影片：{args.video}")
+
+    camera = load_camera_config(args.camera)
+    roi = Roi(camera.roi, frames[0].shape[:2]) if camera.roi is not None else None
+    # 與 process_video 相同的偵測器（載入時已暖機）；原本的寫法直接呼叫底下的 ultralytics.YOLO
+    model = get_model(args.model, BACKEND_ULTRALYTICS)
+    yolo = model.model.model
+    yolo(frames[0], verbose=False)
+
+    print(f"影格數：{len(frames)}  解析度：{frames[0].shape[1]}x{frames[0].shape[0]}")
+    print(f"{'mode':<12}{'fps':>10}{'speedup':>10}{'dets':>8}")
+
+    elapsed, n_dets = bench_legacy(yolo, frames)
+    base_fps = len(frames) / elapsed
+    print(f"{'legacy':<12}{base_fps:>10.2f}{1.0:>10.2f}{n_dets:>8}")
+
+    for bs in args.batch_sizes:
+        elapsed, n_dets = bench_batched(model, frames, bs, camera.inference_size, roi)
+        fps = len(frames) / elapsed
+        print(f"{'batch=' + str(bs):<12}{fps:>10.2f}{fps / base_fps:>10.2f}{n_dets:>8}")
+
+
+if __name__ == "__main__":
+    main()
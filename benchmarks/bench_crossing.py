@@ -0,0 +1,109 @@
+# 越線計數：原本逐一軌跡的 Python 迴圈 vs CrossingCounter（NumPy 一次判斷所有軌跡與閘門）
+# 以隨機走動的合成軌跡測試，不需要影片與模型；同時檢查兩者的計數一致
+#
+# 用法（在專案根目錄執行）：
+#   python -m benchmarks.bench_crossing --tracks 10 100 300 1000 --gates 1 4 16
+
+import argparse
+import time
+
+import numpy as np
+
+from count_footfall.counting import CrossingCounter
+
+WIDTH, HEIGHT = 1280, 720
+
+
+def synthetic_tracks(n_tracks, n_frames, seed=0):
+    """回傳每張影格的 (track_ids, boxes)；軌跡隨機走動，部分軌跡中途消失再由新 ID 取代"""
+    rng = np.random.default_rng(seed)
+    pos = rng.uniform([0, 0], [WIDTH, HEIGHT], size=(n_tracks, 2))
+    vel = rng.normal(0, 6, size=(n_tracks, 2))
+    ids = np.arange(n_tracks)
+    next_id = n_tracks
+    frames = []
+    for _ in range(n_frames):
+        vel += rng.normal(0, 1, size=vel.shape)
+        pos = (pos + vel) % [WIDTH, HEIGHT]
+        # 約 1% 的軌跡換成新 ID（離開畫面 / 追蹤中斷）
+        lost = rng.random(n_tracks) < 0.01
+        ids = ids.copy()
+        ids[lost] = np.arange(next_id, next_id + lost.sum())
+        next_id += int(lost.sum())
+        boxes = np.hstack([pos - [20, 50], pos + [20, 50]])
+        frames.append((ids, boxes))
+    return frames
+
+
+def make_gates(n_gates, seed=1):
+    rng = np.random.default_rng(seed)
+    gates = []
+    for i in range(n_gates):
+        a = rng.integers([0, 0], [WIDTH, HEIGHT])
+        b = rng.integers([0, 0], [WIDTH, HEIGHT])
+        gates.append((f"g{i}", [tuple(a.tolist()), tuple(b.tolist())]))
+    return gates
+
+
+def loop_counter(frames, gates):
+    """原本 process_video 的寫法：逐一軌跡、逐一線段判斷"""
+    def intersect(A, B, C, D):
+        return ccw(A, C, D) != ccw(B, C, D) and ccw(A, B, C) != ccw(A, B, D)
+
+    def ccw(A, B, C):
+        return (C[1] - A[1]) * (B[0] - A[0]) > (B[1] - A[1]) * (C[0] - A[0])
+
+    lines = [points for _, points in gates]
+    memory = {}
+    counter = 0
+    for ids, boxes in frames:
+        previous = memory
+        memory = {}
+        for track_id, (x1, y1, x2, y2) in zip(ids.tolist(), boxes.tolist()):
+            memory[track_id] = [x1, y1, x2, y2]
+            if track_id in previous:
+                x2_prev, y2_prev, x4_prev, y4_prev = previous[track_id]
+                p0 = (int((x1 + x2) / 2), int((y1 + y2) / 2))
+                p1 = (int((x2_prev + x4_prev) / 2), int((y2_prev + y4_prev) / 2))
+                for line in lines:
+                    if intersect(p0, p1, line[0], line[1]):
+                        counter += 1
+    return counter
+
+
+def vectorized_counter(frames, gates):
+    counter = CrossingCounter(gates)
+    for ids, boxes in frames:
+        centers = ((boxes[:, 0:2] + boxes[:, 2:4]) / 2).astype(np.int64)
+        counter.update(ids, centers)
+    return counter.total
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="越線計數：逐一軌跡迴圈 vs NumPy 向量化")
+    parser.add_argument("--tracks", type=int, nargs="+", default=[10, 100, 300, 1000])
+    parser.add_argument("--gates", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--frames", type=int, default=300)
+    args = parser.parse_args()
+
+    print(f"{'tracks':>7}{'gates':>7}{'loop ms/f':>12}{'numpy ms/f':>12}{'speedup':>10}"
+          f"{'count':>8}{'match':>7}")
+    for n_tracks in args.tracks:
+        frames = synthetic_tracks(n_tracks, args.frames)
+        for n_gates in args.gates:
+            gates = make_gates(n_gates)
+            loop_s, loop_count = timed(loop_counter, frames, gates)
+            vec_s, vec_count = timed(vectorized_counter, frames, gates)
+            print(f"{n_tracks:>7}{n_gates:>7}{1000 * loop_s / args.frames:>12.3f}"
+                  f"{1000 * vec_s / args.frames:>12.3f}{loop_s / vec_s:>10.1f}"
+                  f"{vec_count:>8}{'yes' if loop_count == vec_count else 'NO':>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+# 追蹤與越線計數的熱點運算，三種實作比較：Python 迴圈（原本的寫法）、NumPy、numba（count_footfall.kernels）
+#   iou      N 個偵測 x N 條軌跡的 IoU 矩陣
+#   kalman   N 條軌跡每張影格各做一次 predict 與 update（Python 迴圈為每條軌跡一個 filterpy 濾波器）
+#   crossing N 條移動線段 x G 條計數線的相交判斷
+# 同時檢查三者輸出一致，並列出 numba 第一次呼叫的時間（有磁碟快取時只是載入，沒有時包含編譯）
+#
+# 用法（在專案根目錄執行）：
+#   python -m benchmarks.bench_kernels --sizes 10 100 1000 --gates 4
+
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.bench_crossing import make_gates
+from benchmarks.bench_sort_kalman import KalmanBoxTracker
+from count_footfall import kernels
+from count_footfall.counting import segments_cross_lines
+from count_footfall.sort import KalmanBoxTracks, iou, iou_batch
+
+
+def boxes(n, rng):
+    c = rng.uniform([0, 0], [1920, 1080], size=(n, 2))
+    s = rng.uniform([20, 50], [40, 100], size=(n, 2))
+    return np.hstack([c - s / 2, c + s / 2])
+
+
+def iou_loop(dets, trks):
+    out = np.zeros((len(dets), len(trks)))
+    for d, det in enumerate(dets):
+        for t, trk in enumerate(trks):
+            out[d, t] = iou(det, trk)
+    return out
+
+
+def kalman_loop(init, steps):
+    trackers = [KalmanBoxTracker(b) for b in init]
+    start = time.perf_counter()
+    for obs in steps:
+        for trk, b in zip(trackers, obs):
+            trk.predict()
+            trk.update(b)
+    elapsed = (time.perf_counter() - start) / len(steps)
+    return elapsed, np.array([trk.kf.x[:, 0] for trk in trackers])
+
+
+def kalman_batched(init, steps):
+    tracks = KalmanBoxTracks()
+    tracks.add(init)
+    idx = np.arange(len(init))
+    start = time.perf_counter()
+    for obs in steps:
+        tracks.predict()
+        tracks.update(idx, obs)
+    elapsed = (time.perf_counter() - start) / len(steps)
+    return elapsed, tracks.x
+
+
+def crossing_loop(p0, p1, lines):
+    def ccw(A, B, C):
+        return (C[1] - A[1]) * (B[0] - A[0]) > (B[1] - A[1]) * (C[0] - A[0])
+
+    hit = np.zeros((len(p0), len(lines)), dtype=bool)
+    side = np.zeros((len(p0), len(lines)), dtype=bool)
+    for i, (a, b) in enumerate(zip(p0.tolist(), p1.tolist())):
+        for j, (ax, ay, bx, by) in enumerate(lines.tolist()):
+            A, B = (ax, ay), (bx, by)
+            side[i, j] = ccw(A, B, a)
+            hit[i, j] = ccw(a, A, B) != ccw(b, A, B) and ccw(a, b, A) != ccw(a, b, B)
+    return hit, side
+
+
+def timed(fn, *args, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn(*args)
+    return (time.perf_counter() - start) / repeat, result
+
+
+def with_numba(flag, fn, *args, repeat):
+    kernels.set_enabled(flag)
+    try:
+        return timed(fn, *args, repeat=repeat)
+    finally:
+        kernels.set_enabled(kernels.numba is not None)
+
+
+def first_calls(rng):
+    """numba 每個 kernel 的第一次呼叫（快取載入或編譯）"""
+    kernels.set_enabled(True)
+    a, b = boxes(4, rng), boxes(4, rng)
+    p0 = a[:, :2].astype(np.int64)
+    p1 = b[:, :2].astype(np.int64)
+    tracks = KalmanBoxTracks()
+    tracks.add(a)
+    calls = [
+        ("iou", lambda: iou_batch(a, b)),
+        ("kalman predict", tracks.predict),
+        ("kalman update", lambda: tracks.update(np.arange(4), b)),
+        ("crossing", lambda: segments_cross_lines(p0, p1, np.hstack([p0, p1]))),
+    ]
+    for name, call in calls:
+        start = time.perf_counter()
+        call()
+        print(f"  {name:<16}{1000 * (time.perf_counter() - start):>10.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="IoU / Kalman / 線段相交：Python 迴圈 vs NumPy vs numba")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--gates", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    if kernels.numba is None:
+        raise SystemExit("numba 未安裝，只能比較 Python 迴圈與 NumPy")
+    print("numba first call (cache load or compile):")
+    first_calls(rng)
+
+    print(f"{'kernel':<10}{'n':>6}{'loop ms':>11}{'numpy ms':>11}{'numba ms':>11}"
+          f"{'vs loop':>9}{'vs numpy':>10}{'same':>6}")
+
+    def row(name, n, loop_s, numpy_s, numba_s, same):
+        print(f"{name:<10}{n:>6}{1000 * loop_s:>11.3f}{1000 * numpy_s:>11.3f}{1000 * numba_s:>11.3f}"
+              f"{loop_s / numba_s:>9.1f}{numpy_s / numba_s:>10.1f}{'yes' if same else 'NO':>6}")
+
+    for n in args.sizes:
+        dets, trks = boxes(n, rng), boxes(n, rng)
+        trks[: n // 2] = dets[: n // 2] + rng.normal(0, 4, size=(n // 2, 4))
+        loop_s, a = timed(iou_loop, dets, trks, repeat=1)
+        numpy_s, b = with_numba(False, iou_batch, dets, trks, repeat=args.repeat)
+        numba_s, c = with_numba(True, iou_batch, dets, trks, repeat=args.repeat)
+        row("iou", n, loop_s, numpy_s, numba_s, np.array_equal(a, b) and np.array_equal(b, c))
+
+    for n in args.sizes:
+        init = boxes(n, rng)
+        # 等速移動加上觀測雜訊，模擬 20 張影格
+        steps = [init + 2.0 * k + rng.normal(0, 3, size=init.shape) for k in range(1, 21)]
+        loop_s, a = kalman_loop(init, steps)
+        _, (numpy_s, b) = with_numba(False, kalman_batched, init, steps, repeat=1)
+        _, (numba_s, c) = with_numba(True, kalman_batched, init, steps, repeat=1)
+        same = np.allclose(a, b, rtol=0, atol=1e-9) and np.allclose(b, c, rtol=0, atol=1e-9)
+        row("kalman", n, loop_s, numpy_s, numba_s, same)
+
+    lines = np.array([np.reshape(points, 4) for _, points in make_gates(args.gates)], dtype=np.int64)
+    for n in args.sizes:
+        p0 = rng.integers([0, 0], [1280, 720], size=(n, 2))
+        p1 = p0 + rng.integers(-40, 40, size=(n, 2))
+        loop_s, a = timed(crossing_loop, p0, p1, lines, repeat=1)
+        numpy_s, b = with_numba(False, segments_cross_lines, p0, p1, lines, repeat=args.repeat)
+        numba_s, c = with_numba(True, segments_cross_lines, p0, p1, lines, repeat=args.repeat)
+        same = all(np.array_equal(x, y) and np.array_equal(y, z) for x, y, z in zip(a, b, c))
+        row("crossing", n, loop_s, numpy_s, numba_s, same)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# 比較不同輸出模式（count / video / debug）每張影格的成本
+#
+# 用法（在專案根目錄執行）：
+#   python -m benchmarks.bench_output_modes --video input/xxx.mp4 \
+#       --model count_footfall/yolo-coco/best.pt --debug-every 30
+#
+# 模型只在第一次載入（model_registry），各模式的推論成本相同，
+# 差異即為繪圖、PNG 輸出與影片編碼的成本。
+
+import argparse
+import time
+
+import cv2
+
+from count_footfall.model_registry import get_model
+from count_footfall.process import process_video, MODE_COUNT, MODE_VIDEO, MODE_DEBUG
+
+
+def run(video, model, mode, debug_every, batch_size):
+    start = time.perf_counter()
+    count, _ = process_video(video, model, output_path="output/bench_modes.mp4",
+                             batch_size=batch_size, mode=mode,
+                             debug_every=debug_every, save_result=False)
+    return time.perf_counter() - start, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="各輸出模式的每張影格成本")
+    parser.add_argument("--video", required=True)
+    parser.add_argument("--model", default="count_footfall/yolo-coco/best.pt")
+    parser.add_argument("--debug-every", type=int, default=30)
+    parser.add_argument("--batch-size", type=int, default=1)
+    args = parser.parse_args()
+
+    vs = cv2.VideoCapture(args.video)
+    total = int(vs.get(cv2.CAP_PROP_FRAME_COUNT))
+    vs.release()
+    if total <= 0:
+        raise SystemExit(f"無法讀取影片：{args.video}")
+
+    get_model(args.model)
+
+    cases = [
+        ("debug/1", MODE_DEBUG, 1),     # 原本的行為：每張都存 PNG
+        (f"debug/{args.debug_every}", MODE_DEBUG, args.debug_every),
+        ("video", MODE_VIDEO, 1),
+        ("count", MODE_COUNT, 1),
+    ]
+
+    rows = []
+    for name, mode, every in cases:
+        elapsed, count = run(args.video, args.model, mode, every, args.batch_size)
+        rows.append((name, elapsed * 1000 / total, count))
+
+    base = rows[0][1]
+    print(f"影格數：{total}")
+    print(f"{'mode':<12}{'ms/frame':>10}{'saved':>10}{'fps':>10}{'count':>8}")
+    for name, ms, count in rows:
+        print(f"{name:<12}{ms:>10.2f}{base - ms:>10.2f}{1000 / ms:>10.2f}{count:>8}")
+
+
+if __name__ == "__main__":
+    main()
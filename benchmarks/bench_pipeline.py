@@ -0,0 +1,120 @@
+# process_video 端到端效能：合成測試影片 + stub 偵測器，不需要實際錄影與模型
+# 分別量測解碼、偵測、追蹤、計數、繪圖、存 PNG、編碼各階段的時間，回報 fps、各階段佔比與 p99，
+# 管線模式另回報各佇列的深度；結果可存成 JSON 與之後的執行比較，作為管線最佳化的基準。
+#
+# 用法（在專案根目錄執行）：
+#   python -m benchmarks.bench_pipeline --people 30 --frames 300 --modes count video debug
+#   python -m benchmarks.bench_pipeline --detect-ms 25 --batch-size 4 --pipelined --json pipeline.json
+# 「other」為總時間扣掉各階段的部分（SORT 以外的迴圈開銷、進度列、回呼等）；
+# 管線模式下各階段重疊執行，佔比加總可能超過 100%，編碼只量到放進佇列的時間。
+# debug 模式與平常一樣會清空並寫入 count_footfall/output 的 PNG。
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from dataclasses import asdict
+
+from benchmarks.crowd import CrowdScene, parse_line
+from benchmarks.synthetic_video import StubDetector, make_video
+from count_footfall.camera import CameraConfig
+from count_footfall.metrics import STAGES, PipelineMetrics
+from count_footfall.process import MODES, process_video
+
+
+def run_mode(video_path, mode, camera, detector, output_dir, args):
+    metrics = PipelineMetrics()
+    start = time.perf_counter()
+    count, _ = process_video(
+        video_path, mode=mode, camera=camera, detector=detector, metrics=metrics,
+        output_path=os.path.join(output_dir, f"result-{mode}.mp4"), save_result=False,
+        batch_size=args.batch_size, pipelined=args.pipelined, debug_every=args.debug_every,
+    )
+    wall = time.perf_counter() - start
+    return wall, count, metrics.summary(wall), metrics.snapshot()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="process_video 端到端分階段效能（合成影片 + stub 偵測器）")
+    parser.add_argument("--people", type=int, default=30)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--speed", type=float, default=3.0)
+    parser.add_argument("--line", default="h:0.5", help='計數線："h:0.5"、"v:0.3" 或 "x1,y1,x2,y2"')
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--pipelined", action="store_true")
+    parser.add_argument("--debug-every", type=int, default=30)
+    parser.add_argument("--detect-ms", type=float, default=0.0,
+                        help="stub 偵測器每張影格額外等待的毫秒數，模擬模型推論時間")
+    parser.add_argument("--video", default=None, help="使用既有影片，不重新合成（沒有真實計數）")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", default=None, help="結果另存成 JSON")
+    args = parser.parse_args()
+
+    line = parse_line(args.line, args.width, args.height)
+    camera = CameraConfig(name="synthetic", line=line)
+    detector = StubDetector(extra_ms=args.detect_ms)
+    scene = CrowdScene(people=args.people, frames=args.frames, width=args.width,
+                       height=args.height, speed=args.speed, occlusion=0.0,
+                       false_positives=0.0, seed=args.seed)
+
+    with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as tmp:
+        video_path = args.video
+        truth = None
+        if video_path is None:
+            video_path = os.path.join(tmp, "synthetic.mp4")
+            truth = make_video(video_path, scene, [line], fps=args.fps)
+            truth = sum(truth["line0"].values())
+
+        # 暖機：numba 載入、scipy 匯入與編碼器初始化不算進量測
+        process_video(video_path, mode=args.modes[0], camera=camera, detector=detector,
+                      output_path=os.path.join(tmp, "warmup.mp4"), save_result=False, end_frame=10)
+
+        runs = []
+        for mode in args.modes:
+            wall, count, stages, snapshot = run_mode(video_path, mode, camera, detector, tmp, args)
+            frames = stages["decode"]["calls"]
+            runs.append({"mode": mode, "wall_seconds": wall, "frames": frames,
+                         "fps": frames / wall if wall else 0.0, "count": count, "stages": stages,
+                         "queues": snapshot["queues"], "dropped_frames": snapshot["dropped_frames"]})
+
+    print(f"影格數：{runs[0]['frames']}  真實越線數：{truth if truth is not None else '-'}  "
+          f"batch={args.batch_size} pipelined={args.pipelined} detect-ms={args.detect_ms}")
+    print(f"{'mode':<7}{'fps':>8}{'count':>7}" + "".join(f"{s:>9}" for s in STAGES) + f"{'other':>9}")
+    for run in runs:
+        shares = [run["stages"][s].get("share", 0.0) for s in STAGES]
+        other = max(0.0, 1.0 - sum(shares))
+        print(f"{run['mode']:<7}{run['fps']:>8.1f}{run['count']:>7}"
+              + "".join(f"{100 * v:>8.1f}%" for v in shares) + f"{100 * other:>8.1f}%")
+    print("ms / frame:")
+    for run in runs:
+        per_frame = [1000 * run["stages"][s]["seconds"] / run["frames"] if run["frames"] else 0.0
+                     for s in STAGES]
+        print(f"{run['mode']:<7}{1000 / run['fps'] if run['fps'] else 0.0:>8.2f}{'':>7}"
+              + "".join(f"{v:>9.3f}" for v in per_frame))
+
+    print("p99 ms / frame:")
+    for run in runs:
+        print(f"{run['mode']:<7}{'':>8}{'':>7}"
+              + "".join(f"{run['stages'][s]['p99_ms']:>9.3f}" for s in STAGES))
+    for run in runs:
+        for name, q in run["queues"].items():
+            print(f"[INFO] {run['mode']} queue {name}: mean {q['mean']:.1f}, max {q['max']} / {q['capacity']}")
+
+    if args.json:
+        result = {
+            "config": dict(vars(args), scene=asdict(scene)),
+            "truth": truth,
+            "runs": runs,
+        }
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"[INFO] results saved to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# SORT 關聯步驟：原本逐對呼叫 iou() 的雙層迴圈 vs 向量化 iou_batch + 遮罩
+# 依目標人數掃描，並檢查兩者輸出（配對、未配對偵測、未配對軌跡，含順序）完全相同
+#
+# 用法（在專案根目錄執行）：
+#   python -m benchmarks.bench_sort_association --targets 10 50 100 200 500 1000
+
+import argparse
+import time
+
+import numpy as np
+
+from count_footfall.sort import associate_detections_to_trackers, iou, linear_assignment
+
+
+def associate_loop(detections, trackers, iou_threshold=0.3):
+    """原本的實作：雙層迴圈填 IoU 矩陣，以 `in` 逐一找未配對的項目"""
+    if(len(trackers)==0):
+        return np.empty((0,2),dtype=int), np.arange(len(detections)), np.empty((0),dtype=int)
+
+    iou_matrix = np.zeros((len(detections),len(trackers)),dtype=np.float32)
+    for d, det in enumerate(detections):
+        for t, trk in enumerate(trackers):
+            iou_matrix[d,t] = iou(det[:4], trk[:4])
+
+    row_inds, col_inds = linear_assignment(-iou_matrix)
+    matched_indices = (
+    np.array(list(zip(row_inds, col_inds))) if len(row_inds) > 0
+    else np.empty((0, 2), dtype=int)
+    )
+
+    unmatched_detections = []
+    for d, det in enumerate(detections):
+        if(d not in matched_indices[:,0]):
+            unmatched_detections.append(d)
+    unmatched_trackers = []
+    for t, trk in enumerate(trackers):
+        if(t not in matched_indices[:,1]):
+            unmatched_trackers.append(t)
+
+    matches = []
+    for m in matched_indices:
+        if(iou_matrix[m[0], m[1]] < iou_threshold):
+            unmatched_detections.append(m[0])
+            unmatched_trackers.append(m[1])
+        else:
+            matches.append(m.reshape(1,2))
+    if(len(matches)==0):
+        matches = np.empty((0,2),dtype=int)
+    else:
+        matches = np.concatenate(matches,axis=0)
+    return matches, np.array(unmatched_detections), np.array(unmatched_trackers)
+
+
+def synthetic_scene(n_targets, rng, width=1920, height=1080):
+    """
+    n_targets 個行人框當作軌跡預測位置；偵測為位置抖動後的框，
+    約 5% 漏偵測、5% 新出現，模擬擁擠場景的關聯輸入
+    """
+    centers = rng.uniform([0, 0], [width, height], size=(n_targets, 2))
+    size = rng.uniform([20, 50], [40, 100], size=(n_targets, 2))
+    trackers = np.hstack([centers - size / 2, centers + size / 2, np.zeros((n_targets, 1))])
+
+    keep = rng.random(n_targets) > 0.05
+    jitter = rng.normal(0, 4, size=(n_targets, 4))
+    dets = np.hstack([trackers[keep, :4] + jitter[keep], rng.uniform(0.5, 1, (keep.sum(), 1))])
+    n_new = max(1, n_targets // 20)
+    new_c = rng.uniform([0, 0], [width, height], size=(n_new, 2))
+    new = np.hstack([new_c - [15, 40], new_c + [15, 40], np.full((n_new, 1), 0.9)])
+    dets = np.vstack([dets, new])
+    return dets[rng.permutation(len(dets))], trackers
+
+
+def same_result(a, b):
+    return all(np.array_equal(np.asarray(x).reshape(-1), np.asarray(y).reshape(-1))
+               for x, y in zip(a, b))
+
+
+def timed(fn, *args, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn(*args)
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SORT 關聯：迴圈 vs 向量化")
+    parser.add_argument("--targets", type=int, nargs="+", default=[10, 50, 100, 200, 500, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"{'targets':>8}{'loop ms':>12}{'vector ms':>12}{'speedup':>10}{'same':>7}")
+    for n in args.targets:
+        dets, trks = synthetic_scene(n, rng)
+        loop_s, loop_out = timed(associate_loop, dets, trks, repeat=args.repeat)
+        vec_s, vec_out = timed(associate_detections_to_trackers, dets, trks, repeat=args.repeat)
+        same = same_result(loop_out, vec_out)
+        print(f"{n:>8}{1000 * loop_s:>12.3f}{1000 * vec_s:>12.3f}{loop_s / vec_s:>10.1f}"
+              f"{'yes' if same else 'NO':>7}")
+
+
+if __name__ == "__main__":
+    main()
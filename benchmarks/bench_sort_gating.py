@@ -0,0 +1,65 @@
+# SORT 關聯：完整 IoU 矩陣 + 一次指派 vs 空間網格只配對重疊的框、依連通塊分別指派（Sort(gating=True)）
+# 依目標人數掃描，檢查兩者的配對與未配對的偵測完全相同（含順序，新軌跡依此順序配發 ID）、
+# 未配對的軌跡集合相同（順序不影響結果），
+# 並以 benchmarks.crowd 的合成行人軌跡分別跑 Sort(gating=False) 與 Sort(gating=True)，
+# 逐張影格比對輸出的 [x1, y1, x2, y2, id]
+#
+# 用法（在專案根目錄執行）：
+#   python -m benchmarks.bench_sort_gating --targets 100 500 1000 2000 --width 3840 --height 2160
+# 畫面太小時所有框連成一大塊（例如 1080p 塞 2000 人），網格無從切分，速度只會略快於完整矩陣
+
+import argparse
+
+import numpy as np
+
+from benchmarks.bench_sort_association import synthetic_scene, timed, same_result
+from benchmarks.crowd import CrowdScene, generate
+from count_footfall.sort import (
+    Sort, associate_detections_to_trackers, associate_gated, overlap_pairs,
+)
+
+
+def same_association(full, gated):
+    """配對與未配對的偵測比對順序；未配對的軌跡只比對集合"""
+    return (same_result(full[:2], gated[:2])
+            and np.array_equal(np.sort(full[2]), np.sort(gated[2])))
+
+
+def tracks_differ(frames):
+    """同一串偵測分別交給兩種關聯方式的 Sort，回傳輸出不同的影格數"""
+    full, gated = Sort(), Sort(gating=True)
+    return sum(not np.array_equal(full.update(f["dets"]), gated.update(f["dets"])) for f in frames)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SORT 關聯：完整矩陣 vs 空間網格分塊")
+    parser.add_argument("--targets", type=int, nargs="+", default=[10, 100, 500, 1000, 2000])
+    parser.add_argument("--width", type=int, default=3840)
+    parser.add_argument("--height", type=int, default=2160)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--frames", type=int, default=60, help="端到端比對 Sort 輸出的影格數")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"{'targets':>8}{'pairs':>8}{'full ms':>11}{'gated ms':>11}{'speedup':>10}{'same':>7}"
+          f"{'sort diff':>11}")
+    for n in args.targets:
+        dets, trks = synthetic_scene(n, rng, args.width, args.height)
+        # 第一次呼叫會載入 scipy，不算進時間
+        associate_detections_to_trackers(dets, trks)
+        associate_gated(dets, trks)
+        full_s, full_out = timed(associate_detections_to_trackers, dets, trks, repeat=args.repeat)
+        gated_s, gated_out = timed(associate_gated, dets, trks, repeat=args.repeat)
+        pairs = len(overlap_pairs(dets, trks)[0])
+        same = same_association(full_out, gated_out)
+        frames, _ = generate(CrowdScene(people=n, frames=args.frames, width=args.width,
+                                        height=args.height, seed=args.seed), [])
+        differ = tracks_differ(frames)
+        print(f"{n:>8}{pairs:>8}{1000 * full_s:>11.3f}{1000 * gated_s:>11.3f}"
+              f"{full_s / gated_s:>10.1f}{'yes' if same else 'NO':>7}"
+              f"{f'{differ}/{len(frames)}':>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+# SORT 的 Kalman 濾波：原本每條軌跡一個 filterpy.KalmanFilter vs 所有軌跡放在連續陣列整批運算
+# 依人數掃描兩種成本：
+#   kalman  只有濾波器（所有軌跡 predict 再 update），換算成每條軌跡的微秒數，應接近固定
+#   update  完整的 Sort.update（含關聯，人數多時關聯的 IoU 矩陣與指派會成為主要成本）
+# 並檢查兩者逐格輸出的軌跡框與 ID 一致
+#
+# 用法（在專案根目錄執行）：
+#   python -m benchmarks.bench_sort_kalman --people 10 50 100 300 1000 --frames 200
+
+import argparse
+import time
+
+import numpy as np
+from filterpy.kalman import KalmanFilter
+
+from benchmarks.bench_crossing import synthetic_tracks
+from count_footfall.sort import (
+    F, P0, Q, R, KalmanBoxTracks, Sort, associate_detections_to_trackers,
+)
+
+
+class KalmanBoxTracker:
+    """原本的實作：每條軌跡一個 filterpy 濾波器"""
+    count = 0
+
+    def __init__(self, bbox):
+        self.kf = KalmanFilter(dim_x=7, dim_z=4)
+        self.kf.F = F.copy()
+        self.kf.H = np.eye(4, 7)
+        self.kf.R = R.copy()
+        self.kf.P = P0.copy()
+        self.kf.Q = Q.copy()
+        self.kf.x[:4] = np.array(bbox).reshape((4, 1))
+        self.time_since_update = 0
+        self.id = KalmanBoxTracker.count
+        KalmanBoxTracker.count += 1
+        self.hits = 0
+        self.hit_streak = 0
+        self.age = 0
+
+    def update(self, bbox):
+        self.time_since_update = 0
+        self.hits += 1
+        self.hit_streak += 1
+        self.kf.update(np.array(bbox).reshape((4, 1)))
+
+    def predict(self):
+        if (self.kf.x[6] + self.kf.x[2]) <= 0:
+            self.kf.x[6] *= 0.0
+        self.kf.predict()
+        self.age += 1
+        if self.time_since_update > 0:
+            self.hit_streak = 0
+        self.time_since_update += 1
+        return self.kf.x
+
+    def get_state(self):
+        return self.kf.x[:4].reshape((1, 4))[0]
+
+
+class LoopSort:
+    """原本的 Sort.update：逐一軌跡 predict / update，list 中 pop 刪除"""
+
+    def __init__(self, max_age=1, min_hits=3, iou_threshold=0.3):
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.iou_threshold = iou_threshold
+        self.trackers = []
+        self.frame_count = 0
+
+    def update(self, dets):
+        self.frame_count += 1
+        trks = np.zeros((len(self.trackers), 5))
+        to_del = []
+        ret = []
+        for t, trk in enumerate(trks):
+            pos = self.trackers[t].predict()
+            trk[:4] = pos[:4].reshape(-1)
+            if np.any(np.isnan(pos)):
+                to_del.append(t)
+        trks = np.ma.compress_rows(np.ma.masked_invalid(trks))
+        for t in reversed(to_del):
+            self.trackers.pop(t)
+
+        matched, unmatched_dets, _ = associate_detections_to_trackers(dets, trks, self.iou_threshold)
+        for d, t in matched:
+            self.trackers[t].update(dets[d, :4])
+        for i in unmatched_dets:
+            self.trackers.append(KalmanBoxTracker(dets[i, :4]))
+
+        i = len(self.trackers)
+        for trk in reversed(self.trackers):
+            if trk.time_since_update < 1 and (trk.hits >= self.min_hits or self.frame_count <= self.min_hits):
+                ret.append(np.concatenate((trk.get_state(), [trk.id])).reshape(1, -1))
+            i -= 1
+            if trk.time_since_update > self.max_age:
+                self.trackers.pop(i)
+        if ret:
+            return np.concatenate(ret)
+        return np.empty((0, 5))
+
+
+def detections(n_people, n_frames, seed):
+    """合成軌跡加上位置雜訊與約 5% 漏偵測，當作每張影格的偵測結果"""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for _, boxes in synthetic_tracks(n_people, n_frames, seed=seed):
+        keep = rng.random(len(boxes)) > 0.05
+        noisy = boxes[keep] + rng.normal(0, 2, size=(keep.sum(), 4))
+        frames.append(np.hstack([noisy, np.full((len(noisy), 1), 0.9)]))
+    return frames
+
+
+def run(tracker, frames):
+    outputs = []
+    start = time.perf_counter()
+    for dets in frames:
+        outputs.append(tracker.update(dets))
+    return (time.perf_counter() - start) / len(frames), outputs
+
+
+def kalman_step(n_people, n_frames, seed):
+    """只量濾波器：n_people 條軌跡每張影格 predict 一次、以偵測框 update 一次"""
+    frames = [boxes for _, boxes in synthetic_tracks(n_people, n_frames, seed=seed)]
+
+    trackers = [KalmanBoxTracker(box) for box in frames[0]]
+    start = time.perf_counter()
+    for boxes in frames[1:]:
+        for trk, box in zip(trackers, boxes):
+            trk.predict()
+            trk.update(box)
+    loop_s = (time.perf_counter() - start) / (n_frames - 1)
+
+    tracks = KalmanBoxTracks()
+    tracks.add(frames[0])
+    idx = np.arange(n_people)
+    start = time.perf_counter()
+    for boxes in frames[1:]:
+        tracks.predict()
+        tracks.update(idx, boxes)
+    vec_s = (time.perf_counter() - start) / (n_frames - 1)
+
+    same = np.allclose(np.array([trk.kf.x[:, 0] for trk in trackers]), tracks.x, rtol=0, atol=1e-6)
+    return loop_s, vec_s, same
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SORT Kalman：逐軌跡 filterpy vs 整批陣列")
+    parser.add_argument("--people", type=int, nargs="+", default=[10, 50, 100, 300, 1000])
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--max-age", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print("kalman: predict + update only")
+    print(f"{'people':>8}{'filterpy us/trk':>17}{'batched us/trk':>16}{'speedup':>10}{'same':>7}")
+    for n in args.people:
+        loop_s, vec_s, same = kalman_step(n, args.frames, args.seed + n)
+        print(f"{n:>8}{1e6 * loop_s / n:>17.2f}{1e6 * vec_s / n:>16.2f}{loop_s / vec_s:>10.1f}"
+              f"{'yes' if same else 'NO':>7}")
+
+    print("update: full Sort.update per frame")
+    print(f"{'people':>8}{'filterpy ms':>13}{'batched ms':>12}{'speedup':>10}{'same':>7}")
+    for n in args.people:
+        frames = detections(n, args.frames, args.seed + n)
+        KalmanBoxTracker.count = 0
+        loop_s, loop_out = run(LoopSort(max_age=args.max_age), frames)
+        vec_s, vec_out = run(Sort(max_age=args.max_age), frames)
+        same = all(a.shape == b.shape and np.allclose(a, b, rtol=0, atol=1e-6)
+                   for a, b in zip(loop_out, vec_out))
+        print(f"{n:>8}{1000 * loop_s:>13.3f}{1000 * vec_s:>12.3f}{loop_s / vec_s:>10.1f}"
+              f"{'yes' if same else 'NO':>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# 跳格推論的準確度 vs 速度報告：以 stride=1 的計數為基準，
+# 列出各 stride 與自適應模式的 fps、偵測次數與計數誤差，供每支攝影機挑選 stride
+#
+# 用法（在專案根目錄執行）：
+#   python -m benchmarks.bench_stride --video input/reference.mp4 \
+#       --model count_footfall/yolo-coco/best.pt --strides 1 2 3 4 6 8
+
+import argparse
+import time
+
+import cv2
+
+from count_footfall.model_registry import get_model
+from count_footfall.process import process_video, MODE_COUNT
+
+
+def run(args, **kwargs):
+    start = time.perf_counter()
+    count, _ = process_video(args.video, args.model, mode=MODE_COUNT,
+                             batch_size=args.batch_size, save_result=False, **kwargs)
+    return time.perf_counter() - start, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="跳格推論準確度與速度比較")
+    parser.add_argument("--video", required=True)
+    parser.add_argument("--model", default="count_footfall/yolo-coco/best.pt")
+    parser.add_argument("--strides", type=int, nargs="+", default=[1, 2, 3, 4, 6, 8])
+    parser.add_argument("--max-stride", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=1)
+    args = parser.parse_args()
+
+    vs = cv2.VideoCapture(args.video)
+    total = int(vs.get(cv2.CAP_PROP_FRAME_COUNT))
+    vs.release()
+    if total <= 0:
+        raise SystemExit(f"無法讀取影片：{args.video}")
+
+    get_model(args.model)
+
+    cases = [(f"stride={s}", {"stride": s}) for s in args.strides]
+    cases.append((f"adaptive<={args.max_stride}",
+                  {"adaptive_stride": True, "max_stride": args.max_stride}))
+
+    rows = [(name,) + run(args, **kwargs) for name, kwargs in cases]
+
+    # 以 stride=1（每張都偵測）為準確度基準
+    counts = {name: count for name, _, count in rows}
+    reference = counts["stride=1"] if "stride=1" in counts else run(args, stride=1)[1]
+
+    print(f"影格數：{total}  基準計數（stride=1）：{reference}")
+    print(f"{'mode':<14}{'fps':>10}{'speedup':>10}{'count':>8}{'error':>8}{'error%':>9}")
+    base_fps = None
+    for name, elapsed, count in rows:
+        fps = total / elapsed
+        base_fps = base_fps or fps
+        err = count - reference
+        pct = 100.0 * abs(err) / reference if reference else 0.0
+        print(f"{name:<14}{fps:>10.2f}{fps / base_fps:>10.2f}{count:>8}{err:>+8}{pct:>8.1f}%")
+
+
+if __name__ == "__main__":
+    main()
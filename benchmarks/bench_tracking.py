@@ -0,0 +1,167 @@
+# 追蹤 + 越線計數的效能與準確度：以 benchmarks.crowd 的合成行人軌跡（已知真實越線數）
+# 跑 Sort.update 與 CrossingCounter，回報每秒影格數、每張影格延遲百分位數、記憶體峰值與計數誤差。
+# 只用 CPU，不需要影片與模型，可以在改動追蹤熱點後檢查是否退步。
+#
+# 用法（在專案根目錄執行）：
+#   python -m benchmarks.bench_tracking --people 10 100 300 1000 --frames 300
+#   python -m benchmarks.bench_tracking --people 500 --occlusion 0.3 --speed 6 --lines h:0.5 v:0.5
+#   # 存成基準，之後比較（更新速率下降超過 20% 或計數誤差增加超過 2 個百分點即失敗）
+#   python -m benchmarks.bench_tracking --json bench_tracking.json
+#   python -m benchmarks.bench_tracking --baseline bench_tracking.json --max-slowdown 0.2
+
+import argparse
+import json
+import time
+import tracemalloc
+from dataclasses import asdict
+
+import numpy as np
+
+from benchmarks.crowd import CrowdScene, generate, parse_line
+from count_footfall import kernels
+from count_footfall.counting import IN, OUT, CrossingCounter
+from count_footfall.sort import Sort
+
+
+def run_tracking(frames, gates, tracker_params):
+    """與 process_video 相同的每張影格流程：Sort.update、取整數中心點、CrossingCounter.update"""
+    tracker = Sort(**tracker_params)
+    counter = CrossingCounter(gates)
+    latencies = np.empty(len(frames))
+    live = 0
+    for i, frame in enumerate(frames):
+        start = time.perf_counter()
+        tracks = tracker.update(frame["dets"])
+        track_ids = tracks[:, 4].astype(np.int64)
+        centers = ((tracks[:, 0:2] + tracks[:, 2:4]) / 2).astype(np.int64)
+        counter.update(track_ids, centers)
+        latencies[i] = time.perf_counter() - start
+        live += len(tracker.tracks)
+    return latencies, counter.counts(), live / max(len(frames), 1)
+
+
+def peak_memory(frames, gates, tracker_params):
+    """另外跑一次並以 tracemalloc 記錄追蹤與計數過程中配置的記憶體峰值（不含合成資料本身）"""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    run_tracking(frames, gates, tracker_params)
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    return peak
+
+
+def count_error(counts, truth):
+    """所有計數線、兩個方向的絕對誤差總和 / 真實越線總數"""
+    abs_err = sum(abs(counts[g][d] - truth[g][d]) for g in truth for d in (IN, OUT))
+    total = sum(truth[g][d] for g in truth for d in (IN, OUT))
+    predicted = sum(counts[g][d] for g in counts for d in (IN, OUT))
+    return abs_err, total, predicted
+
+
+def scenario_key(result):
+    s = result["scene"]
+    return (s["people"], s["frames"], s["speed"], s["occlusion"], tuple(result["lines"]))
+
+
+def check_baseline(results, path, max_slowdown, max_error_increase):
+    """與基準結果比較，回傳退步的項目"""
+    with open(path) as f:
+        baseline = {scenario_key(r): r for r in json.load(f)}
+    regressions = []
+    for r in results:
+        b = baseline.get(scenario_key(r))
+        if b is None:
+            continue
+        people = r["scene"]["people"]
+        if r["updates_per_sec"] < b["updates_per_sec"] * (1 - max_slowdown):
+            regressions.append(f"people={people}: updates/sec {r['updates_per_sec']:.1f} "
+                               f"< baseline {b['updates_per_sec']:.1f}")
+        if r["count_error_pct"] > b["count_error_pct"] + max_error_increase:
+            regressions.append(f"people={people}: count error {r['count_error_pct']:.2f}% "
+                               f"> baseline {b['count_error_pct']:.2f}%")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="追蹤 + 越線計數效能與準確度（合成行人軌跡）")
+    parser.add_argument("--people", type=int, nargs="+", default=[10, 100, 300, 1000])
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--speed", type=float, default=3.0, help="平均速度（像素 / 影格）")
+    parser.add_argument("--occlusion", type=float, default=0.1, help="被遮擋的影格比例")
+    parser.add_argument("--occlusion-frames", type=float, default=5.0, help="每次遮擋平均影格數")
+    parser.add_argument("--false-positives", type=float, default=0.5, help="每張影格平均誤偵測數")
+    parser.add_argument("--noise", type=float, default=2.0, help="偵測框雜訊標準差（像素）")
+    parser.add_argument("--lines", nargs="+", default=["h:0.5"],
+                        help='計數線："h:0.5"、"v:0.3" 或 "x1,y1,x2,y2"')
+    parser.add_argument("--max-age", type=int, default=1)
+    parser.add_argument("--min-hits", type=int, default=3)
+    parser.add_argument("--gating", action="store_true", help="Sort 使用空間網格關聯")
+    parser.add_argument("--no-numba", action="store_true", help="使用 NumPy 版本的運算")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", default=None, help="結果另存成 JSON")
+    parser.add_argument("--baseline", default=None, help="與先前 --json 存下的結果比較")
+    parser.add_argument("--max-slowdown", type=float, default=0.2)
+    parser.add_argument("--max-error-increase", type=float, default=2.0, help="百分點")
+    args = parser.parse_args()
+
+    if args.no_numba:
+        kernels.set_enabled(False)
+    tracker_params = {"max_age": args.max_age, "min_hits": args.min_hits, "gating": args.gating}
+    lines = [parse_line(spec, args.width, args.height) for spec in args.lines]
+    gates = [(f"line{i}", line) for i, line in enumerate(lines)]
+
+    # 暖機：numba 載入 / 編譯與 scipy 匯入不算進延遲
+    warm, _ = generate(CrowdScene(people=20, frames=10, seed=args.seed), lines)
+    run_tracking(warm, gates, tracker_params)
+
+    print(f"{'people':>7}{'upd/s':>9}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+          f"{'tracks':>8}{'peak MiB':>10}{'truth':>7}{'count':>7}{'err %':>7}")
+    results = []
+    for n in args.people:
+        scene = CrowdScene(people=n, frames=args.frames, width=args.width, height=args.height,
+                           speed=args.speed, occlusion=args.occlusion,
+                           occlusion_frames=args.occlusion_frames,
+                           false_positives=args.false_positives, noise=args.noise, seed=args.seed)
+        frames, truth = generate(scene, lines)
+        latencies, counts, live = run_tracking(frames, gates, tracker_params)
+        peak = peak_memory(frames, gates, tracker_params)
+        abs_err, total, predicted = count_error(counts, truth)
+        p50, p90, p99 = np.percentile(latencies, [50, 90, 99]) * 1000
+        result = {
+            "scene": asdict(scene),
+            "lines": args.lines,
+            "tracker": tracker_params,
+            "numba": kernels.enabled(),
+            "updates_per_sec": len(frames) / latencies.sum(),
+            "latency_ms": {"p50": p50, "p90": p90, "p99": p99, "max": latencies.max() * 1000},
+            "mean_tracks": live,
+            "peak_bytes": peak,
+            "truth": truth,
+            "counts": counts,
+            "count_error_pct": 100.0 * abs_err / total if total else 0.0,
+        }
+        results.append(result)
+        print(f"{n:>7}{result['updates_per_sec']:>9.1f}{p50:>9.3f}{p90:>9.3f}{p99:>9.3f}"
+              f"{result['latency_ms']['max']:>9.3f}{live:>8.0f}{peak / 2**20:>10.2f}"
+              f"{total:>7}{predicted:>7}{result['count_error_pct']:>7.1f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"[INFO] results saved to {args.json}")
+
+    if args.baseline:
+        regressions = check_baseline(results, args.baseline, args.max_slowdown,
+                                     args.max_error_increase)
+        for line in regressions:
+            print(f"[REGRESSION] {line}")
+        if regressions:
+            raise SystemExit(1)
+        print("[INFO] no regression against baseline")
+
+
+if __name__ == "__main__":
+    main()
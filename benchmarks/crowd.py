@@ -0,0 +1,134 @@
+# 合成行人軌跡：給追蹤與計數的效能測試使用，不需要影片與模型
+#
+# 每位行人以固定方向、接近固定的速度走過畫面，離開畫面後由畫面邊緣新進的行人補上，
+# 維持場景中的人數。每張影格產生：
+#   - 真實的行人 ID 與框（ground truth）
+#   - 偵測結果：框加上位置雜訊；行人會連續數張影格被遮擋（漏偵測），另有隨機的誤偵測
+# 真實越線數以行人真實中心點的移動線段與計數線相交計算，方向與 counting.CrossingCounter 相同
+# （由 A 看向 B，越到右手邊為 in）。
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from count_footfall.counting import IN, OUT
+
+
+@dataclass
+class CrowdScene:
+    people: int = 100               # 畫面中同時存在的人數
+    frames: int = 300
+    width: int = 1920
+    height: int = 1080
+    speed: float = 3.0              # 平均步行速度（像素 / 影格）
+    occlusion: float = 0.1          # 被遮擋（漏偵測）的影格比例
+    occlusion_frames: float = 5.0   # 每次遮擋平均持續的影格數
+    false_positives: float = 0.5    # 每張影格平均的誤偵測數
+    noise: float = 2.0              # 偵測框座標雜訊（像素，標準差）
+    seed: int = 0
+
+
+def parse_line(spec, width, height):
+    """
+    計數線設定："h:0.5"（水平線，位於畫面高度 50%）、"v:0.3"（垂直線）或 "x1,y1,x2,y2"（像素座標）
+    回傳 [(x1, y1), (x2, y2)]
+    """
+    kind, _, value = spec.partition(':')
+    if kind == 'h':
+        y = int(float(value) * height)
+        return [(0, y), (width, y)]
+    if kind == 'v':
+        x = int(float(value) * width)
+        return [(x, height), (x, 0)]
+    x1, y1, x2, y2 = (int(v) for v in spec.split(','))
+    return [(x1, y1), (x2, y2)]
+
+
+def _cross(ax, ay, bx, by, px, py):
+    return (bx - ax) * (py - ay) - (by - ay) * (px - ax)
+
+
+def true_crossings(prev, cur, lines):
+    """
+    prev、cur：(N, 2) 同一批行人上一張與這一張的真實中心點（浮點數）
+    回傳 (G, 2) 每條線這一張影格的 [in, out] 越線數
+    """
+    counts = np.zeros((len(lines), 2), dtype=np.int64)
+    for g, ((ax, ay), (bx, by)) in enumerate(lines):
+        s0 = _cross(ax, ay, bx, by, prev[:, 0], prev[:, 1])
+        s1 = _cross(ax, ay, bx, by, cur[:, 0], cur[:, 1])
+        t0 = _cross(prev[:, 0], prev[:, 1], cur[:, 0], cur[:, 1], ax, ay)
+        t1 = _cross(prev[:, 0], prev[:, 1], cur[:, 0], cur[:, 1], bx, by)
+        hit = ((s0 > 0) != (s1 > 0)) & ((t0 > 0) != (t1 > 0))
+        counts[g, 0] += np.count_nonzero(hit & (s1 > 0))
+        counts[g, 1] += np.count_nonzero(hit & (s1 <= 0))
+    return counts
+
+
+def generate(scene, lines):
+    """
+    回傳 (frames, truth)
+      frames：每張影格的 dict(ids, boxes, dets)，dets 為 (K, 5) [x1, y1, x2, y2, score]
+      truth：{線名稱: {in, out}}，線名稱依序為 line0、line1 ...
+    """
+    rng = np.random.default_rng(scene.seed)
+    n = scene.people
+    size = np.array([scene.width, scene.height], dtype=float)
+
+    def spawn(k, inside):
+        w = rng.uniform(28, 45, size=k)
+        dims = np.stack([w, 2.5 * w], axis=1)
+        heading = rng.uniform(0, 2 * np.pi, size=k)
+        speed = np.maximum(rng.normal(scene.speed, 0.2 * scene.speed, size=k), 0.1)
+        vel = np.stack([np.cos(heading), np.sin(heading)], axis=1) * speed[:, None]
+        if inside:
+            pos = rng.uniform([0, 0], size, size=(k, 2))
+        else:
+            # 從畫面外側進入：起點放在行進方向反側的邊緣外
+            pos = rng.uniform([0, 0], size, size=(k, 2))
+            edge = np.abs(vel[:, 0]) * size[1] > np.abs(vel[:, 1]) * size[0]
+            pos[edge, 0] = np.where(vel[edge, 0] > 0, -dims[edge, 0] / 2, size[0] + dims[edge, 0] / 2)
+            pos[~edge, 1] = np.where(vel[~edge, 1] > 0, -dims[~edge, 1] / 2, size[1] + dims[~edge, 1] / 2)
+        return pos, vel, dims
+
+    pos, vel, dims = spawn(n, inside=True)
+    ids = np.arange(n)
+    next_id = n
+    occluded = rng.random(n) < scene.occlusion
+    # 遮擋為兩狀態的 Markov chain：平均持續 occlusion_frames，整體比例為 occlusion
+    p_recover = 1.0 / max(scene.occlusion_frames, 1.0)
+    p_occlude = (scene.occlusion * p_recover / (1 - scene.occlusion)) if scene.occlusion < 1 else 1.0
+
+    lines = [np.asarray(line, dtype=float) for line in lines]
+    truth = np.zeros((len(lines), 2), dtype=np.int64)
+    frames = []
+    for _ in range(scene.frames):
+        prev = pos.copy()
+        pos = pos + vel + rng.normal(0, 0.3, size=pos.shape)
+        truth += true_crossings(prev, pos, lines)
+
+        boxes = np.hstack([pos - dims / 2, pos + dims / 2])
+        flip = rng.random(n)
+        occluded = np.where(occluded, flip >= p_recover, flip < p_occlude)
+        visible = ~occluded & (pos[:, 0] >= 0) & (pos[:, 0] < size[0]) \
+            & (pos[:, 1] >= 0) & (pos[:, 1] < size[1])
+        dets = boxes[visible] + rng.normal(0, scene.noise, size=(int(visible.sum()), 4))
+        n_fp = rng.poisson(scene.false_positives)
+        if n_fp:
+            c = rng.uniform([0, 0], size, size=(n_fp, 2))
+            w = rng.uniform(28, 45, size=(n_fp, 1))
+            dets = np.vstack([dets, np.hstack([c - [1, 2.5] * w / 2, c + [1, 2.5] * w / 2])])
+        scores = rng.uniform(0.5, 1.0, size=(len(dets), 1))
+        frames.append({"ids": ids.copy(), "boxes": boxes, "dets": np.hstack([dets, scores])})
+
+        # 完全離開畫面的行人換成新進的行人（新 ID）
+        out = ((pos + dims / 2) < 0).any(axis=1) | ((pos - dims / 2) > size).any(axis=1)
+        k = int(out.sum())
+        if k:
+            pos[out], vel[out], dims[out] = spawn(k, inside=False)
+            ids[out] = np.arange(next_id, next_id + k)
+            next_id += k
+            occluded[out] = False
+
+    names = [f"line{i}" for i in range(len(lines))]
+    return frames, {name: {IN: int(c[0]), OUT: int(c[1])} for name, c in zip(names, truth)}
@@ -0,0 +1,235 @@
+# 批次回補：掃描資料夾內的錄影檔，分散到多個行程計數，結果批次寫入 backfill_results，
+# 每個檔案的每小時計數寫入 hourly_footfall（依影片內容雜湊取代同一段錄影之前的結果，重跑不會重複累加）
+#
+# 用法（在專案根目錄執行）：
+#   python -m count_footfall.backfill --input-dir /data/recordings --workers 8 --camera entrance
+#
+# 每個 worker 行程各自載入模型、各自建立 Sort，計數與每小時分桶交回主行程寫入資料庫；
+# 已完成的檔案會記錄在資料庫，中斷後重新執行同一個指令會跳過已完成的檔案。
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv')
+
+# 累積幾筆結果寫一次資料庫；中斷時最多只需要重跑這麼多個檔案
+DEFAULT_FLUSH_EVERY = 10
+
+_worker_options = {}
+
+
+def scan_videos(input_dir, recursive=True):
+    """回傳資料夾內所有影片的絕對路徑（排序過，方便重現）"""
+    paths = []
+    for root, dirs, files in os.walk(input_dir):
+        for name in files:
+            if name.lower().endswith(VIDEO_EXTENSIONS):
+                paths.append(os.path.abspath(os.path.join(root, name)))
+        if not recursive:
+            break
+    return sorted(paths)
+
+
+def _init_worker(options, threads):
+    from count_footfall.model_registry import init_worker
+    _worker_options.update(options)
+    init_worker(options['model_path'], threads, options.get('backend'))
+
+
+def _process_one(path):
+    from count_footfall.process import process_video, MODE_COUNT
+    from count_footfall.timeline import recording_start, video_source, HourlyBuckets
+
+    vs = cv2.VideoCapture(path)
+    frames = max(int(vs.get(cv2.CAP_PROP_FRAME_COUNT)), 0)
+    fps = vs.get(cv2.CAP_PROP_FPS) or 30
+    vs.release()
+
+    start = time.perf_counter()
+    try:
+        # 與 process_video 寫入資料庫時相同的分桶，交由主行程寫入
+        hourly = HourlyBuckets(recording_start(path, frames, fps), fps)
+        processed = [0]
+
+        def on_track(frameIndex, tracks, crossings):
+            processed[0] = frameIndex + 1
+            if crossings:
+                hourly.add(frameIndex, len(crossings))
+
+        footfall, _ = process_video(path, mode=MODE_COUNT, save_result=False,
+                                    track_callback=on_track, **_worker_options)
+        hourly.cover(0, processed[0])
+        source = video_source(path)
+    except Exception as e:
+        return {"file_path": path, "status": "failed", "footfall": None, "frames": frames,
+                "seconds": time.perf_counter() - start, "error": str(e)}
+    return {"file_path": path, "status": "done", "footfall": footfall, "frames": frames,
+            "seconds": time.perf_counter() - start, "error": None,
+            "source": source, "buckets": hourly.items()}
+
+
+def fetch_finished(pool, camera):
+    conn = pool.get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT file_path FROM backfill_results WHERE camera = %s AND status = 'done'",
+            (camera,)
+        )
+        return {row[0] for row in cursor.fetchall()}
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def write_results(pool, camera, results):
+    """一次交易寫入多筆結果，同一檔案重跑時覆寫"""
+    if not results:
+        return
+    conn = pool.get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.executemany(
+            """
+            INSERT INTO backfill_results
+                (file_path, camera, status, footfall, frames, seconds, error)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                status = VALUES(status),
+                footfall = VALUES(footfall),
+                frames = VALUES(frames),
+                seconds = VALUES(seconds),
+                error = VALUES(error)
+            """,
+            [(r['file_path'], camera, r['status'], r['footfall'], r['frames'],
+              round(r['seconds'], 3), r['error']) for r in results]
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def save_hourly(pool, result, weather):
+    """把單一檔案的每小時計數寫入 hourly_footfall；失敗時把該檔案標記為失敗，下次重跑"""
+    from app.db.footfall import save_hourly_footfall
+
+    try:
+        save_hourly_footfall(pool, result['buckets'], weather, source=result['source'])
+    except Exception as e:
+        result.update(status="failed", error=f"saving hourly footfall failed: {e}")
+
+
+def run_backfill(paths, camera, workers, options, pool, flush_every=DEFAULT_FLUSH_EVERY,
+                 save_result=True):
+    """save_result：把每個檔案的每小時計數寫入 hourly_footfall；False 時只記錄到 backfill_results"""
+    weather = None
+    if save_result:
+        from app.db.footfall import current_weather
+        weather = current_weather()
+
+    cpu = os.cpu_count() or 1
+    threads = max(1, cpu // workers)
+
+    pending = []
+    done = failed = 0
+    frames_total = 0
+    start = time.perf_counter()
+
+    # spawn：不讓子行程繼承父行程中已初始化的 torch / OpenCV 執行緒
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                             initializer=_init_worker, initargs=(options, threads)) as executor:
+        futures = [executor.submit(_process_one, p) for p in paths]
+        try:
+            for i, future in enumerate(as_completed(futures), 1):
+                r = future.result()
+                if save_result and r['status'] == 'done':
+                    save_hourly(pool, r, weather)
+                pending.append(r)
+                if r['status'] == 'done':
+                    done += 1
+                    frames_total += r['frames']
+                else:
+                    failed += 1
+                    print(f"[WARN] {r['file_path']} failed: {r['error']}", file=sys.stderr)
+
+                print(f"[{i}/{len(paths)}] {os.path.basename(r['file_path'])}: "
+                      f"{r['status']} footfall={r['footfall']} {r['seconds']:.1f}s")
+
+                if len(pending) >= flush_every:
+                    write_results(pool, camera, pending)
+                    pending = []
+        finally:
+            # 即使中途出錯，已完成的結果也先寫入，下次可以跳過
+            write_results(pool, camera, pending)
+
+    elapsed = time.perf_counter() - start
+    print(f"[INFO] {done} done, {failed} failed in {elapsed:.1f}s "
+          f"({frames_total / elapsed if elapsed else 0:.1f} frames/s with {workers} workers)")
+    return done, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批次回補資料夾內錄影的人流計數")
+    parser.add_argument("--input-dir", required=True)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--camera", default="default",
+                        help="攝影機設定名稱（count_footfall/cameras/<name>.json）")
+    parser.add_argument("--model", default="count_footfall/yolo-coco/best.pt")
+    parser.add_argument("--backend", choices=["ultralytics", "onnxruntime", "openvino"], default=None,
+                        help="偵測器後端，預設依模型副檔名判斷")
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--stride", type=int, default=1)
+    parser.add_argument("--motion-gate", choices=["diff", "mog2"], default=None)
+    parser.add_argument("--detection-cache", action="store_true",
+                        help="使用偵測結果快取（換計數線重跑時不需重新推論）")
+    parser.add_argument("--flush-every", type=int, default=DEFAULT_FLUSH_EVERY)
+    parser.add_argument("--no-recursive", action="store_true")
+    parser.add_argument("--force", action="store_true", help="不跳過已完成的檔案")
+    parser.add_argument("--no-save", action="store_true",
+                        help="只記錄到 backfill_results，不寫入 hourly_footfall")
+    args = parser.parse_args()
+
+    from app.db.connector import pool
+
+    paths = scan_videos(args.input_dir, recursive=not args.no_recursive)
+    if not args.force:
+        finished = fetch_finished(pool, args.camera)
+        skipped = len(paths)
+        paths = [p for p in paths if p not in finished]
+        skipped -= len(paths)
+        if skipped:
+            print(f"[INFO] skipping {skipped} files already finished")
+
+    if not paths:
+        print("[INFO] nothing to do")
+        return
+
+    options = {
+        "model_path": args.model,
+        "backend": args.backend,
+        "camera": args.camera,
+        "batch_size": args.batch_size,
+        "stride": args.stride,
+        "motion_gate": args.motion_gate,
+        "detection_cache": args.detection_cache,
+    }
+    workers = max(1, min(args.workers, len(paths)))
+    print(f"[INFO] processing {len(paths)} files with {workers} workers")
+    _, failed = run_backfill(paths, args.camera, workers, options, pool, args.flush_every,
+                             save_result=not args.no_save)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# 每支攝影機的計數設定：計數線、偵測區域（ROI）與推論解析度
+#
+# 設定檔放在 count_footfall/cameras/<name>.json，例如：
+# {
+#     "name": "entrance",
+#     "line": [[369, 312], [800, 364]],
+#     "roi": [[300, 150], [900, 500]],
+#     "inference_size": 416
+# }
+# roi 給兩個點代表矩形的左上、右下角；三個點以上代表多邊形。
+#
+# 需要多個計數閘門或分方向計數時改用 gates（設定 gates 後 line 不再使用）：
+#     "gates": [
+#         {"name": "door", "points": [[369, 312], [800, 364]]},
+#         {"name": "lobby", "points": [[100, 400], [300, 400], [300, 600], [100, 600]]}
+#     ]
+# points 兩個點為計數線，三個點以上為多邊形區域，方向定義見 counting.py。
+
+import json
+import os
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+from pydantic import BaseModel, field_validator
+
+CAMERA_CONFIG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cameras')
+
+Point = Tuple[int, int]
+
+
+class GateConfig(BaseModel):
+    name: str
+    points: List[Point]
+
+    @field_validator('points')
+    @classmethod
+    def _check_points(cls, v):
+        if len(v) < 2:
+            raise ValueError("gate needs 2 points (line) or 3+ points (polygon)")
+        return v
+
+
+class CameraConfig(BaseModel):
+    name: str = "default"
+    # 計數線的兩個端點（原始影格座標）
+    line: List[Point] = [(369, 312), (800, 364)]
+    # 偵測區域，None 代表整張影格
+    roi: Optional[List[Point]] = None
+    # 偵測器輸入的長邊像素數（Ultralytics imgsz），None 用模型預設
+    inference_size: Optional[int] = None
+    # 計數閘門，None 代表只用 line 這一條線
+    gates: Optional[List[GateConfig]] = None
+
+    @field_validator('line')
+    @classmethod
+    def _check_line(cls, v):
+        if len(v) != 2:
+            raise ValueError("line must have exactly 2 points")
+        return v
+
+    @field_validator('roi')
+    @classmethod
+    def _check_roi(cls, v):
+        if v is not None and len(v) < 2:
+            raise ValueError("roi needs 2 points (rectangle) or 3+ points (polygon)")
+        return v
+
+    @field_validator('gates')
+    @classmethod
+    def _check_gates(cls, v):
+        if v is not None:
+            if not v:
+                raise ValueError("gates must not be empty")
+            names = [g.name for g in v]
+            if len(set(names)) != len(names):
+                raise ValueError("gate names must be unique")
+        return v
+
+    def counting_gates(self):
+        """回傳 CrossingCounter 使用的 [(name, points), ...]"""
+        if self.gates is None:
+            return [("line", self.line)]
+        return [(g.name, g.points) for g in self.gates]
+
+
+def load_camera_config(camera=None):
+    """
+    camera 可以是 None（預設設定）、CameraConfig、設定檔路徑，
+    或 CAMERA_CONFIG_DIR 下的設定名稱（不含 .json）
+    """
+    if camera is None:
+        return CameraConfig()
+    if isinstance(camera, CameraConfig):
+        return camera
+
+    path = camera
+    if not os.path.isfile(path):
+        path = os.path.join(CAMERA_CONFIG_DIR, f"{camera}.json")
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"camera config not found: {camera}")
+
+    with open(path, encoding='utf-8') as f:
+        return CameraConfig(**json.load(f))
+
+
+class Roi:
+    """
+    把影格裁成 ROI 的外接矩形再送進偵測器，偵測框再換算回原始影格座標。
+    多邊形 ROI 另外以框的中心點過濾掉落在多邊形外的偵測。
+    """
+
+    def __init__(self, points, frame_shape):
+        H, W = frame_shape[:2]
+        pts = np.array(points, dtype=np.int32)
+        if len(pts) == 2:
+            (x1, y1), (x2, y2) = pts.min(axis=0), pts.max(axis=0)
+            self.polygon = None
+        else:
+            x1, y1 = pts.min(axis=0)
+            x2, y2 = pts.max(axis=0)
+            self.polygon = pts.reshape(-1, 1, 2)
+
+        self.x1, self.y1 = int(np.clip(x1, 0, W)), int(np.clip(y1, 0, H))
+        self.x2, self.y2 = int(np.clip(x2, 0, W)), int(np.clip(y2, 0, H))
+        if self.x2 <= self.x1 or self.y2 <= self.y1:
+            raise ValueError(f"roi {points} is outside the {W}x{H} frame")
+
+    def crop(self, frame):
+        # 回傳 view，不複製影像
+        return frame[self.y1:self.y2, self.x1:self.x2]
+
+    def to_frame(self, dets):
+        """把裁切後座標的 [x1, y1, x2, y2, conf] 換回原始影格座標"""
+        if len(dets) == 0:
+            return dets
+        dets = dets.copy()
+        dets[:, [0, 2]] += self.x1
+        dets[:, [1, 3]] += self.y1
+
+        if self.polygon is not None:
+            cx = (dets[:, 0] + dets[:, 2]) / 2
+            cy = (dets[:, 1] + dets[:, 3]) / 2
+            inside = [cv2.pointPolygonTest(self.polygon, (float(x), float(y)), False) >= 0
+                      for x, y in zip(cx, cy)]
+            dets = dets[np.array(inside, dtype=bool)]
+        return dets
+
+    def draw(self, frame, color=(255, 128, 0)):
+        if self.polygon is not None:
+            cv2.polylines(frame, [self.polygon], True, color, 2)
+        else:
+            cv2.rectangle(frame, (self.x1, self.y1), (self.x2, self.y2), color, 2)
@@ -0,0 +1,75 @@
+# 長影片處理的檢查點：定期把追蹤與計數狀態存檔，中斷後從檢查點的影格繼續
+#
+# 檢查點內容（pickle）：
+#   signature   影片與會影響結果的設定，不一致時不續跑（避免套用到別支影片或別的設定）
+#   state       下一張要處理的影格編號、計數、Sort（含所有軌跡的濾波器狀態陣列與軌跡 ID 序列）、
+#               越線計數器（上一張的中心點）、跳格控制、每小時分桶等
+# 寫入時先寫暫存檔再 os.replace，中途當機不會留下壞掉的檢查點。
+# 有檢查點時輸出影片分段寫到 <輸出檔名>.partNNN<副檔名>，檢查點刪除時這些片段也要一起刪除。
+
+import glob
+import os
+import pickle
+
+CHECKPOINT_DIR = 'count_footfall/checkpoints'
+
+# 格式改變時遞增，舊的檢查點會被忽略
+CHECKPOINT_VERSION = 4
+
+
+def checkpoint_signature(video_path, **params):
+    st = os.stat(video_path)
+    return {
+        "version": CHECKPOINT_VERSION,
+        "video": os.path.abspath(video_path),
+        "size": st.st_size,
+        "mtime": int(st.st_mtime),
+        "params": params,
+    }
+
+
+def save_checkpoint(path, signature, state):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, 'wb') as f:
+        pickle.dump({"signature": signature, "state": state}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path, signature):
+    """回傳存檔時的 state；沒有檢查點、檔案損壞或 signature 不一致時回傳 None"""
+    if not path or not os.path.isfile(path):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            data = pickle.load(f)
+    except Exception as e:
+        print(f"[WARN] ignoring unreadable checkpoint {path}: {e}")
+        return None
+    if data.get("signature") != signature:
+        print(f"[WARN] ignoring checkpoint {path}: video or settings changed")
+        return None
+    return data["state"]
+
+
+def remove_checkpoint(path):
+    for p in (path, path + ".tmp"):
+        if os.path.exists(p):
+            os.remove(p)
+
+
+def part_path(output_path, index):
+    """第 index 段輸出影片的檔名"""
+    root, ext = os.path.splitext(output_path)
+    return f"{root}.part{index:03d}{ext}"
+
+
+def remove_parts(output_path):
+    """刪除 output_path 所有的輸出影片片段，回傳刪除的檔案數"""
+    if not output_path:
+        return 0
+    root, ext = os.path.splitext(output_path)
+    parts = glob.glob(f"{glob.escape(root)}.part[0-9][0-9][0-9]{glob.escape(ext)}")
+    for p in parts:
+        os.remove(p)
+    return len(parts)
@@ -0,0 +1,136 @@
+# 越線計數：一次用 NumPy 檢查所有軌跡的移動線段與所有計數閘門，依方向分別計 in / out
+#
+# 閘門有兩種：
+#   - 線（2 個點 A、B）：軌跡中心點這一張與上一張的連線與 AB 相交即為越線。
+#     由 A 看向 B，越到右手邊（影像座標 y 向下）為 in，越到左手邊為 out
+#   - 多邊形（3 個點以上）：中心點由外到內為 in，由內到外為 out
+# 每張影格只比對上一張影格也存在的軌跡，與原本逐一軌跡的判斷方式相同。
+
+import numpy as np
+
+from count_footfall import kernels
+
+IN = "in"
+OUT = "out"
+
+
+def _ccw(ax, ay, bx, by, cx, cy):
+    # 與原本的 ccw(A, B, C) 相同的判斷式，參數可以是任意可廣播的陣列
+    return (cy - ay) * (bx - ax) > (by - ay) * (cx - ax)
+
+
+def segments_cross_lines(p0, p1, lines):
+    """
+    p0、p1：(N, 2) 線段兩端點；lines：(G, 4) 每列 [ax, ay, bx, by]
+    回傳 (hit, side)，皆為 (N, G) bool：hit 為是否相交，side 為 p0 是否在 AB 的右手邊
+    """
+    if kernels.enabled():
+        return kernels.segments_cross_lines(p0, p1, lines)
+    x0, y0 = p0[:, 0:1], p0[:, 1:2]
+    x1, y1 = p1[:, 0:1], p1[:, 1:2]
+    ax, ay, bx, by = (lines[:, i] for i in range(4))
+
+    side = _ccw(ax, ay, bx, by, x0, y0)
+    hit = ((_ccw(x0, y0, ax, ay, bx, by) != _ccw(x1, y1, ax, ay, bx, by))
+           & (_ccw(x0, y0, x1, y1, ax, ay) != _ccw(x0, y0, x1, y1, bx, by)))
+    return hit, side
+
+
+def points_in_polygon(points, polygon):
+    """奇偶規則判斷 (N, 2) 的點是否在多邊形 (E, 2) 內，回傳 (N,) bool"""
+    x, y = points[:, 0:1], points[:, 1:2]
+    xa, ya = polygon[:, 0], polygon[:, 1]
+    xb, yb = np.roll(xa, -1), np.roll(ya, -1)
+
+    straddle = (ya > y) != (yb > y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_cross = xa + (y - ya) * (xb - xa) / (yb - ya)
+    return np.count_nonzero(straddle & (x < x_cross), axis=1) % 2 == 1
+
+
+class CrossingCounter:
+    """
+    gates：[(name, points), ...]，points 為 2 點（線）或 3 點以上（多邊形）
+    每張影格呼叫 update(track_ids, centers)，counts 記錄每個閘門累計的 in / out
+    """
+
+    def __init__(self, gates):
+        if not gates:
+            raise ValueError("at least one gate is required")
+        self.names = [name for name, _ in gates]
+        self.points = [np.asarray(points, dtype=np.int64) for _, points in gates]
+
+        self._line_idx = [i for i, p in enumerate(self.points) if len(p) == 2]
+        self._poly_idx = [i for i, p in enumerate(self.points) if len(p) > 2]
+        self._lines = (np.stack([self.points[i].reshape(4) for i in self._line_idx])
+                       if self._line_idx else np.empty((0, 4), dtype=np.int64))
+
+        # counts[gate, 0] 為 in、counts[gate, 1] 為 out
+        self._counts = np.zeros((len(gates), 2), dtype=np.int64)
+        self._prev_ids = np.empty(0, dtype=np.int64)
+        self._prev_centers = np.empty((0, 2), dtype=np.int64)
+        self._prev_inside = np.empty((0, len(self._poly_idx)), dtype=bool)
+        self._segments = (self._prev_ids, self._prev_centers, self._prev_centers)
+
+    @property
+    def total(self):
+        """所有閘門、兩個方向的越線總數"""
+        return int(self._counts.sum())
+
+    def counts(self):
+        return {name: {IN: int(c[0]), OUT: int(c[1])}
+                for name, c in zip(self.names, self._counts)}
+
+    def update(self, track_ids, centers):
+        """
+        track_ids：(N,) 這張影格的軌跡 ID；centers：(N, 2) 整數中心點
+        回傳這張影格的越線 [(track_id, 目前中心點, 上一張中心點, 閘門名稱, 方向), ...]，依軌跡順序
+        """
+        track_ids = np.asarray(track_ids, dtype=np.int64)
+        centers = np.asarray(centers, dtype=np.int64).reshape(-1, 2)
+        inside = np.empty((len(centers), len(self._poly_idx)), dtype=bool)
+        for j, i in enumerate(self._poly_idx):
+            inside[:, j] = points_in_polygon(centers, self.points[i])
+
+        # 以排序過的上一張 ID 做 searchsorted，找出上一張也存在的軌跡
+        order = np.argsort(self._prev_ids, kind='stable')
+        sorted_ids = self._prev_ids[order]
+        if len(sorted_ids):
+            pos = np.minimum(np.searchsorted(sorted_ids, track_ids), len(sorted_ids) - 1)
+            cur = np.flatnonzero(sorted_ids[pos] == track_ids)
+            prev = order[pos[cur]]
+        else:
+            cur = prev = np.empty(0, dtype=np.int64)
+
+        p0 = centers[cur]
+        p1 = self._prev_centers[prev]
+
+        # (M, G) 每條線段對每個閘門的方向：+1 in、-1 out、0 沒有越過
+        direction = np.zeros((len(cur), len(self.points)), dtype=np.int8)
+        if len(self._line_idx):
+            hit, side = segments_cross_lines(p0, p1, self._lines)
+            direction[:, self._line_idx] = np.where(hit, np.where(side, 1, -1), 0)
+        if len(self._poly_idx):
+            now, before = inside[cur], self._prev_inside[prev]
+            direction[:, self._poly_idx] = now.astype(np.int8) - before.astype(np.int8)
+
+        self._counts[:, 0] += np.count_nonzero(direction > 0, axis=0)
+        self._counts[:, 1] += np.count_nonzero(direction < 0, axis=0)
+
+        self._prev_ids = track_ids
+        self._prev_centers = centers
+        self._prev_inside = inside
+        self._segments = (track_ids[cur], p0, p1)
+
+        crossings = []
+        rows, cols = np.nonzero(direction)
+        for r, g in zip(rows.tolist(), cols.tolist()):
+            crossings.append((int(track_ids[cur[r]]), tuple(p0[r].tolist()), tuple(p1[r].tolist()),
+                              self.names[g], IN if direction[r, g] > 0 else OUT))
+        return crossings
+
+    def segments(self):
+        """上一次 update 中前後兩張都存在的軌跡：[(track_id, 目前中心點, 上一張中心點), ...]（繪圖用）"""
+        ids, p0, p1 = self._segments
+        return [(i, tuple(a), tuple(b))
+                for i, a, b in zip(ids.tolist(), p0.tolist(), p1.tolist())]
@@ -0,0 +1,126 @@
+# 每張影格偵測結果的磁碟快取：移動計數線或調整追蹤參數時不必重跑 YOLO
+#
+# 快取以「影片內容雜湊 + 模型 + 影響偵測結果的設定」為鍵，每個鍵一個資料夾：
+#   offsets.npy  int64 (frames + 1,)  第 i 張影格的偵測在 dets 中的範圍 offsets[i]:offsets[i+1]
+#   keyed.npy    bool  (frames,)      該影格是否有跑偵測（False = 跳格，由 Kalman 預測推進）
+#   dets.npy     float32 (N, 5)       所有影格的 [x1, y1, x2, y2, conf] 串接
+#   meta.json    產生快取時的設定
+# 讀取時用 np.load(mmap_mode='r')，不需要把整個檔案讀進記憶體。
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+DET_CACHE_DIR = 'count_footfall/det_cache'
+
+_CHUNK = 1 << 20
+
+
+def hash_file(path, algorithm='blake2b'):
+    """以固定大小分塊計算檔案內容雜湊"""
+    h = hashlib.new(algorithm)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def model_id(model_path):
+    # 權重檔換了（大小或修改時間不同）就視為不同模型
+    try:
+        st = os.stat(model_path)
+        return f"{os.path.basename(model_path)}:{st.st_size}:{int(st.st_mtime)}"
+    except OSError:
+        return model_path
+
+
+class DetectionCache:
+
+    def __init__(self, root, key, meta=None):
+        self.dir = os.path.join(root, key)
+        self.key = key
+        self.meta = meta or {}
+        self._offsets = None
+        self._keyed = None
+        self._dets = None
+        self._recording = None
+
+    @classmethod
+    def for_video(cls, video_path, model_path, root=DET_CACHE_DIR, **params):
+        """params：會影響偵測結果的設定（信心值、ROI、解析度、跳格、動態閘門…）"""
+        meta = {
+            "video": hash_file(video_path),
+            "model": model_id(model_path),
+            "params": params,
+        }
+        key = hashlib.blake2b(json.dumps(meta, sort_keys=True, default=str).encode(),
+                              digest_size=16).hexdigest()
+        meta["video_path"] = os.path.abspath(video_path)
+        return cls(root, key, meta)
+
+    # ---------- 讀取 ----------
+
+    def exists(self):
+        return os.path.isfile(os.path.join(self.dir, 'meta.json'))
+
+    def load(self):
+        self._offsets = np.load(os.path.join(self.dir, 'offsets.npy'), mmap_mode='r')
+        self._keyed = np.load(os.path.join(self.dir, 'keyed.npy'), mmap_mode='r')
+        self._dets = np.load(os.path.join(self.dir, 'dets.npy'), mmap_mode='r')
+        return self
+
+    @property
+    def frames(self):
+        return len(self._keyed)
+
+    def get(self, frameIndex):
+        """回傳該影格的 dets 陣列；該影格沒有跑偵測時回傳 None"""
+        if not self._keyed[frameIndex]:
+            return None
+        lo, hi = self._offsets[frameIndex], self._offsets[frameIndex + 1]
+        return np.asarray(self._dets[lo:hi], dtype=np.float64)
+
+    # ---------- 寫入 ----------
+
+    def start_recording(self):
+        self._recording = {"keyed": [], "counts": [], "dets": []}
+
+    def append(self, frameIndex, dets):
+        """依影格順序記錄偵測結果；dets 為 None 代表該影格沒有跑偵測"""
+        rec = self._recording
+        if frameIndex != len(rec["keyed"]):
+            raise ValueError("detections must be recorded for consecutive frames from 0")
+        rec["keyed"].append(dets is not None)
+        if dets is None or len(dets) == 0:
+            rec["counts"].append(0)
+        else:
+            rec["counts"].append(len(dets))
+            rec["dets"].append(np.asarray(dets, dtype=np.float32)[:, :5])
+
+    def save(self):
+        """寫到暫存資料夾再改名，中途失敗不會留下不完整的快取"""
+        rec, self._recording = self._recording, None
+        offsets = np.zeros(len(rec["counts"]) + 1, dtype=np.int64)
+        np.cumsum(rec["counts"], out=offsets[1:])
+        dets = (np.concatenate(rec["dets"]) if rec["dets"]
+                else np.empty((0, 5), dtype=np.float32))
+
+        root = os.path.dirname(self.dir)
+        os.makedirs(root, exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix='.tmp-', dir=root)
+        try:
+            np.save(os.path.join(tmp, 'offsets.npy'), offsets)
+            np.save(os.path.join(tmp, 'keyed.npy'), np.array(rec["keyed"], dtype=bool))
+            np.save(os.path.join(tmp, 'dets.npy'), dets)
+            with open(os.path.join(tmp, 'meta.json'), 'w', encoding='utf-8') as f:
+                json.dump(dict(self.meta, frames=len(rec["keyed"])), f, indent=2, default=str)
+            if os.path.isdir(self.dir):
+                shutil.rmtree(self.dir)
+            os.rename(tmp, self.dir)
+        except Exception:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
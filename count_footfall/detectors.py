@@ -0,0 +1,202 @@
+# 偵測器後端：同一個介面包裝 Ultralytics（PyTorch）與 ONNX Runtime（CPU / OpenVINO），
+# 輸出都是 SORT 需要的 [x1, y1, x2, y2, conf]（原始影格座標）
+#
+#   detector(frames, classes, conf, imgsz) -> 與 frames 同順序的 dets 陣列 list
+#
+# ONNX 模型由 count_footfall/export_model.py 從 .pt 匯出（可選 INT8 量化）。
+# onnxruntime 為選用套件，只有使用 ONNX 後端時才需要安裝：
+#   pip install onnxruntime            # CPU
+#   pip install onnxruntime-openvino   # Intel CPU 上使用 OpenVINO execution provider
+
+import os
+
+import cv2
+import numpy as np
+
+BACKEND_ULTRALYTICS = "ultralytics"
+BACKEND_ONNXRUNTIME = "onnxruntime"
+BACKEND_OPENVINO = "openvino"
+BACKENDS = (BACKEND_ULTRALYTICS, BACKEND_ONNXRUNTIME, BACKEND_OPENVINO)
+
+# 與 Ultralytics predictor 預設值相同，兩種後端的結果才能直接比較
+DEFAULT_IMGSZ = 640
+NMS_IOU = 0.7
+LETTERBOX_COLOR = (114, 114, 114)
+MAX_DETECTIONS = 300
+
+
+def result_to_dets(result, classes, conf_threshold):
+    """
+    把 Ultralytics 單張影格的結果轉成 [x1, y1, x2, y2, conf] 陣列，
+    用 NumPy 一次取出，不逐一走訪 box
+    """
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return np.empty((0, 5))
+
+    xyxy = boxes.xyxy.cpu().numpy()
+    conf = boxes.conf.cpu().numpy()
+    cls = boxes.cls.cpu().numpy()
+
+    # 類別與信心值已在 predictor 內過濾，這裡再保險一次
+    keep = (conf >= conf_threshold) & np.isin(cls, classes)
+    return np.hstack([xyxy[keep], conf[keep, None]]).astype(np.float64)
+
+
+class UltralyticsDetector:
+    backend = BACKEND_ULTRALYTICS
+
+    def __init__(self, model_path):
+        from ultralytics import YOLO
+        self.model = YOLO(model_path)
+
+    def __call__(self, frames, classes, conf, imgsz=None):
+        kwargs = {"imgsz": imgsz} if imgsz else {}
+        results = self.model(frames, verbose=False, classes=list(classes), conf=conf, **kwargs)
+        return [result_to_dets(r, classes, conf) for r in results]
+
+    def param_bytes(self):
+        try:
+            return sum(p.numel() * p.element_size() for p in self.model.model.parameters())
+        except AttributeError:
+            return None
+
+
+def letterbox(frame, size):
+    """等比例縮放後置中補邊到 size=(h, w)，回傳 (影像, 縮放比例, (左邊補邊, 上方補邊))"""
+    h, w = frame.shape[:2]
+    scale = min(size[0] / h, size[1] / w)
+    nh, nw = int(round(h * scale)), int(round(w * scale))
+    top, left = (size[0] - nh) // 2, (size[1] - nw) // 2
+
+    out = np.full((size[0], size[1], 3), LETTERBOX_COLOR, dtype=np.uint8)
+    out[top:top + nh, left:left + nw] = cv2.resize(frame, (nw, nh), interpolation=cv2.INTER_LINEAR)
+    return out, scale, (left, top)
+
+
+def to_blob(images):
+    """BGR uint8 (N, H, W, 3) -> RGB float32 (N, 3, H, W)，數值 0 ~ 1"""
+    blob = np.ascontiguousarray(np.stack(images)[..., ::-1].transpose(0, 3, 1, 2))
+    return blob.astype(np.float32) / 255.0
+
+
+def decode_output(pred, classes, conf):
+    """
+    單張影格的模型輸出 -> 模型輸入座標的 [x1, y1, x2, y2, conf]（NMS 前）
+      YOLOv8 ~ v12：(4 + nc, N)，每欄 [cx, cy, w, h, 各類別分數]
+      end-to-end（YOLOv10 / nms=True 匯出）：(N, 6)，每列 [x1, y1, x2, y2, score, cls]
+    與 Ultralytics 相同，先取分數最高的類別再依 classes 過濾
+    """
+    if pred.shape[-1] == 6 and pred.shape[0] != 6:
+        keep = (pred[:, 4] >= conf) & np.isin(pred[:, 5], classes)
+        return pred[keep, :5], False
+
+    pred = pred.T
+    scores = pred[:, 4:]
+    cls = scores.argmax(axis=1)
+    score = scores[np.arange(len(scores)), cls]
+    keep = (score >= conf) & np.isin(cls, classes)
+    if not keep.any():
+        return np.empty((0, 5), dtype=np.float32), True
+
+    cx, cy, w, h = pred[keep, :4].T
+    boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2, score[keep]], axis=1)
+    return boxes, True
+
+
+def nms(dets, iou_threshold=NMS_IOU, max_det=MAX_DETECTIONS):
+    if len(dets) == 0:
+        return dets
+    xywh = np.column_stack([dets[:, 0], dets[:, 1],
+                            dets[:, 2] - dets[:, 0], dets[:, 3] - dets[:, 1]])
+    keep = cv2.dnn.NMSBoxes(xywh.tolist(), dets[:, 4].tolist(), 0.0, iou_threshold)
+    keep = np.asarray(keep, dtype=np.int64).reshape(-1)[:max_det]
+    return dets[keep]
+
+
+class OnnxDetector:
+    """
+    以 ONNX Runtime 執行匯出的 YOLO 模型。前處理（letterbox）、解碼與 NMS 在這裡以 NumPy / OpenCV 完成。
+    模型的 batch 維度是動態的話整批推論，否則逐張推論；輸入大小固定時忽略 imgsz。
+    """
+
+    def __init__(self, model_path, backend=BACKEND_ONNXRUNTIME, threads=None):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("ONNX backends need onnxruntime: pip install onnxruntime "
+                              "(or onnxruntime-openvino)") from e
+
+        if backend == BACKEND_OPENVINO:
+            providers = ["OpenVINOExecutionProvider", "CPUExecutionProvider"]
+        else:
+            providers = ["CPUExecutionProvider"]
+        available = ort.get_available_providers()
+        if providers[0] not in available:
+            raise RuntimeError(f"{providers[0]} is not available (installed: {available})")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+
+        self.backend = backend
+        self.model_path = model_path
+        self.session = ort.InferenceSession(model_path, options, providers=providers)
+        inp = self.session.get_inputs()[0]
+        self.input_name = inp.name
+        batch, _, h, w = inp.shape
+        self.dynamic_batch = not isinstance(batch, int)
+        self.fixed_size = (h, w) if isinstance(h, int) and isinstance(w, int) else None
+
+    def _input_size(self, imgsz):
+        if self.fixed_size is not None:
+            return self.fixed_size
+        # 動態輸入：長邊 imgsz，取 32 的倍數（YOLO 最大 stride）
+        size = int(np.ceil((imgsz or DEFAULT_IMGSZ) / 32) * 32)
+        return size, size
+
+    def __call__(self, frames, classes, conf, imgsz=None):
+        size = self._input_size(imgsz)
+        boxed = [letterbox(f, size) for f in frames]
+        blob = to_blob([b[0] for b in boxed])
+
+        if self.dynamic_batch:
+            outputs = self.session.run(None, {self.input_name: blob})[0]
+        else:
+            outputs = np.concatenate([self.session.run(None, {self.input_name: blob[i:i + 1]})[0]
+                                      for i in range(len(blob))])
+
+        dets = []
+        for frame, (_, scale, (left, top)), pred in zip(frames, boxed, outputs):
+            d, need_nms = decode_output(pred, classes, conf)
+            if need_nms:
+                d = nms(d)
+            d = np.asarray(d, dtype=np.float64).reshape(-1, 5)
+            # 從模型輸入座標換回原始影格座標
+            d[:, [0, 2]] = ((d[:, [0, 2]] - left) / scale).clip(0, frame.shape[1])
+            d[:, [1, 3]] = ((d[:, [1, 3]] - top) / scale).clip(0, frame.shape[0])
+            dets.append(d)
+        return dets
+
+    def param_bytes(self):
+        try:
+            return os.path.getsize(self.model_path)
+        except OSError:
+            return None
+
+
+def resolve_backend(model_path, backend=None):
+    """沒有指定後端時依副檔名判斷：.onnx 用 ONNX Runtime，其他用 Ultralytics"""
+    if backend is None:
+        return BACKEND_ONNXRUNTIME if model_path.lower().endswith('.onnx') else BACKEND_ULTRALYTICS
+    if backend not in BACKENDS:
+        raise ValueError(f"backend must be one of {BACKENDS}")
+    return backend
+
+
+def create_detector(model_path, backend=None, threads=None):
+    backend = resolve_backend(model_path, backend)
+    if backend == BACKEND_ULTRALYTICS:
+        return UltralyticsDetector(model_path)
+    return OnnxDetector(model_path, backend, threads)
@@ -0,0 +1,111 @@
+# 把 Ultralytics 權重匯出成 ONNX，並可選擇量化成 INT8，給 detectors.OnnxDetector 使用
+#
+# 用法（在專案根目錄執行）：
+#   python -m count_footfall.export_model --model count_footfall/yolo-coco/best.pt --int8
+#   python -m count_footfall.export_model --int8 --calibration-video input/reference.mp4
+#
+# 產生的檔案放在權重旁邊：
+#   best.onnx        FP32
+#   best.int8.onnx   INT8（有 --calibration-video 時以影片影格做靜態量化，否則為動態量化）
+# OpenVINO 後端直接使用同一個 .onnx 檔（onnxruntime-openvino 的 execution provider），不需另外匯出。
+# 需要 onnx 與 onnxruntime：pip install onnx onnxruntime
+
+import argparse
+import os
+
+import cv2
+import numpy as np
+
+from count_footfall.detectors import DEFAULT_IMGSZ, letterbox, to_blob
+from count_footfall.model_registry import DEFAULT_MODEL_PATH
+
+
+def export_onnx(model_path, imgsz=DEFAULT_IMGSZ, dynamic=True):
+    """匯出 FP32 ONNX，回傳檔案路徑；dynamic 時 batch 維度可變，可以整批推論"""
+    from ultralytics import YOLO
+    path = YOLO(model_path).export(format="onnx", imgsz=imgsz, dynamic=dynamic, simplify=True)
+    return str(path)
+
+
+def calibration_frames(video_path, n_frames, imgsz):
+    """從影片平均取 n_frames 張影格，做成與推論時相同前處理的輸入"""
+    vs = cv2.VideoCapture(video_path)
+    total = int(vs.get(cv2.CAP_PROP_FRAME_COUNT))
+    if total <= 0:
+        raise IOError(f"cannot read video: {video_path}")
+    blobs = []
+    for index in np.linspace(0, total - 1, min(n_frames, total)).astype(int):
+        vs.set(cv2.CAP_PROP_POS_FRAMES, int(index))
+        grabbed, frame = vs.read()
+        if grabbed:
+            blobs.append(to_blob([letterbox(frame, (imgsz, imgsz))[0]]))
+    vs.release()
+    return blobs
+
+
+def quantize_int8(onnx_path, output_path, calibration_video=None,
+                  calibration_size=64, imgsz=DEFAULT_IMGSZ):
+    """
+    有校正影片時做靜態量化（QDQ、per-channel 權重、activation 也量化，CPU 上最快）；
+    沒有時做動態量化（只量化權重，不需要校正資料）
+    """
+    from onnxruntime.quantization import (
+        CalibrationDataReader, QuantFormat, QuantType, quantize_dynamic, quantize_static,
+    )
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    # 量化前先做 shape inference 與圖最佳化，量化工具才能正確插入 QDQ 節點
+    prepared = output_path + ".pre.onnx"
+    quant_pre_process(onnx_path, prepared)
+    try:
+        if calibration_video is None:
+            quantize_dynamic(prepared, output_path, weight_type=QuantType.QUInt8)
+            return output_path
+
+        import onnxruntime as ort
+        input_name = ort.InferenceSession(
+            prepared, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+        blobs = calibration_frames(calibration_video, calibration_size, imgsz)
+
+        class Reader(CalibrationDataReader):
+            def __init__(self):
+                self._it = iter(blobs)
+
+            def get_next(self):
+                blob = next(self._it, None)
+                return None if blob is None else {input_name: blob}
+
+        quantize_static(prepared, output_path, Reader(),
+                        quant_format=QuantFormat.QDQ, per_channel=True,
+                        activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8)
+        return output_path
+    finally:
+        if os.path.exists(prepared):
+            os.remove(prepared)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="匯出 ONNX / INT8 偵測模型")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--imgsz", type=int, default=DEFAULT_IMGSZ)
+    parser.add_argument("--static-batch", action="store_true",
+                        help="batch 維度固定為 1（部分推論引擎需要）")
+    parser.add_argument("--int8", action="store_true", help="另外輸出 INT8 量化模型")
+    parser.add_argument("--calibration-video", default=None,
+                        help="靜態量化用的校正影片（建議用該攝影機的實際錄影）")
+    parser.add_argument("--calibration-frames", type=int, default=64)
+    args = parser.parse_args()
+
+    onnx_path = export_onnx(args.model, args.imgsz, dynamic=not args.static_batch)
+    print(f"[INFO] exported {onnx_path}")
+
+    if args.int8:
+        int8_path = os.path.splitext(onnx_path)[0] + ".int8.onnx"
+        quantize_int8(onnx_path, int8_path, args.calibration_video,
+                      args.calibration_frames, args.imgsz)
+        kind = "static" if args.calibration_video else "dynamic"
+        print(f"[INFO] quantized ({kind}) {int8_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+# 追蹤與越線計數的熱點運算以 numba 編譯：IoU、Kalman predict / update、線段相交
+#
+# sort.py 與 counting.py 在 enabled() 為 True 時改呼叫這裡的版本，否則使用原本的 NumPy 寫法，
+# 兩者的輸出一致（Kalman 狀態的差異在浮點誤差內）。
+#   - 沒有安裝 numba：自動使用 NumPy 版本
+#   - 環境變數 FOOTFALL_NUMBA=0：強制使用 NumPy 版本
+# 編譯結果以 cache=True 存在 count_footfall/__pycache__（或 NUMBA_CACHE_DIR），
+# 只有第一次執行需要編譯，之後的行程直接載入，不拖慢冷啟動。
+
+import os
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+_enabled = numba is not None and os.environ.get("FOOTFALL_NUMBA", "1") != "0"
+
+
+def enabled():
+    return _enabled
+
+
+def set_enabled(flag):
+    """切換 numba / NumPy 版本（效能測試用）"""
+    global _enabled
+    if flag and numba is None:
+        raise ImportError("numba is not installed")
+    _enabled = bool(flag)
+
+
+def _jit(fn):
+    if numba is None:
+        return fn
+    return numba.njit(cache=True, nogil=True)(fn)
+
+
+@_jit
+def iou_batch(bb_test, bb_gt):
+    """(N, 4) x (M, 4) -> (N, M)，運算順序與 sort.iou() 相同"""
+    n, m = bb_test.shape[0], bb_gt.shape[0]
+    out = np.empty((n, m))
+    for i in range(n):
+        area_t = (bb_test[i, 2] - bb_test[i, 0]) * (bb_test[i, 3] - bb_test[i, 1])
+        for j in range(m):
+            w = max(0., min(bb_test[i, 2], bb_gt[j, 2]) - max(bb_test[i, 0], bb_gt[j, 0]))
+            h = max(0., min(bb_test[i, 3], bb_gt[j, 3]) - max(bb_test[i, 1], bb_gt[j, 1]))
+            wh = w * h
+            out[i, j] = wh / (area_t + (bb_gt[j, 2] - bb_gt[j, 0]) * (bb_gt[j, 3] - bb_gt[j, 1]) - wh)
+    return out
+
+
+@_jit
+def pair_iou(a, b):
+    """逐列計算 a[k] 與 b[k] 的 IoU"""
+    out = np.empty(a.shape[0])
+    for k in range(a.shape[0]):
+        w = max(0., min(a[k, 2], b[k, 2]) - max(a[k, 0], b[k, 0]))
+        h = max(0., min(a[k, 3], b[k, 3]) - max(a[k, 1], b[k, 1]))
+        wh = w * h
+        out[k] = wh / ((a[k, 2] - a[k, 0]) * (a[k, 3] - a[k, 1])
+                       + (b[k, 2] - b[k, 0]) * (b[k, 3] - b[k, 1]) - wh)
+    return out
+
+
+@_jit
+def kalman_predict(x, P, Q):
+    """
+    就地更新所有軌跡：寬度速度會讓框縮到負值時歸零，x = Fx、P = FPF' + Q。
+    F 為 sort.F 的等速模型（前 3 維加上第 5~7 維的速度），直接展開成加法
+    """
+    n = x.shape[0]
+    for k in range(n):
+        if x[k, 6] + x[k, 2] <= 0:
+            x[k, 6] = 0.0
+        for i in range(3):
+            x[k, i] += x[k, i + 4]
+        # F P：第 i 列加上第 i+4 列；再乘 F'：第 j 欄加上第 j+4 欄
+        for i in range(3):
+            for j in range(7):
+                P[k, i, j] += P[k, i + 4, j]
+        for i in range(7):
+            for j in range(3):
+                P[k, i, j] += P[k, i, j + 4]
+        for i in range(7):
+            for j in range(7):
+                P[k, i, j] += Q[i, j]
+
+
+@_jit
+def _inv4(S, out):
+    """4x4 矩陣求反矩陣（部分樞軸的 Gauss-Jordan 消去法），寫入 out"""
+    a = np.empty((4, 8))
+    for i in range(4):
+        for j in range(4):
+            a[i, j] = S[i, j]
+            a[i, j + 4] = 1.0 if i == j else 0.0
+    for c in range(4):
+        p = c
+        for r in range(c + 1, 4):
+            if abs(a[r, c]) > abs(a[p, c]):
+                p = r
+        if p != c:
+            for j in range(8):
+                a[c, j], a[p, j] = a[p, j], a[c, j]
+        d = a[c, c]
+        for j in range(8):
+            a[c, j] /= d
+        for r in range(4):
+            if r != c:
+                f = a[r, c]
+                for j in range(8):
+                    a[r, j] -= f * a[c, j]
+    for i in range(4):
+        for j in range(4):
+            out[i, j] = a[i, j + 4]
+
+
+@_jit
+def kalman_update(x, P, idx, z, R):
+    """
+    就地以觀測 z[m]（x1, y1, x2, y2）更新軌跡 idx[m]。H 只取前 4 維；
+    共變異數用 Joseph form：P = (I - KH) P (I - KH)' + K R K'
+    """
+    d = x.shape[1]
+    S = np.empty((4, 4))
+    SI = np.empty((4, 4))
+    K = np.empty((d, 4))
+    KR = np.empty((d, 4))
+    A = np.empty((d, d))
+    y = np.empty(4)
+    for m in range(idx.shape[0]):
+        k = idx[m]
+        for i in range(4):
+            y[i] = z[m, i] - x[k, i]
+            for j in range(4):
+                S[i, j] = P[k, i, j] + R[i, j]
+        _inv4(S, SI)
+        # K = P H' S^-1，P H' 即 P 的前 4 欄
+        for i in range(d):
+            for j in range(4):
+                s = 0.0
+                for l in range(4):
+                    s += P[k, i, l] * SI[l, j]
+                K[i, j] = s
+        for i in range(d):
+            s = 0.0
+            for j in range(4):
+                s += K[i, j] * y[j]
+            x[k, i] += s
+            for j in range(4):
+                s = 0.0
+                for l in range(4):
+                    s += K[i, l] * R[l, j]
+                KR[i, j] = s
+        # A = (I - KH) P = P - K P[:4, :]
+        for i in range(d):
+            for j in range(d):
+                s = 0.0
+                for l in range(4):
+                    s += K[i, l] * P[k, l, j]
+                A[i, j] = P[k, i, j] - s
+        # P = A (I - KH)' + K R K' = A - A[:, :4] K' + KR K'
+        for i in range(d):
+            for j in range(d):
+                s = 0.0
+                for l in range(4):
+                    s += (KR[i, l] - A[i, l]) * K[j, l]
+                P[k, i, j] = A[i, j] + s
+
+
+@_jit
+def segments_cross_lines(p0, p1, lines):
+    """與 counting.segments_cross_lines 相同：回傳 (hit, side)，皆為 (N, G) bool"""
+    n, g = p0.shape[0], lines.shape[0]
+    hit = np.zeros((n, g), dtype=np.bool_)
+    side = np.zeros((n, g), dtype=np.bool_)
+    for i in range(n):
+        x0, y0, x1, y1 = p0[i, 0], p0[i, 1], p1[i, 0], p1[i, 1]
+        for j in range(g):
+            ax, ay, bx, by = lines[j, 0], lines[j, 1], lines[j, 2], lines[j, 3]
+            side[i, j] = (y0 - ay) * (bx - ax) > (by - ay) * (x0 - ax)
+            c0 = (by - y0) * (ax - x0) > (ay - y0) * (bx - x0)
+            c1 = (by - y1) * (ax - x1) > (ay - y1) * (bx - x1)
+            c2 = (ay - y0) * (x1 - x0) > (y1 - y0) * (ax - x0)
+            c3 = (by - y0) * (x1 - x0) > (y1 - y0) * (bx - x0)
+            hit[i, j] = (c0 != c1) and (c2 != c3)
+    return hit, side
@@ -0,0 +1,158 @@
+# process_video 各階段的效能統計：解碼、偵測、追蹤、計數、繪圖、存 PNG、編碼
+#
+# 每個階段累計秒數與次數（影格數），另外保留最近 window 次的每張影格耗時，
+# 用來算滾動的百分位數與對數刻度直方圖；記錄一次只是寫進環狀緩衝區，
+# 百分位數與直方圖在讀取時才計算。另外取樣管線各佇列的深度，並累計掉格數。
+# 管線模式下解碼與推論在背景執行緒，各階段只會由一個執行緒寫入，
+# 另以 lock 保護讀取整份統計時的一致性（API 會在處理中途讀取）。
+
+import threading
+import time
+
+import numpy as np
+
+STAGE_DECODE = "decode"
+STAGE_DETECT = "detect"
+STAGE_TRACK = "track"
+STAGE_COUNT = "count"
+STAGE_DRAW = "draw"
+STAGE_PNG = "png"
+STAGE_ENCODE = "encode"
+STAGES = (STAGE_DECODE, STAGE_DETECT, STAGE_TRACK, STAGE_COUNT, STAGE_DRAW, STAGE_PNG, STAGE_ENCODE)
+
+# 滾動視窗：每個階段保留最近幾次的耗時
+DEFAULT_WINDOW = 1024
+PERCENTILES = (50, 90, 99)
+# 直方圖的區間邊界（毫秒）：0.01 ms ~ 10 s，每 10 倍 3 格；超出範圍的計入頭尾兩格
+HISTOGRAM_EDGES_MS = np.logspace(-2, 4, 19)
+
+
+class PipelineMetrics:
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        if window < 1:
+            raise ValueError("window must be >= 1")
+        self._lock = threading.Lock()
+        self.window = window
+        self.seconds = dict.fromkeys(STAGES, 0.0)
+        self.calls = dict.fromkeys(STAGES, 0)
+        self._recent = {stage: np.zeros(window) for stage in STAGES}
+        self._samples = dict.fromkeys(STAGES, 0)
+        self.queues = {}    # 佇列名稱 -> {depth, max, total, samples, capacity}
+        self.dropped = 0
+        self.started = time.monotonic()
+        self.finished = None
+
+    def add(self, stage, seconds, n=1):
+        """記錄 stage 處理 n 張影格花了 seconds 秒；滾動視窗存的是每張影格的平均耗時"""
+        with self._lock:
+            self.seconds[stage] += seconds
+            self.calls[stage] += n
+            i = self._samples[stage]
+            self._recent[stage][i % self.window] = seconds / n if n else seconds
+            self._samples[stage] = i + 1
+
+    def observe_queues(self, depths, capacity=None):
+        """depths：{佇列名稱: 目前深度}，每張影格取樣一次"""
+        with self._lock:
+            for name, depth in depths.items():
+                q = self.queues.get(name)
+                if q is None:
+                    q = self.queues[name] = {"depth": 0, "max": 0, "total": 0, "samples": 0,
+                                             "capacity": capacity}
+                q["depth"] = depth
+                q["max"] = max(q["max"], depth)
+                q["total"] += depth
+                q["samples"] += 1
+
+    def drop(self, n=1):
+        """記錄沒有處理到的影格數（讀取失敗、提早結束或來不及處理而捨棄）"""
+        with self._lock:
+            self.dropped += n
+
+    def finish(self):
+        """處理結束，之後的 elapsed_seconds 固定在這個時間點"""
+        with self._lock:
+            if self.finished is None:
+                self.finished = time.monotonic()
+
+    def _recent_ms(self, stage):
+        n = min(self._samples[stage], self.window)
+        return self._recent[stage][:n] * 1000.0
+
+    def summary(self, wall_seconds=None):
+        """
+        每個階段的 {seconds, calls, ms_per_call, p50_ms, p90_ms, p99_ms, max_ms}，
+        百分位數只看最近 window 次；給了 wall_seconds 時另外加上 share（佔總時間比例）。
+        管線模式下各階段重疊執行，share 加總可能超過 1
+        """
+        with self._lock:
+            out = {}
+            for stage in STAGES:
+                seconds, calls = self.seconds[stage], self.calls[stage]
+                recent = self._recent_ms(stage)
+                out[stage] = {
+                    "seconds": seconds,
+                    "calls": calls,
+                    "ms_per_call": 1000.0 * seconds / calls if calls else 0.0,
+                }
+                values = np.percentile(recent, PERCENTILES) if len(recent) else [0.0] * len(PERCENTILES)
+                for p, v in zip(PERCENTILES, values):
+                    out[stage][f"p{p}_ms"] = float(v)
+                out[stage]["max_ms"] = float(recent.max()) if len(recent) else 0.0
+                if wall_seconds:
+                    out[stage]["share"] = seconds / wall_seconds
+            return out
+
+    def histograms(self):
+        """每個階段最近 window 次耗時的直方圖 {stage: counts}，區間見 HISTOGRAM_EDGES_MS"""
+        with self._lock:
+            out = {}
+            for stage in STAGES:
+                recent = np.clip(self._recent_ms(stage), HISTOGRAM_EDGES_MS[0], HISTOGRAM_EDGES_MS[-1])
+                out[stage] = np.histogram(recent, HISTOGRAM_EDGES_MS)[0].tolist()
+            return out
+
+    def snapshot(self):
+        """
+        目前為止的完整統計，可直接轉成 JSON：
+        elapsed_seconds、frames（已追蹤計數的影格數）、fps、dropped_frames、
+        stages（見 summary）、histograms（見 histograms）、queues（各佇列目前 / 最大 / 平均深度）
+        """
+        stages = self.summary()
+        histograms = self.histograms()
+        with self._lock:
+            elapsed = (self.finished or time.monotonic()) - self.started
+            frames = self.calls[STAGE_TRACK]
+            queues = {
+                name: {
+                    "depth": q["depth"],
+                    "max": q["max"],
+                    "mean": q["total"] / q["samples"] if q["samples"] else 0.0,
+                    "capacity": q["capacity"],
+                }
+                for name, q in self.queues.items()
+            }
+            return {
+                "elapsed_seconds": elapsed,
+                "frames": frames,
+                "fps": frames / elapsed if elapsed > 0 else 0.0,
+                "dropped_frames": self.dropped,
+                "stages": stages,
+                "histogram_edges_ms": HISTOGRAM_EDGES_MS.tolist(),
+                "histograms": histograms,
+                "queues": queues,
+            }
+
+
+def timed_iter(iterable, metrics, stage):
+    """依序取出 iterable 的項目，每取一個就把等待的時間記到 stage"""
+    it = iter(iterable)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(it)
+        except StopIteration:
+            return
+        metrics.add(stage, time.perf_counter() - start)
+        yield item
@@ -0,0 +1,121 @@
+# 偵測模型登錄表：每個權重檔（與後端）在同一個行程內只載入一次，並在啟動時先暖機
+
+import os
+import threading
+import time
+
+import numpy as np
+
+from count_footfall.detectors import create_detector, resolve_backend
+
+DEFAULT_MODEL_PATH = 'count_footfall/yolo-coco/best.pt'
+
+# 暖機用的假影格大小（與 YOLO 預設輸入尺寸相同）
+WARMUP_SHAPE = (640, 640, 3)
+
+_models = {}        # (正規化後的路徑, 後端) -> SharedModel
+_load_lock = threading.Lock()
+
+
+class SharedModel:
+    """
+    多個 worker 共用的偵測器實例（detectors.py 的任一後端）。
+    Ultralytics 的 predictor 帶有狀態，不能被多執行緒同時呼叫，
+    所以推論時以 lock 序列化；解碼、追蹤、輸出仍可在各自的執行緒並行。
+
+    呼叫方式：model(frames, classes, conf, imgsz) -> dets 陣列 list
+    """
+
+    def __init__(self, model, model_path, stats):
+        self.model = model
+        self.model_path = model_path
+        self.stats = stats
+        self._lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        with self._lock:
+            return self.model(*args, **kwargs)
+
+
+def _rss_bytes():
+    # Linux 讀 /proc；其他平台拿不到就回傳 None
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _load(model_path, backend, threads=None):
+    rss_before = _rss_bytes()
+
+    start = time.perf_counter()
+    model = create_detector(model_path, backend, threads)
+    load_seconds = time.perf_counter() - start
+
+    # 第一次推論會建 predictor / session、配置記憶體，先用假影格跑掉
+    start = time.perf_counter()
+    model([np.zeros(WARMUP_SHAPE, dtype=np.uint8)], classes=[0], conf=0.5)
+    warmup_seconds = time.perf_counter() - start
+
+    rss_after = _rss_bytes()
+    stats = {
+        "model_path": model_path,
+        "backend": backend,
+        "load_seconds": round(load_seconds, 4),
+        "warmup_seconds": round(warmup_seconds, 4),
+        "param_bytes": model.param_bytes(),
+        "rss_delta_bytes": (rss_after - rss_before
+                            if rss_before is not None and rss_after is not None else None),
+        "loaded_at": time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    print(f"[INFO] loaded {model_path} ({backend}) in {load_seconds:.2f}s "
+          f"(warm-up {warmup_seconds:.2f}s, rss +{(stats['rss_delta_bytes'] or 0) / 2**20:.1f} MiB)")
+    return SharedModel(model, model_path, stats)
+
+
+def get_model(model_path=DEFAULT_MODEL_PATH, backend=None, threads=None):
+    """
+    取得共用的模型實例，第一次呼叫時載入並暖機。
+    backend：detectors.BACKENDS 之一，None 依副檔名判斷（.onnx 用 ONNX Runtime）
+    threads：ONNX Runtime 的 intra-op 執行緒數，None 由 onnxruntime 決定
+    """
+    backend = resolve_backend(model_path, backend)
+    key = (os.path.normpath(model_path), backend)
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    with _load_lock:
+        # 其他執行緒可能在等鎖時已經載入完成
+        model = _models.get(key)
+        if model is None:
+            model = _load(model_path, backend, threads)
+            _models[key] = model
+    return model
+
+
+def init_worker(model_path, threads, backend=None):
+    """
+    多行程 worker 的 initializer：限制本行程的 torch / OpenCV / ONNX Runtime 執行緒數，
+    避免 N 個行程各自吃滿所有核心，並預先載入模型
+    """
+    import cv2
+    cv2.setNumThreads(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    get_model(model_path, backend, threads)
+
+
+def preload(model_paths, backend=None):
+    """啟動時預先載入設定中的所有模型"""
+    for path in model_paths:
+        get_model(path, backend)
+
+
+def model_stats():
+    """已載入模型的載入時間與記憶體用量"""
+    return [m.stats for m in _models.values()]
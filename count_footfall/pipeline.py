@@ -0,0 +1,208 @@
+# 影片處理管線的共用元件：解碼、批次、背景執行緒與有上限的佇列
+#
+# OpenCV 的解碼/編碼與 PyTorch 推論都會釋放 GIL，
+# 把各階段放在不同執行緒、用有上限的佇列串接，就能在多核心上重疊執行，
+# 佇列大小同時限制了記憶體中暫存的影格數。
+
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+
+import cv2
+
+_END = object()
+
+# 等待佇列時每隔多久檢查一次是否要停止（秒）
+_POLL_INTERVAL = 0.1
+
+
+def iter_frames(vs, end, start=0):
+    """
+    依序讀出 (frameIndex, frame)，frameIndex 從 start 到 end - 1；影片提早結束就停止。
+    呼叫前 vs 必須已經定位在 start。
+    """
+    for frameIndex in range(start, end):
+        grabbed, frame = vs.read()
+        if not grabbed:
+            return
+        yield frameIndex, frame
+
+
+class ThreadedIterator:
+    """
+    在背景執行緒中迭代 source，結果放進有上限的佇列，由呼叫端依序取出。
+    source 拋出的例外會在呼叫端取值時重新拋出。
+    """
+
+    def __init__(self, source, maxsize, name=None):
+        self.name = name
+        self._source = source
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._stop = threading.Event()
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self):
+        try:
+            for item in self._source:
+                if not self._put(item):
+                    return
+        except BaseException as e:
+            self._error = e
+        finally:
+            self._put(_END)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        item = self._queue.get()
+        if item is _END:
+            # 放回結束標記，重複呼叫 next 仍會停止
+            self._queue.put(_END)
+            if self._error is not None:
+                raise self._error
+            raise StopIteration
+        return item
+
+    def qsize(self):
+        return self._queue.qsize()
+
+    def close(self):
+        """通知背景執行緒停止並等它結束"""
+        self._stop.set()
+        self._thread.join()
+
+
+class VideoWriter:
+    """同步版的影片輸出，介面與 ThreadedVideoWriter 相同"""
+
+    def __init__(self, output_path, fps=30, fourcc="mp4v"):
+        self.output_path = output_path
+        self.fps = fps
+        self.fourcc = fourcc
+        self._writer = None
+
+    def write(self, frame):
+        if self._writer is None:
+            H, W = frame.shape[:2]
+            self._writer = cv2.VideoWriter(self.output_path,
+                                           cv2.VideoWriter_fourcc(*self.fourcc),
+                                           self.fps, (W, H), True)
+        self._writer.write(frame)
+
+    def qsize(self):
+        return 0
+
+    def release(self):
+        if self._writer is not None:
+            self._writer.release()
+
+
+class ThreadedVideoWriter:
+    """
+    在背景執行緒中編碼影格。第一張影格進來時才依其尺寸建立 cv2.VideoWriter。
+    """
+
+    def __init__(self, output_path, fps=30, maxsize=32, fourcc="mp4v"):
+        self.output_path = output_path
+        self.fps = fps
+        self.fourcc = fourcc
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="encoder", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        writer = None
+        while True:
+            frame = self._queue.get()
+            if frame is _END:
+                break
+            if self._error is not None:
+                # 出錯後只把佇列清空，避免 write() 卡住
+                continue
+            try:
+                if writer is None:
+                    H, W = frame.shape[:2]
+                    writer = cv2.VideoWriter(self.output_path,
+                                             cv2.VideoWriter_fourcc(*self.fourcc),
+                                             self.fps, (W, H), True)
+                writer.write(frame)
+            except Exception as e:
+                self._error = e
+        if writer is not None:
+            writer.release()
+
+    def write(self, frame):
+        if self._error is not None:
+            raise self._error
+        self._queue.put(frame)
+
+    def qsize(self):
+        return self._queue.qsize()
+
+    def release(self):
+        """等待佇列中的影格全部編碼完畢並關閉檔案"""
+        self._queue.put(_END)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+
+def _concat_copy(parts, output_path):
+    """用 ffmpeg 的 concat demuxer 直接複製串流，不重新編碼；成功回傳 True"""
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+        for part in parts:
+            path = os.path.abspath(part).replace("'", "'\\''")
+            f.write(f"file '{path}'\n")
+        list_path = f.name
+    try:
+        result = subprocess.run(
+            ["ffmpeg", "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+             "-i", list_path, "-c", "copy", output_path],
+            capture_output=True, text=True,
+        )
+    finally:
+        os.remove(list_path)
+    if result.returncode != 0:
+        print(f"[WARN] ffmpeg concat failed, re-encoding instead: {result.stderr.strip()}")
+        return False
+    return True
+
+
+def concat_videos(parts, output_path, fps=30, fourcc="mp4v"):
+    """
+    把依序輸出的多個影片片段接成一個檔案。
+    有 ffmpeg 時直接複製串流（片段的編碼設定都相同，只需要搬移資料）；
+    沒有 ffmpeg 或複製失敗時才用 OpenCV 解碼後重新編碼
+    """
+    if shutil.which("ffmpeg") and _concat_copy(parts, output_path):
+        return
+    writer = VideoWriter(output_path, fps, fourcc)
+    try:
+        for part in parts:
+            vs = cv2.VideoCapture(part)
+            try:
+                while True:
+                    grabbed, frame = vs.read()
+                    if not grabbed:
+                        break
+                    writer.write(frame)
+            finally:
+                vs.release()
+    finally:
+        writer.release()
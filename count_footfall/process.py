@@ -6,127 +6,480 @@ import time
 import glob
 import numpy as np
 from tqdm import tqdm
-from ultralytics import YOLO
 # from sort import Sort  # 你的追蹤器程式
 from count_footfall.sort import Sort
-from datetime import datetime
-import requests
+from count_footfall.model_registry import get_model, DEFAULT_MODEL_PATH
+from count_footfall.detectors import resolve_backend
+from count_footfall.stride import StrideController
+from count_footfall.motion import MotionGate
+from count_footfall.camera import load_camera_config, Roi
+from count_footfall.counting import CrossingCounter
+from count_footfall.det_cache import DetectionCache, DET_CACHE_DIR
+from count_footfall.timeline import recording_start, HourlyBuckets, video_source
+from count_footfall.checkpoint import (
+    checkpoint_signature, save_checkpoint, load_checkpoint, remove_checkpoint,
+    part_path, remove_parts,
+)
+from count_footfall.pipeline import (
+    iter_frames, ThreadedIterator, VideoWriter, ThreadedVideoWriter, concat_videos,
+)
+from count_footfall.metrics import (
+    PipelineMetrics, timed_iter, STAGE_DECODE, STAGE_DETECT, STAGE_TRACK, STAGE_COUNT,
+    STAGE_DRAW, STAGE_PNG, STAGE_ENCODE,
+)
 
-def process_video(video_path, model_path='count_footfall/yolo-coco/best.pt'):
-    os.makedirs("output", exist_ok=True)
 
-    for f in glob.glob('output/*.png'):
-        os.remove(f)
+# 只計算 person 類別，信心值門檻 0.5
+PERSON_CLASS_ID = 0
+CONF_THRESHOLD = 0.5
 
-    tracker = Sort()
-    memory = {}
-    line = [(369, 312), (800, 364)]
-    counter = 0
+# 輸出模式
+MODE_COUNT = "count"    # 只計數：不繪圖、不存影格、不輸出影片
+MODE_VIDEO = "video"    # 輸出標註後的影片
+MODE_DEBUG = "debug"    # 輸出影片，並每 debug_every 張存一張標註影格 PNG
+MODES = (MODE_COUNT, MODE_VIDEO, MODE_DEBUG)
+
+DEBUG_FRAME_DIR = "count_footfall/output"
+
+
+class ProcessingCancelled(Exception):
+    """cancel_event 被設定時由 process_video 拋出，代表工作被使用者取消"""
+
+
+def detect_batch(model, frames, conf_threshold=CONF_THRESHOLD, imgsz=None, roi=None):
+    """
+    多張影格一次送進偵測器推論，類別與信心值過濾交給偵測器後端（classes / conf），
+    回傳與 frames 同順序、原始影格座標的 dets 陣列 list
+
+    imgsz：偵測器輸入解析度（長邊像素），None 用模型預設
+    roi：camera.Roi，只把 ROI 範圍裁切後送進偵測器
+    """
+    if roi is not None:
+        frames = [roi.crop(f) for f in frames]
+
+    dets = model(frames, classes=[PERSON_CLASS_ID], conf=conf_threshold, imgsz=imgsz)
+
+    if roi is not None:
+        dets = [roi.to_frame(d) for d in dets]
+    return dets
+
+
+def process_video(video_path, model_path=DEFAULT_MODEL_PATH,
+                  output_path="output/result.mp4",
+                  progress_callback=None, cancel_event=None,
+                  batch_size=1, mode=MODE_VIDEO, debug_every=30,
+                  save_result=True, pipelined=False, queue_size=32,
+                  stride=1, adaptive_stride=False, max_stride=8,
+                  motion_gate=None, camera=None,
+                  start_frame=0, end_frame=None, track_callback=None,
+                  detection_cache=None, tracker_params=None, recorded_at=None,
+                  backend=None, checkpoint_path=None, checkpoint_every=1800,
+                  detector=None, metrics=None, result_source=None):
+    """
+    對影片做人流計數，回傳 (計數, 輸出影片路徑)；count 模式沒有輸出影片，路徑為 None
+
+    progress_callback(frames_done, frames_total)：每處理完一張影格呼叫一次
+    cancel_event：threading.Event，被設定時中止處理並拋出 ProcessingCancelled
+    batch_size：一次預先解碼並批次推論的影格數，追蹤仍依影格順序進行
+    mode：count / video / debug，見 MODES
+    debug_every：debug 模式下每幾張影格存一張 PNG 到 DEBUG_FRAME_DIR
+    save_result：處理完後是否把計數依影片時間軸分成每小時，在同一個交易內寫入 hourly_footfall
+    result_source：寫入 hourly_footfall 時的來源識別；同一來源再次寫入會取代上次的結果。
+                   None 時以影片內容雜湊（與處理的影格範圍）識別，同一支錄影重算不會重複計入
+    pipelined：解碼、推論、編碼各自在背景執行緒進行，追蹤計數留在呼叫端執行緒；
+               結果與循序處理相同
+    queue_size：管線各階段之間佇列的影格數上限，用來限制記憶體用量
+    stride：每幾張影格跑一次偵測，中間的影格用 Kalman 預測推進軌跡，
+            越線判斷仍然每張都做
+    adaptive_stride：依軌跡速度與人數自動調整間隔（上限 max_stride）；
+                     偵測時機取決於追蹤結果，因此不會預先批次推論
+    motion_gate：None 或 motion.METHODS 之一（diff / mog2）；畫面靜止時不跑偵測器，
+                 以空的偵測結果更新 SORT
+    camera：攝影機設定（CameraConfig、設定檔路徑或 count_footfall/cameras 下的名稱），
+            決定計數閘門、偵測區域與推論解析度；None 使用預設設定。
+            回傳的計數為所有閘門、兩個方向的越線總數
+    start_frame / end_frame：只處理 [start_frame, end_frame) 範圍的影格（影格編號維持原影片的編號）
+    track_callback(frameIndex, tracks, crossings)：每張影格追蹤計數後呼叫，
+                   tracks 為 SORT 輸出，crossings 為這張影格越線的
+                   (track_id, 目前中心點, 上一張中心點, 閘門名稱, 方向 in / out)
+    detection_cache：True（使用 DET_CACHE_DIR）或快取資料夾路徑。命中時直接重播快取的偵測結果，
+                     不載入模型、不跑推論（count 模式連影片都不解碼）；沒命中則完整處理後寫入快取
+    tracker_params：傳給 Sort 的參數（max_age / min_hits / iou_threshold / gating / first_id）
+    backend：偵測器後端（detectors.BACKENDS），None 依模型副檔名判斷
+    recorded_at：錄影開始時間（datetime）；None 時從檔名或檔案修改時間推算，見 timeline.py
+    checkpoint_path：檢查點檔案路徑。每處理 checkpoint_every 張影格存一次追蹤與計數狀態，
+                     同一個路徑已有相符的檢查點時從該影格繼續，結果與一次跑完相同；
+                     完成後刪除檢查點。輸出影片此時分段寫入，完成後再接成 output_path。
+                     動態閘門的背景模型不存入檢查點，續跑後重新建立
+    detector：已建立的偵測器（呼叫方式同 model_registry.SharedModel），給定時不從 model_path 載入；
+              效能測試以此換成 stub 偵測器
+    metrics：metrics.PipelineMetrics，記錄解碼 / 偵測 / 追蹤 / 計數 / 繪圖 / PNG / 編碼各階段的耗時、
+             管線佇列深度與掉格數；處理中途可由其他執行緒讀取 snapshot()，結束後仍保留完整統計
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be >= 1")
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {MODES}")
+    if debug_every < 1:
+        raise ValueError("debug_every must be >= 1")
+    if queue_size < 1:
+        raise ValueError("queue_size must be >= 1")
 
-    COLORS = np.random.randint(0, 255, size=(200, 3), dtype="uint8")
+    camera = load_camera_config(camera)
 
-    def intersect(A, B, C, D):
-        return ccw(A, C, D) != ccw(B, C, D) and ccw(A, B, C) != ccw(A, B, D)
+    # 檢查點：signature 包含所有會影響追蹤計數結果的設定
+    checkpoints = bool(checkpoint_path) and checkpoint_every > 0
+    signature = resumed = None
+    if checkpoints:
+        signature = checkpoint_signature(
+            video_path, model_path=model_path, backend=resolve_backend(model_path, backend),
+            camera=camera.model_dump(), conf=CONF_THRESHOLD, stride=stride,
+            adaptive_stride=adaptive_stride, max_stride=max_stride, motion_gate=motion_gate,
+            tracker_params=tracker_params, start_frame=start_frame, end_frame=end_frame,
+            detection_cache=bool(detection_cache),
+        )
+        resumed = load_checkpoint(checkpoint_path, signature)
 
-    def ccw(A, B, C):
-        return (C[1] - A[1]) * (B[0] - A[0]) > (B[1] - A[1]) * (C[0] - A[0])
+    draw = mode != MODE_COUNT
+    if draw:
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    else:
+        output_path = None
 
-    print("[INFO] loading Ultralytics model...")
-    model = YOLO(model_path)
+    if mode == MODE_DEBUG and resumed is None:
+        os.makedirs(DEBUG_FRAME_DIR, exist_ok=True)
+        for f in glob.glob(os.path.join(DEBUG_FRAME_DIR, '*.png')):
+            os.remove(f)
+
+    tracker = Sort(**(tracker_params or {}))
+    stride_ctrl = StrideController(stride, adaptive_stride, max_stride)
+    gate = MotionGate(motion_gate) if motion_gate else None
+    det_stats = {"frames": 0, "seconds": 0.0, "gated": 0}
+    gates = camera.counting_gates()
+    crossing_counter = CrossingCounter(gates)
+    counter = 0
+
+    # 固定種子：同一條軌跡 ID 每次執行都畫成同一個顏色
+    COLORS = np.random.default_rng(0).integers(0, 255, size=(200, 3), dtype="uint8")
+
+    # 從檢查點還原追蹤與計數狀態
+    resume_frame = start_frame
+    output_parts = []   # 已完成的輸出影片片段
+    if resumed is not None:
+        resume_frame = resumed["next_frame"]
+        counter = resumed["counter"]
+        tracker = resumed["tracker"]
+        crossing_counter = resumed["crossing_counter"]
+        stride_ctrl = resumed["stride_ctrl"]
+        det_stats = resumed["det_stats"]
+        output_parts = resumed["output_parts"]
+        print(f"[INFO] resuming from checkpoint at frame {resume_frame}")
 
     vs = cv2.VideoCapture(video_path)
-    writer = None
-    total = int(vs.get(cv2.CAP_PROP_FRAME_COUNT))
-
-    for frameIndex in tqdm(range(total), desc="處理影格"):
-        grabbed, frame = vs.read()
-        if not grabbed:
-            break
-
-        H, W = frame.shape[:2]
-        start = time.time()
-        results = model(frame, verbose=False)[0]  # 取得第一個 batch 的結果
-        end = time.time()
-
-        dets = []
-        for box in results.boxes:
-            if box.conf < 0.5:
-                continue
-
-            x1, y1, x2, y2 = box.xyxy[0].tolist()
-            cls = int(box.cls)
-            conf = float(box.conf)
-
-            # 只針對特定類別，例如 person
-            if cls == 0:
-                dets.append([x1, y1, x2, y2, conf])
-
-        dets = np.array(dets)
-        tracks = tracker.update(dets)
-
-        boxes = []
-        indexIDs = []
-        previous = memory.copy()
-        memory = {}
-
-        for track in tracks:
-            x1, y1, x2, y2, track_id = track
-            boxes.append([x1, y1, x2, y2])
-            indexIDs.append(int(track_id))
-            memory[int(track_id)] = [x1, y1, x2, y2]
-
-        for i, box in enumerate(boxes):
-            x1, y1, x2, y2 = map(int, box)
-            color = [int(c) for c in COLORS[indexIDs[i] % len(COLORS)]]
-            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+    if not vs.isOpened():
+        raise IOError(f"cannot open video: {video_path}")
+    frame_count = int(vs.get(cv2.CAP_PROP_FRAME_COUNT))
+
+    # 偵測快取：鍵包含所有會影響偵測結果的設定；計數線與追蹤參數不影響，可直接重播
+    cache = None
+    if detection_cache:
+        cache = DetectionCache.for_video(
+            video_path, model_path,
+            root=DET_CACHE_DIR if detection_cache is True else detection_cache,
+            conf=CONF_THRESHOLD, imgsz=camera.inference_size, roi=camera.roi,
+            stride=stride, adaptive_stride=adaptive_stride, max_stride=max_stride,
+            motion_gate=motion_gate, backend=resolve_backend(model_path, backend),
+        )
+    replay = cache is not None and cache.exists()
+    # 只有完整處理整支影片時才寫入快取
+    recording = (cache is not None and not replay and start_frame == 0 and end_frame is None
+                 and resumed is None)
+    if replay:
+        cache.load()
+        frame_count = min(frame_count, cache.frames)
+    elif recording:
+        cache.start_recording()
+
+    end_frame = frame_count if end_frame is None else min(end_frame, frame_count)
+    if resume_frame > 0:
+        vs.set(cv2.CAP_PROP_POS_FRAMES, resume_frame)
+    total = max(end_frame - start_frame, 0)
+
+    # 每次越線的時間 = 錄影開始時間 + 影格編號 / fps
+    fps = vs.get(cv2.CAP_PROP_FPS) or 30
+    hourly = HourlyBuckets(recording_start(video_path, frame_count, fps, recorded_at), fps)
+    if resumed is not None:
+        hourly = resumed["hourly"]
+
+    # 同一個行程內共用已載入並暖機過的模型；重播快取時不需要
+    if replay:
+        model = None
+    else:
+        model = detector if detector is not None else get_model(model_path, backend)
+    if metrics is None:
+        metrics = PipelineMetrics()
+
+    roi = None
+    if camera.roi is not None:
+        frame_shape = (int(vs.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(vs.get(cv2.CAP_PROP_FRAME_WIDTH)))
+        roi = Roi(camera.roi, frame_shape)
+
+    def open_writer():
+        # 有檢查點時每段輸出寫到各自的片段檔，存檔時關閉，確保已存檔的片段是完整的影片
+        path = part_path(output_path, len(output_parts)) if checkpoints else output_path
+        return (ThreadedVideoWriter(path, 30, queue_size) if pipelined
+                else VideoWriter(path, 30))
 
-            if indexIDs[i] in previous:
-                x2_prev, y2_prev, x4_prev, y4_prev = previous[indexIDs[i]]
-                p0 = (int((x1 + x2) / 2), int((y1 + y2) / 2))
-                p1 = (int((x2_prev + x4_prev) / 2), int((y2_prev + y4_prev) / 2))
-                cv2.line(frame, p0, p1, color, 3)
-                if intersect(p0, p1, line[0], line[1]):
-                    counter += 1
-                    print("目前計數:", counter)
+    if draw and checkpoints and resumed is None:
+        # 沒有可續跑的檢查點：之前留下的片段不屬於這次的輸出
+        remove_parts(output_path)
+    writer = open_writer() if draw else None
 
-            cv2.putText(frame, str(indexIDs[i]), (x1, y1 - 5),
+    def checkpoint(next_frame):
+        nonlocal writer
+        if draw:
+            writer.release()
+            output_parts.append(writer.output_path)
+            writer = open_writer()
+        save_checkpoint(checkpoint_path, signature, {
+            "next_frame": next_frame,
+            "counter": counter,
+            "tracker": tracker,
+            "crossing_counter": crossing_counter,
+            "stride_ctrl": stride_ctrl,
+            "det_stats": det_stats,
+            "hourly": hourly,
+            "output_parts": output_parts,
+        })
+
+    def handle_frame(frameIndex, frame, dets):
+        # 追蹤、計數、繪圖與輸出，必須依影格順序呼叫
+        nonlocal counter
+
+        if recording:
+            cache.append(frameIndex, dets)
+
+        t0 = time.perf_counter()
+        is_key = dets is not None
+        if is_key:
+            tracks = tracker.update(dets)
+        else:
+            tracks = tracker.predict()
+        stride_ctrl.observe(frameIndex, tracker, len(dets) if is_key else 0, is_key)
+        t1 = time.perf_counter()
+        metrics.add(STAGE_TRACK, t1 - t0)
+
+        # 中心點取整（向零截斷），所有軌跡與閘門一次判斷
+        track_ids = tracks[:, 4].astype(np.int64)
+        centers = ((tracks[:, 0:2] + tracks[:, 2:4]) / 2).astype(np.int64)
+        crossings = crossing_counter.update(track_ids, centers)
+        if crossings:
+            hourly.add(frameIndex, len(crossings))
+            counter = crossing_counter.total
+            print("目前計數:", counter)
+        t0 = time.perf_counter()
+        metrics.add(STAGE_COUNT, t0 - t1)
+
+        if draw:
+            boxes = dict(zip(track_ids.tolist(), tracks[:, :4].tolist()))
+            annotate(frame, boxes, crossing_counter.segments())
+            t1 = time.perf_counter()
+            metrics.add(STAGE_DRAW, t1 - t0)
+
+            if mode == MODE_DEBUG and frameIndex % debug_every == 0:
+                cv2.imwrite(os.path.join(DEBUG_FRAME_DIR, f"frame-{frameIndex}.png"), frame)
+                t0 = time.perf_counter()
+                metrics.add(STAGE_PNG, t0 - t1)
+                t1 = t0
+
+            # 管線模式下這裡只是放進編碼佇列，實際編碼在背景執行緒
+            writer.write(frame)
+            metrics.add(STAGE_ENCODE, time.perf_counter() - t1)
+
+        if track_callback is not None:
+            track_callback(frameIndex, tracks, crossings)
+
+        if progress_callback is not None:
+            progress_callback(frameIndex + 1 - start_frame, total)
+
+        if checkpoints and (frameIndex + 1 - start_frame) % checkpoint_every == 0:
+            checkpoint(frameIndex + 1)
+
+    def annotate(frame, boxes, segments):
+        for track_id, (x1, y1, x2, y2) in boxes.items():
+            x1, y1, x2, y2 = map(int, (x1, y1, x2, y2))
+            color = [int(c) for c in COLORS[track_id % len(COLORS)]]
+            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+            cv2.putText(frame, str(track_id), (x1, y1 - 5),
                         cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
 
-        cv2.line(frame, line[0], line[1], (0, 255, 255), 5)
+        for track_id, p0, p1 in segments:
+            color = [int(c) for c in COLORS[track_id % len(COLORS)]]
+            cv2.line(frame, p0, p1, color, 3)
+
+        if roi is not None:
+            roi.draw(frame)
+        for _, points in gates:
+            pts = np.array(points, dtype=np.int32).reshape(-1, 1, 2)
+            cv2.polylines(frame, [pts], len(points) > 2, (0, 255, 255), 5)
         cv2.putText(frame, str(counter), (100, 200),
                     cv2.FONT_HERSHEY_DUPLEX, 5.0, (0, 255, 255), 10)
 
-        out_path = f"count_footfall/output/frame-{frameIndex}.png"
-        cv2.imwrite(out_path, frame)
+    def detect(frames):
+        start = time.perf_counter()
+        batch_dets = detect_batch(model, frames, imgsz=camera.inference_size, roi=roi)
+        elap = time.perf_counter() - start
+        metrics.add(STAGE_DETECT, elap, len(frames))
+
+        if det_stats["frames"] == 0:
+            per_frame = elap / len(frames)
+            print(f"[INFO] single frame took {per_frame:.4f} seconds")
+            print(f"[INFO] estimated total time: {per_frame * total / stride:.4f} seconds")
+        det_stats["frames"] += len(frames)
+        det_stats["seconds"] += elap
+        return batch_dets
+
+    def gated(frame):
+        # 畫面靜止：不送進偵測器，回傳空的偵測結果
+        det_stats["gated"] += 1
+        return np.empty((0, 5))
+
+    def detect_stage(frames):
+        # 關鍵影格湊滿 batch_size 張就整批推論，再逐張輸出 (frameIndex, frame, dets, active)；
+        # 非關鍵影格的 dets 為 None。自適應模式由追蹤階段自行決定何時偵測。
+        # 動態閘門必須依序看過每張影格才能維持背景，所以在這裡逐張判斷。
+        pending = []
+        n_keys = 0
+        for frameIndex, frame in frames:
+            active = gate.is_active(frame) if gate is not None else True
+            key = not stride_ctrl.adaptive and stride_ctrl.is_key(frameIndex)
+            pending.append((frameIndex, frame, key, active))
+            n_keys += key and active
+            if n_keys == batch_size or len(pending) >= batch_size * stride:
+                yield from run_batch(pending)
+                pending = []
+                n_keys = 0
+        yield from run_batch(pending)
+
+    def run_batch(pending):
+        to_detect = [frame for _, frame, key, active in pending if key and active]
+        batch_dets = iter(detect(to_detect) if to_detect else [])
+        for frameIndex, frame, key, active in pending:
+            if not key:
+                dets = None
+            elif active:
+                dets = next(batch_dets)
+            else:
+                dets = gated(frame)
+            yield frameIndex, frame, dets, active
+
+    def replay_stage(frames):
+        for frameIndex, frame in frames:
+            yield frameIndex, frame, cache.get(frameIndex), True
+
+    # 解碼 → 推論 → 追蹤計數 → 編碼
+    stages = []
+    if replay and not draw:
+        # 只計數又有快取：不需要影像
+        frames = ((frameIndex, None) for frameIndex in range(resume_frame, end_frame))
+    else:
+        frames = timed_iter(iter_frames(vs, end_frame, resume_frame), metrics, STAGE_DECODE)
+        if pipelined:
+            frames = ThreadedIterator(frames, queue_size, name="decoder")
+            stages.append(frames)
+    detected = replay_stage(frames) if replay else detect_stage(frames)
+    if pipelined:
+        detected = ThreadedIterator(detected, queue_size, name="inference")
+        stages.append(detected)
+
+    def queue_depths():
+        depths = {stage.name: stage.qsize() for stage in stages}
+        if pipelined and draw:
+            depths["encoder"] = writer.qsize()
+        return depths
+
+    pbar = tqdm(total=total, initial=resume_frame - start_frame, desc="處理影格")
+    try:
+        # 追蹤與計數必須依影格順序，在這個執行緒中進行
+        for frameIndex, frame, dets, active in detected:
+            if cancel_event is not None and cancel_event.is_set():
+                raise ProcessingCancelled(video_path)
+            if pipelined:
+                metrics.observe_queues(queue_depths(), queue_size)
+            if (dets is None and not replay and stride_ctrl.adaptive
+                    and stride_ctrl.is_key(frameIndex)):
+                dets = detect([frame])[0] if active else gated(frame)
+            handle_frame(frameIndex, frame, dets)
+            pbar.update(1)
+        # 影片實際的影格數比標頭記載的少，或中途解碼失敗
+        metrics.drop(total - pbar.n)
+    finally:
+        pbar.close()
+        metrics.finish()
+        # 由下游往上游關閉，避免上游停止後下游卡在等待
+        for stage in reversed(stages):
+            stage.close()
+        vs.release()
+        if writer is not None:
+            writer.release()
+
+    if draw and checkpoints:
+        # 把各段輸出接成一支影片；只有一段時直接改名
+        parts = [p for p in output_parts + [writer.output_path] if os.path.exists(p)]
+        if len(parts) == 1:
+            os.replace(parts[0], output_path)
+        else:
+            start = time.perf_counter()
+            concat_videos(parts, output_path, 30)
+            for part in parts:
+                os.remove(part)
+            print(f"[INFO] joined {len(parts)} output parts in {time.perf_counter() - start:.2f}s")
 
-        if writer is None:
-            fourcc = cv2.VideoWriter_fourcc(*"mp4v")
-            writer = cv2.VideoWriter("output/result.mp4", fourcc, 30, (W, H), True)
+    if replay:
+        print(f"[INFO] replayed detections from cache {cache.key}")
+    else:
+        print(f"[INFO] detector ran on {det_stats['frames']} / {stride_ctrl.frames} frames")
+    if recording:
+        cache.save()
+        print(f"[INFO] saved detections to cache {cache.key}")
+    if gate is not None:
+        per_frame = det_stats["seconds"] / det_stats["frames"] if det_stats["frames"] else 0.0
+        motion = gate.summary(det_stats["gated"], per_frame)
+        print(f"[INFO] motion gate skipped {motion['skipped_detections']} detections, "
+              f"saved ~{motion['saved_seconds']:.2f}s (gate cost {motion['gate_seconds']:.2f}s)")
 
-            elap = end - start
-            print(f"[INFO] single frame took {elap:.4f} seconds")
-            print(f"[INFO] estimated total time: {elap * total:.4f} seconds")
+    report = metrics.snapshot()
+    for stage, st in report["stages"].items():
+        if st["calls"]:
+            print(f"[INFO] {stage}: {st['ms_per_call']:.2f} ms/frame "
+                  f"(p50 {st['p50_ms']:.2f}, p99 {st['p99_ms']:.2f}, max {st['max_ms']:.2f})")
+    for name, q in report["queues"].items():
+        print(f"[INFO] queue {name}: mean {q['mean']:.1f}, max {q['max']} / {q['capacity']}")
+    if report["dropped_frames"]:
+        print(f"[INFO] dropped {report['dropped_frames']} frames")
 
-        writer.write(frame)
+    if len(gates) > 1 or gates[0][0] != "line":
+        for name, c in crossing_counter.counts().items():
+            print(f"[INFO] gate {name}: in {c['in']}, out {c['out']}")
 
-    vs.release()
-    writer.release()
+    if save_result:
+        from app.db.connector import pool
+        from app.db.footfall import save_hourly_footfall, current_weather
 
-    now = datetime.now()
-    data = {
-        "date": now.strftime("%Y-%m-%d"),
-        "hour": now.hour,
-        "footfall": counter
-    }
+        hourly.cover(start_frame, start_frame + pbar.n)
+        buckets = hourly.items()
+        if result_source is None:
+            result_source = video_source(video_path, start_frame, end_frame, frame_count)
+        days = save_hourly_footfall(pool, buckets, current_weather(), source=result_source)
+        print(f"[INFO] saved {len(buckets)} hourly buckets over {days} day(s) "
+              f"starting {hourly.start:%Y-%m-%d %H:%M:%S}")
 
-    response = requests.post("http://127.0.0.1:5000/api/footfall",
-                             json=data,
-                             headers={"Content-Type": "application/json"})
-    print("API response:", response.status_code, response.text)
+    if checkpoints:
+        remove_checkpoint(checkpoint_path)
 
-    return counter, "output/result.mp4"
+    return counter, output_path
 
 if __name__ == "__main__":
     video_path = "input/record_2025-07-01_20-20-41.mp4"
     model_path = "yolo-coco/best.pt"  # 或 yolov12n.pt
-    process_video(video_path, model_path)
\ No newline at end of file
+    process_video(video_path, model_path, batch_size=8)
\ No newline at end of file
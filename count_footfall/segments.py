@@ -0,0 +1,208 @@
+# 單一長影片分段平行計數：切成數個時間區段交給不同行程處理，再在區段交界縫合計數
+#
+# 用法（在專案根目錄執行）：
+#   python -m count_footfall.segments --video input/long.mp4 --workers 8 --overlap-seconds 2
+#
+# 每個區段前後各多處理 overlap 張影格：
+#   - 前面的 overlap 是暖機，讓 SORT 在區段起點前就建立好軌跡，這段的越線不計入
+#   - 後面的 overlap 與下一段的暖機重疊，用來比對兩邊的軌跡
+# 交界處從 boundary 開始往後找，兩段輸出的軌跡框連續 SYNC_FRAMES 張一致時就交棒：
+# 交棒影格之前的越線算前一段，之後算下一段。兩段一致代表下一段的追蹤狀態已與
+# 循序處理相同，所以同一次越線不會重複計數也不會漏算。
+# 整個重疊區都沒有一致時，重疊區的越線都以前一段（已穩定追蹤）為準。
+# 接起來的越線依影片時間軸分到每小時寫入 hourly_footfall，來源識別與循序處理整支影片相同，
+# 兩種方式重跑都會取代同一段錄影之前的結果。
+
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from count_footfall.model_registry import DEFAULT_MODEL_PATH
+
+# 連續幾張影格軌跡一致才交棒（越線判斷需要上一張與這一張的位置都相同）
+SYNC_FRAMES = 2
+# 軌跡框座標差距在幾個像素內視為相同
+SYNC_TOLERANCE = 1.0
+
+
+def plan_segments(frame_count, n_segments):
+    """把 [0, frame_count) 平均切成 n_segments 段，回傳 [(start, end), ...]"""
+    n_segments = max(1, min(n_segments, frame_count))
+    bounds = np.linspace(0, frame_count, n_segments + 1).astype(int)
+    return [(int(bounds[i]), int(bounds[i + 1])) for i in range(n_segments)]
+
+
+def _run_segment(video_path, start, end, overlap, frame_count, options):
+    from count_footfall.process import process_video, MODE_COUNT
+
+    run_start = max(0, start - overlap)
+    run_end = min(frame_count, end + overlap)
+    events = []     # (frameIndex, track_id, 目前中心點, 上一張中心點)
+    boxes = {}      # 交界重疊區內每張影格的軌跡框
+
+    def on_track(frameIndex, tracks, crossings):
+        for crossing in crossings:
+            events.append((frameIndex,) + crossing)
+        if start <= frameIndex < start + overlap or end <= frameIndex < end + overlap:
+            boxes[frameIndex] = tracks[:, :4].copy()
+
+    t0 = time.perf_counter()
+    process_video(video_path, mode=MODE_COUNT, save_result=False,
+                  start_frame=run_start, end_frame=run_end,
+                  track_callback=on_track, **options)
+    return {"start": start, "end": end, "events": events, "boxes": boxes,
+            "seconds": time.perf_counter() - t0}
+
+
+def _same_boxes(a, b, tol=SYNC_TOLERANCE):
+    if a.shape != b.shape:
+        return False
+    if len(a) == 0:
+        return True
+    # SORT 的輸出順序與軌跡 ID 有關，兩段的 ID 不同，先依座標排序再比較
+    a = a[np.lexsort(a.T[::-1])]
+    b = b[np.lexsort(b.T[::-1])]
+    return bool(np.all(np.abs(a - b) <= tol))
+
+
+def find_handoff(prev, nxt, boundary, overlap, frame_count):
+    """回傳 (交棒影格, 是否找到一致的影格)"""
+    window_end = min(boundary + overlap, frame_count)
+    streak = 0
+    for f in range(boundary, window_end):
+        a, b = prev["boxes"].get(f), nxt["boxes"].get(f)
+        if a is not None and b is not None and _same_boxes(a, b):
+            streak += 1
+            if streak >= SYNC_FRAMES:
+                return f, True
+        else:
+            streak = 0
+    return window_end, False
+
+
+def merge_segments(results, overlap, frame_count):
+    """依交棒影格把各段的越線事件接起來，回傳 (採用的越線事件, 各交界資訊)"""
+    results = sorted(results, key=lambda r: r["start"])
+    handoffs = []
+    for prev, nxt in zip(results, results[1:]):
+        frame, synced = find_handoff(prev, nxt, nxt["start"], overlap, frame_count)
+        handoffs.append({"boundary": nxt["start"], "handoff": frame, "synced": synced})
+
+    lows = [0] + [h["handoff"] for h in handoffs]
+    highs = [h["handoff"] for h in handoffs] + [frame_count]
+    events = []
+    for r, lo, hi in zip(results, lows, highs):
+        events.extend(e for e in r["events"] if lo <= e[0] < hi)
+    return events, handoffs
+
+
+def save_segmented(video_path, events, frame_count, fps, recorded_at=None):
+    """把接起來的越線事件依影片時間軸分到每小時，寫入 hourly_footfall"""
+    from app.db.connector import pool
+    from app.db.footfall import save_hourly_footfall, current_weather
+    from count_footfall.timeline import recording_start, video_source, HourlyBuckets
+
+    hourly = HourlyBuckets(recording_start(video_path, frame_count, fps, recorded_at), fps)
+    for e in events:
+        hourly.add(e[0])
+    hourly.cover(0, frame_count)
+    buckets = hourly.items()
+    days = save_hourly_footfall(pool, buckets, current_weather(), source=video_source(video_path))
+    print(f"[INFO] saved {len(buckets)} hourly buckets over {days} day(s) "
+          f"starting {hourly.start:%Y-%m-%d %H:%M:%S}")
+
+
+def process_video_segmented(video_path, workers=None, overlap=60,
+                            model_path=DEFAULT_MODEL_PATH, save_result=True, **options):
+    """
+    把影片切成 workers 段平行計數，回傳 (總計數, 細節)。
+    overlap：每段前後多處理的影格數（暖機與交界比對）
+    save_result：把接起來的每小時計數寫入 hourly_footfall（同 process_video）
+    其餘參數傳給 process_video（固定為 count 模式）
+    """
+    vs = cv2.VideoCapture(video_path)
+    if not vs.isOpened():
+        raise IOError(f"cannot open video: {video_path}")
+    frame_count = int(vs.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = vs.get(cv2.CAP_PROP_FPS) or 30
+    vs.release()
+
+    workers = workers or os.cpu_count() or 1
+    segments = plan_segments(frame_count, workers)
+    threads = max(1, (os.cpu_count() or 1) // len(segments))
+    options = dict(options, model_path=model_path)
+
+    from count_footfall.model_registry import init_worker
+
+    t0 = time.perf_counter()
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=len(segments), mp_context=ctx,
+                             initializer=init_worker,
+                             initargs=(model_path, threads, options.get('backend'))) as executor:
+        futures = [executor.submit(_run_segment, video_path, start, end, overlap,
+                                   frame_count, options)
+                   for start, end in segments]
+        results = [f.result() for f in futures]
+
+    events, handoffs = merge_segments(results, overlap, frame_count)
+    if save_result:
+        save_segmented(video_path, events, frame_count, fps, options.get('recorded_at'))
+    return len(events), {
+        "frames": frame_count,
+        "segments": segments,
+        "handoffs": handoffs,
+        "segment_seconds": [round(r["seconds"], 3) for r in results],
+        "seconds": round(time.perf_counter() - t0, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="長影片分段平行計數")
+    parser.add_argument("--video", required=True)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--overlap-seconds", type=float, default=2.0)
+    parser.add_argument("--camera", default="default")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--backend", choices=["ultralytics", "onnxruntime", "openvino"], default=None)
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--stride", type=int, default=1)
+    parser.add_argument("--verify", action="store_true",
+                        help="另外循序處理一次，比對計數是否一致")
+    parser.add_argument("--no-save", action="store_true", help="只印出計數，不寫入 hourly_footfall")
+    args = parser.parse_args()
+
+    vs = cv2.VideoCapture(args.video)
+    fps = vs.get(cv2.CAP_PROP_FPS) or 30
+    vs.release()
+    overlap = int(round(args.overlap_seconds * fps))
+
+    options = {"camera": args.camera, "batch_size": args.batch_size, "stride": args.stride,
+               "backend": args.backend}
+    count, info = process_video_segmented(args.video, args.workers, overlap,
+                                          model_path=args.model, save_result=not args.no_save,
+                                          **options)
+    print(f"[INFO] segmented count: {count} ({info['frames']} frames, "
+          f"{len(info['segments'])} segments, {info['seconds']:.1f}s)")
+    for h in info["handoffs"]:
+        status = "synced" if h["synced"] else "not synced, kept previous segment"
+        print(f"  boundary {h['boundary']}: handoff at {h['handoff']} ({status})")
+
+    if args.verify:
+        from count_footfall.process import process_video, MODE_COUNT
+        t0 = time.perf_counter()
+        sequential, _ = process_video(args.video, args.model, mode=MODE_COUNT,
+                                      save_result=False, **options)
+        elapsed = time.perf_counter() - t0
+        print(f"[INFO] sequential count: {sequential} ({elapsed:.1f}s, "
+              f"speedup x{elapsed / info['seconds']:.2f})")
+        if sequential != count:
+            raise SystemExit("segmented count does not match sequential count")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,8 @@
 # count_footfall/sort.py
 from __future__ import print_function
 import numpy as np
-from collections import deque
-from filterpy.kalman import KalmanFilter
+
+from count_footfall import kernels
 
 def iou(bb_test, bb_gt):
     xx1 = np.maximum(bb_test[0], bb_gt[0])
@@ -16,142 +16,376 @@ def iou(bb_test, bb_gt):
               + (bb_gt[2]-bb_gt[0]) * (bb_gt[3]-bb_gt[1]) - wh)
     return o
 
-class KalmanBoxTracker:
-    count = 0
-
-    def __init__(self, bbox):
-        self.kf = KalmanFilter(dim_x=7, dim_z=4)
-        self.kf.F = np.array([[1,0,0,0,1,0,0],
-                              [0,1,0,0,0,1,0],
-                              [0,0,1,0,0,0,1],
-                              [0,0,0,1,0,0,0],
-                              [0,0,0,0,1,0,0],
-                              [0,0,0,0,0,1,0],
-                              [0,0,0,0,0,0,1]])
-        self.kf.H = np.array([[1,0,0,0,0,0,0],
-                              [0,1,0,0,0,0,0],
-                              [0,0,1,0,0,0,0],
-                              [0,0,0,1,0,0,0]])
-        self.kf.R[2:,2:] *= 10.
-        self.kf.P[4:,4:] *= 1000.  # give high uncertainty to the unobservable initial velocities
-        self.kf.P *= 10.
-        self.kf.Q[-1,-1] *= 0.01
-        self.kf.Q[4:,4:] *= 0.01
-        self.kf.x[:4] = np.array(bbox).reshape((4,1))
-
-        self.time_since_update = 0
-        self.id = KalmanBoxTracker.count
-        KalmanBoxTracker.count += 1
-        self.history = []
-        self.hits = 0
-        self.hit_streak = 0
-        self.age = 0
-
-    def update(self, bbox):
-        self.time_since_update = 0
-        self.history = []
-        self.hits += 1
-        self.hit_streak += 1
-        self.kf.update(np.array(bbox).reshape((4,1)))
+def iou_batch(bb_test, bb_gt):
+    """
+    所有配對一次算：bb_test (N, 4+)、bb_gt (M, 4+) -> (N, M)。
+    運算順序與 iou() 相同，結果逐元素一致
+    """
+    if kernels.enabled():
+        return kernels.iou_batch(np.ascontiguousarray(np.asarray(bb_test, dtype=np.float64)[:, :4]),
+                                 np.ascontiguousarray(np.asarray(bb_gt, dtype=np.float64)[:, :4]))
+    bb_test = np.asarray(bb_test, dtype=np.float64)[:, None, :4]
+    bb_gt = np.asarray(bb_gt, dtype=np.float64)[None, :, :4]
+    xx1 = np.maximum(bb_test[..., 0], bb_gt[..., 0])
+    yy1 = np.maximum(bb_test[..., 1], bb_gt[..., 1])
+    xx2 = np.minimum(bb_test[..., 2], bb_gt[..., 2])
+    yy2 = np.minimum(bb_test[..., 3], bb_gt[..., 3])
+    w = np.maximum(0., xx2 - xx1)
+    h = np.maximum(0., yy2 - yy1)
+    wh = w * h
+    o = wh / ((bb_test[..., 2]-bb_test[..., 0]) * (bb_test[..., 3]-bb_test[..., 1])
+              + (bb_gt[..., 2]-bb_gt[..., 0]) * (bb_gt[..., 3]-bb_gt[..., 1]) - wh)
+    return o
 
-    def predict(self):
-        if((self.kf.x[6]+self.kf.x[2])<=0):
-            self.kf.x[6] *= 0.0
-        self.kf.predict()
+# 等速模型：狀態 [x1, y1, x2, y2, vx1, vy1, vx2]，觀測 [x1, y1, x2, y2]
+# 參數與原本每條軌跡一個 filterpy.KalmanFilter 時相同
+F = np.array([[1,0,0,0,1,0,0],
+              [0,1,0,0,0,1,0],
+              [0,0,1,0,0,0,1],
+              [0,0,0,1,0,0,0],
+              [0,0,0,0,1,0,0],
+              [0,0,0,0,0,1,0],
+              [0,0,0,0,0,0,1]], dtype=float)
+R = np.eye(4)
+R[2:,2:] *= 10.
+P0 = np.eye(7)
+P0[4:,4:] *= 1000.  # give high uncertainty to the unobservable initial velocities
+P0 *= 10.
+Q = np.eye(7)
+Q[-1,-1] *= 0.01
+Q[4:,4:] *= 0.01
+_I7 = np.eye(7)
+
+class KalmanBoxTracks:
+    """
+    所有軌跡的 Kalman 濾波器放在連續陣列（struct-of-arrays）：
+    x (N, 7)、P (N, 7, 7)，以及每條軌跡的 id / hits / hit_streak / age / time_since_update。
+    predict 與 update 對整批軌跡做矩陣運算；新增軌跡接在尾端，刪除時壓縮陣列，
+    軌跡的先後順序與原本逐一建立 KalmanBoxTracker 的 list 相同。
+    軌跡 ID 由每個實例自己從 first_id 起依序配發，不同實例之間沒有共用的狀態。
+    """
+
+    def __init__(self, first_id=0):
+        self.next_id = first_id
+        self.x = np.empty((0, 7))
+        self.P = np.empty((0, 7, 7))
+        self.id = np.empty(0, dtype=np.int64)
+        self.time_since_update = np.empty(0, dtype=np.int64)
+        self.hits = np.empty(0, dtype=np.int64)
+        self.hit_streak = np.empty(0, dtype=np.int64)
+        self.age = np.empty(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.x)
+
+    def add(self, bboxes):
+        """每個 bbox 建立一條新軌跡，依序取得新的 ID"""
+        n = len(bboxes)
+        if n == 0:
+            return
+        x = np.zeros((n, 7))
+        x[:, :4] = bboxes[:, :4]
+        zeros = np.zeros(n, dtype=np.int64)
+        self.x = np.concatenate([self.x, x])
+        self.P = np.concatenate([self.P, np.broadcast_to(P0, (n, 7, 7))])
+        self.id = np.concatenate([self.id, np.arange(self.next_id, self.next_id + n)])
+        self.next_id += n
+        self.time_since_update = np.concatenate([self.time_since_update, zeros])
+        self.hits = np.concatenate([self.hits, zeros])
+        self.hit_streak = np.concatenate([self.hit_streak, zeros])
+        self.age = np.concatenate([self.age, zeros])
+
+    def keep(self, mask):
+        """只保留 mask 為 True 的軌跡（壓縮陣列，順序不變）"""
+        self.x = self.x[mask]
+        self.P = self.P[mask]
+        self.id = self.id[mask]
+        self.time_since_update = self.time_since_update[mask]
+        self.hits = self.hits[mask]
+        self.hit_streak = self.hit_streak[mask]
+        self.age = self.age[mask]
+
+    def advance(self):
+        # 寬度的速度會讓框縮到負值時歸零，再整批做 x = Fx、P = FPF' + Q
+        if kernels.enabled():
+            kernels.kalman_predict(self.x, self.P, Q)
+        else:
+            self.x[(self.x[:, 6] + self.x[:, 2]) <= 0, 6] = 0.0
+            self.x = self.x @ F.T
+            self.P = F @ self.P @ F.T + Q
         self.age += 1
-        if(self.time_since_update>0):
-            self.hit_streak = 0
+
+    def predict(self):
+        self.advance()
+        self.hit_streak[self.time_since_update > 0] = 0
         self.time_since_update += 1
-        self.history.append(self.kf.x)
-        return self.history[-1]
 
-    def get_state(self):
-        return self.kf.x[:4].reshape((1, 4))[0]
+    def update(self, idx, bboxes):
+        """
+        idx 指定的軌跡各以一個觀測更新；H 只取前 4 維，以切片代替矩陣乘法。
+        共變異數用 Joseph form，與 filterpy 的 KalmanFilter.update 相同
+        """
+        if len(idx) == 0:
+            return
+        if kernels.enabled():
+            kernels.kalman_update(self.x, self.P, np.asarray(idx, dtype=np.int64),
+                                  np.ascontiguousarray(bboxes[:, :4], dtype=np.float64), R)
+            self._count_hits(idx)
+            return
+        x = self.x[idx]
+        P = self.P[idx]
+        y = bboxes[:, :4] - x[:, :4]
+        PHT = P[:, :, :4]
+        S = PHT[:, :4, :] + R
+        K = PHT @ np.linalg.inv(S)
+        x = x + (K @ y[:, :, None])[:, :, 0]
+        KH = np.zeros_like(P)
+        KH[:, :, :4] = K
+        I_KH = _I7 - KH
+        P = I_KH @ P @ I_KH.transpose(0, 2, 1) + K @ R @ K.transpose(0, 2, 1)
+
+        self.x[idx] = x
+        self.P[idx] = P
+        self._count_hits(idx)
+
+    def _count_hits(self, idx):
+        self.time_since_update[idx] = 0
+        self.hits[idx] += 1
+        self.hit_streak[idx] += 1
+
+    def output(self, mask):
+        """mask 選出的軌跡，格式 [x1, y1, x2, y2, id]；依原本的寫法由最新的軌跡排到最舊"""
+        if not mask.any():
+            return np.empty((0, 5))
+        return np.hstack([self.x[mask, :4], self.id[mask, None]])[::-1]
 
 class Sort:
-    def __init__(self, max_age=1, min_hits=3, iou_threshold=0.3):
+    """
+    每個實例各自保存軌跡與 ID 序列：同樣的輸入與 first_id 一定得到同樣的 ID，
+    多支影片 / 多台攝影機可以在同一個行程的不同執行緒各用一個 Sort。
+    同一個實例不可被多個執行緒同時呼叫。
+    """
+
+    def __init__(self, max_age=1, min_hits=3, iou_threshold=0.3, gating=False, first_id=0):
         self.max_age = max_age
         self.min_hits = min_hits
         self.iou_threshold = iou_threshold
-        self.trackers = []
+        # 極擁擠的場景（上千人）改用空間網格只配對有重疊的框，並依連通塊分別指派
+        self.gating = gating
+        self.tracks = KalmanBoxTracks(first_id)
         self.frame_count = 0
 
+    def _confirmed(self):
+        tracks = self.tracks
+        return (tracks.time_since_update < 1) & (
+            (tracks.hits >= self.min_hits) | (self.frame_count <= self.min_hits))
+
     def update(self, dets=np.empty((0, 5))):
         self.frame_count += 1
-        trks = np.zeros((len(self.trackers), 5))
-        to_del = []
-        ret = []
-
-        for t, trk in enumerate(trks):
-            pos = self.trackers[t].predict()
-            trk[:4] = pos[:4].reshape(-1)
-            trk[4] = 0
-            if np.any(np.isnan(pos)):
-                to_del.append(t)
-        trks = np.ma.compress_rows(np.ma.masked_invalid(trks))
-        for t in reversed(to_del):
-            self.trackers.pop(t)
-
-        matched, unmatched_dets, unmatched_trks = associate_detections_to_trackers(dets, trks, self.iou_threshold)
-
-        for t, trk in enumerate(self.trackers):
-            if(t not in unmatched_trks):
-                trk.update(dets[matched[np.where(matched[:,1]==t)[0],0][0], :4])
-
-        for i in unmatched_dets:
-            trk = KalmanBoxTracker(dets[i,:4])
-            self.trackers.append(trk)
-
-        i = len(self.trackers)
-        for trk in reversed(self.trackers):
-            d = trk.get_state()
-            if(trk.time_since_update < 1 and (trk.hits >= self.min_hits or self.frame_count <= self.min_hits)):
-                ret.append(np.concatenate((d, [trk.id])).reshape(1, -1))
-            i -= 1
-            if(trk.time_since_update > self.max_age):
-                self.trackers.pop(i)
-
-        if(len(ret)>0):
-            return np.concatenate(ret)
-        return np.empty((0, 5))
+        tracks = self.tracks
+
+        tracks.predict()
+        valid = ~np.isnan(tracks.x).any(axis=1)
+        if not valid.all():
+            tracks.keep(valid)
+
+        associate = associate_gated if self.gating else associate_detections_to_trackers
+        matched, unmatched_dets, unmatched_trks = associate(dets, tracks.x[:, :4], self.iou_threshold)
+
+        tracks.update(matched[:, 1], dets[matched[:, 0]])
+        tracks.add(dets[unmatched_dets])
+
+        ret = tracks.output(self._confirmed())
+        alive = tracks.time_since_update <= self.max_age
+        if not alive.all():
+            tracks.keep(alive)
+        return ret
+
+    def predict(self):
+        """
+        沒有偵測結果的影格（例如跳過推論）：用 Kalman 預測推進所有軌跡，
+        回傳格式與 update 相同。軌跡不會因此被視為漏偵測或刪除。
+        """
+        tracks = self.tracks
+        tracks.advance()
+        valid = ~np.isnan(tracks.x).any(axis=1)
+        return tracks.output(valid & self._confirmed())
+
+    def velocities(self):
+        """每條軌跡每張影格的位移速度 (vx1, vy1, vx2)，shape (N, 3)"""
+        return self.tracks.x[:, 4:7].copy()
 
 def associate_detections_to_trackers(detections, trackers, iou_threshold=0.3):
     if(len(trackers)==0):
         return np.empty((0,2),dtype=int), np.arange(len(detections)), np.empty((0),dtype=int)
 
     iou_matrix = np.zeros((len(detections),len(trackers)),dtype=np.float32)
-    for d, det in enumerate(detections):
-        for t, trk in enumerate(trackers):
-            iou_matrix[d,t] = iou(det[:4], trk[:4])
+    if len(detections) > 0:
+        iou_matrix[:] = iou_batch(detections, trackers)
 
     row_inds, col_inds = linear_assignment(-iou_matrix)
-    matched_indices = (
-    np.array(list(zip(row_inds, col_inds))) if len(row_inds) > 0
-    else np.empty((0, 2), dtype=int)
-    )
-
-
-    unmatched_detections = []
-    for d, det in enumerate(detections):
-        if(d not in matched_indices[:,0]):
-            unmatched_detections.append(d)
-    unmatched_trackers = []
-    for t, trk in enumerate(trackers):
-        if(t not in matched_indices[:,1]):
-            unmatched_trackers.append(t)
-
-    matches = []
-    for m in matched_indices:
-        if(iou_matrix[m[0], m[1]] < iou_threshold):
-            unmatched_detections.append(m[0])
-            unmatched_trackers.append(m[1])
-        else:
-            matches.append(m.reshape(1,2))
-    if(len(matches)==0):
-        matches = np.empty((0,2),dtype=int)
+    matched_indices = np.stack([row_inds, col_inds], axis=1).astype(int)
+
+    # 用布林遮罩找出沒被指派的偵測與軌跡（依索引遞增），
+    # 再接上指派了但 IoU 不足的配對（依指派順序），順序與原本的寫法相同
+    det_assigned = np.zeros(len(detections), dtype=bool)
+    det_assigned[matched_indices[:, 0]] = True
+    trk_assigned = np.zeros(len(trackers), dtype=bool)
+    trk_assigned[matched_indices[:, 1]] = True
+
+    low = iou_matrix[matched_indices[:, 0], matched_indices[:, 1]] < iou_threshold
+    unmatched_detections = np.concatenate(
+        [np.flatnonzero(~det_assigned), matched_indices[low, 0]]).astype(int)
+    unmatched_trackers = np.concatenate(
+        [np.flatnonzero(~trk_assigned), matched_indices[low, 1]]).astype(int)
+    matches = matched_indices[~low].reshape(-1, 2)
+    return matches, unmatched_detections, unmatched_trackers
+
+def _grid_cells(boxes, origin, cell):
+    """每個框涵蓋的網格，回傳 (框索引, 網格鍵)；網格邊長不小於最大的框，每個框最多跨 2x2 格"""
+    lo = np.floor((boxes[:, :2] - origin) / cell).astype(np.int64)
+    hi = np.floor((boxes[:, 2:4] - origin) / cell).astype(np.int64)
+    span = np.maximum(hi - lo + 1, 1)
+    n_cells = span[:, 0] * span[:, 1]
+    box = np.repeat(np.arange(len(boxes)), n_cells)
+    k = np.arange(n_cells.sum()) - np.repeat(np.cumsum(n_cells) - n_cells, n_cells)
+    gx = lo[box, 0] + k // span[box, 1]
+    gy = lo[box, 1] + k % span[box, 1]
+    # 座標平移後網格索引非負，x 乘上足夠大的倍數與 y 組成單一整數鍵
+    return box, gx * (1 << 32) + gy
+
+def overlap_pairs(bb_test, bb_gt):
+    """
+    用均勻網格找出 IoU > 0 的 (test, gt) 配對，不建立 N x M 的矩陣。
+    回傳 (test 索引, gt 索引, IoU)，依 (test, gt) 遞增排序
+    """
+    empty = np.empty(0, dtype=np.int64)
+    if len(bb_test) == 0 or len(bb_gt) == 0:
+        return empty, empty, np.empty(0)
+    bb_test = np.asarray(bb_test, dtype=np.float64)[:, :4]
+    bb_gt = np.asarray(bb_gt, dtype=np.float64)[:, :4]
+    both = np.vstack([bb_test, bb_gt])
+    origin = both[:, :2].min(axis=0)
+    cell = max(float(np.max(both[:, 2:4] - both[:, :2])), 1.0)
+
+    t_box, t_key = _grid_cells(bb_test, origin, cell)
+    g_box, g_key = _grid_cells(bb_gt, origin, cell)
+    order = np.argsort(g_key, kind='stable')
+    g_key, g_box = g_key[order], g_box[order]
+
+    # 同一格內的 test 與 gt 兩兩配對
+    left = np.searchsorted(g_key, t_key, 'left')
+    n = np.searchsorted(g_key, t_key, 'right') - left
+    ti = np.repeat(t_box, n)
+    key = np.repeat(t_key, n)
+    offset = np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n)
+    gi = g_box[np.repeat(left, n) + offset]
+
+    # 跨多格的框會在多個格子重複配對：只保留交集左上角所在的那一格，每對只出現一次
+    corner = np.maximum(bb_test[ti, :2], bb_gt[gi, :2])
+    _, corner_key = _grid_cells(np.hstack([corner, corner]), origin, cell)
+    first = corner_key == key
+    ti, gi = ti[first], gi[first]
+
+    o = _pair_iou(bb_test[ti], bb_gt[gi])
+    keep = o > 0
+    order = np.lexsort((gi[keep], ti[keep]))
+    return ti[keep][order], gi[keep][order], o[keep][order]
+
+def _pair_iou(a, b):
+    """逐列計算 a[k] 與 b[k] 的 IoU，運算順序與 iou() 相同"""
+    if kernels.enabled():
+        return kernels.pair_iou(np.ascontiguousarray(a), np.ascontiguousarray(b))
+    xx1 = np.maximum(a[:, 0], b[:, 0])
+    yy1 = np.maximum(a[:, 1], b[:, 1])
+    xx2 = np.minimum(a[:, 2], b[:, 2])
+    yy2 = np.minimum(a[:, 3], b[:, 3])
+    w = np.maximum(0., xx2 - xx1)
+    h = np.maximum(0., yy2 - yy1)
+    wh = w * h
+    return wh / ((a[:, 2]-a[:, 0]) * (a[:, 3]-a[:, 1])
+                 + (b[:, 2]-b[:, 0]) * (b[:, 3]-b[:, 1]) - wh)
+
+def associate_gated(detections, trackers, iou_threshold=0.3):
+    """
+    與 associate_detections_to_trackers 相同的指派，但只考慮有重疊的偵測與軌跡：
+    IoU 為 0 的配對對總和沒有貢獻，完整矩陣的最佳指派可以拆成每個連通塊各自求解。
+    只有一個偵測與一條軌跡的連通塊直接配對，其餘的連通塊才呼叫 linear_assignment。
+    回傳的配對，以及未配對的偵測與軌跡的集合都與 associate_detections_to_trackers 相同。
+    未配對偵測的順序（決定新軌跡的 ID）在偵測數不多於軌跡數時也相同；偵測較多時，
+    完整矩陣為沒有重疊對象的軌跡補上哪個 IoU 為 0 的偵測取決於求解器，少數情況下順序不同，
+    此時 Sort 輸出的框相同，只有新軌跡的 ID 編號不同。未配對軌跡的順序不影響結果
+    """
+    n_det, n_trk = len(detections), len(trackers)
+    if n_trk == 0:
+        return np.empty((0,2),dtype=int), np.arange(n_det), np.empty((0),dtype=int)
+
+    di, ti, o = overlap_pairs(detections, trackers)
+    # 與完整矩陣的路徑一樣以 float32 比較
+    o = o.astype(np.float32)
+    m_det, m_trk, m_iou = [di[:0]], [ti[:0]], [o[:0]]
+    if len(di):
+        from scipy.sparse import coo_matrix
+        from scipy.sparse.csgraph import connected_components
+        # 節點 0..n_det-1 為偵測、n_det.. 為軌跡
+        graph = coo_matrix((np.ones(len(di)), (di, n_det + ti)), shape=(n_det + n_trk,) * 2)
+        _, labels = connected_components(graph, directed=False)
+        comp = labels[di]
+
+        # 只有一條邊的連通塊：該偵測與該軌跡都沒有其他重疊對象
+        single = np.bincount(comp)[comp] == 1
+        m_det.append(di[single])
+        m_trk.append(ti[single])
+        m_iou.append(o[single])
+
+        # 其餘的連通塊：先一次算出每個偵測 / 軌跡在所屬連通塊內的列、欄編號，再逐塊指派
+        rest = np.flatnonzero(~single)
+        rest = rest[np.argsort(comp[rest], kind='stable')]
+        rc = comp[rest]
+        d_key, r = np.unique(rc * n_det + di[rest], return_inverse=True)
+        t_key, c = np.unique(rc * n_trk + ti[rest], return_inverse=True)
+        groups = np.unique(rc)
+        d_bounds = np.searchsorted(d_key // n_det, groups).tolist() + [len(d_key)]
+        t_bounds = np.searchsorted(t_key // n_trk, groups).tolist() + [len(t_key)]
+        e_bounds = np.searchsorted(rc, groups).tolist() + [len(rc)]
+        for k in range(len(groups)):
+            d0, t0, e0, e1 = d_bounds[k], t_bounds[k], e_bounds[k], e_bounds[k + 1]
+            cost = np.zeros((d_bounds[k + 1] - d0, t_bounds[k + 1] - t0), dtype=np.float32)
+            cost[r[e0:e1] - d0, c[e0:e1] - t0] = o[rest[e0:e1]]
+            row_inds, col_inds = linear_assignment(-cost)
+            m_det.append(d_key[d0 + row_inds] % n_det)
+            m_trk.append(t_key[t0 + col_inds] % n_trk)
+            m_iou.append(cost[row_inds, col_inds])
+
+    m_det, m_trk, m_iou = np.concatenate(m_det), np.concatenate(m_trk), np.concatenate(m_iou)
+    # 連通塊內 IoU 為 0 的配對視同沒有指派；其餘依偵測索引排序，與完整矩陣的指派順序相同
+    positive = m_iou > 0
+    order = np.argsort(m_det[positive], kind='stable')
+    m_det, m_trk, m_iou = m_det[positive][order], m_trk[positive][order], m_iou[positive][order]
+
+    det_assigned = np.zeros(n_det, dtype=bool)
+    det_assigned[m_det] = True
+    trk_assigned = np.zeros(n_trk, dtype=bool)
+    trk_assigned[m_trk] = True
+
+    low = m_iou < iou_threshold
+    if n_det <= n_trk:
+        # 完整矩陣會指派每一個偵測，未配對的偵測就是指派了但 IoU 不足的，依偵測索引遞增
+        good = np.zeros(n_det, dtype=bool)
+        good[m_det[~low]] = True
+        unmatched_detections = np.flatnonzero(~good)
     else:
-        matches = np.concatenate(matches,axis=0)
-    return matches, np.array(unmatched_detections), np.array(unmatched_trackers)
+        # 完整矩陣會指派每一條軌跡，沒有重疊對象的軌跡各補上一個 IoU 為 0 的偵測，
+        # 這些偵測排在後段。補位選哪個偵測取決於求解器，這裡取索引最小的，絕大多數情況與求解器相同
+        free = np.flatnonzero(~det_assigned)
+        n_fill = n_trk - int(trk_assigned.sum())
+        tail = np.zeros(n_det, dtype=bool)
+        tail[m_det[low]] = True
+        tail[free[:n_fill]] = True
+        unmatched_detections = np.concatenate([free[n_fill:], np.flatnonzero(tail)]).astype(int)
+    unmatched_trackers = np.concatenate([np.flatnonzero(~trk_assigned), m_trk[low]]).astype(int)
+    matched = np.stack([m_det[~low], m_trk[~low]], axis=1).astype(int).reshape(-1, 2)
+    return matched, unmatched_detections, unmatched_trackers
 
 def linear_assignment(cost_matrix):
     try:
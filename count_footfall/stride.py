@@ -0,0 +1,63 @@
+# 跳格推論：只在關鍵影格跑偵測，中間的影格由 SORT 的 Kalman 預測推進軌跡
+#
+# 30 fps 下行人每張影格只移動幾個像素，不需要每張都偵測。
+# 固定模式每 stride 張偵測一次；自適應模式依軌跡速度與人數決定下一次偵測的間隔。
+
+import numpy as np
+
+
+class StrideController:
+    """
+    stride：固定模式的偵測間隔（1 = 每張都偵測）
+    adaptive：依上一個關鍵影格的狀態決定下一個間隔，stride 只作為起始值
+    max_stride：自適應模式的最大間隔
+    max_shift：兩次偵測之間允許軌跡移動的像素數，速度越快間隔越短
+    crowd_size：偵測人數超過此值時間隔減半（人多時遮擋、交錯較多）
+    """
+
+    def __init__(self, stride=1, adaptive=False, max_stride=8, max_shift=6.0, crowd_size=30):
+        if stride < 1 or max_stride < 1:
+            raise ValueError("stride and max_stride must be >= 1")
+        self.stride = stride
+        self.adaptive = adaptive
+        self.max_stride = max_stride
+        self.max_shift = max_shift
+        self.crowd_size = crowd_size
+
+        self.next_key = 0
+        self.key_frames = 0
+        self.frames = 0
+
+    def is_key(self, frameIndex):
+        """這張影格是否需要跑偵測"""
+        if self.adaptive:
+            return frameIndex >= self.next_key
+        return frameIndex % self.stride == 0
+
+    def observe(self, frameIndex, tracker, n_dets, is_key):
+        """每張影格追蹤完呼叫一次；自適應模式在關鍵影格後決定下一次偵測的位置"""
+        self.frames += 1
+        if not is_key:
+            return
+        self.key_frames += 1
+        if self.adaptive:
+            self.stride = self._choose_stride(tracker.velocities(), n_dets)
+            self.next_key = frameIndex + self.stride
+
+    def _choose_stride(self, velocities, n_dets):
+        if len(velocities) == 0:
+            # 畫面中沒有軌跡：用最大間隔，新進入的人最晚 max_stride 張後被偵測到
+            return self.max_stride
+
+        speed = float(np.max(np.abs(velocities)))
+        stride = self.max_stride if speed <= 0 else int(self.max_shift // speed)
+        if n_dets > self.crowd_size:
+            stride //= 2
+        return int(np.clip(stride, 1, self.max_stride))
+
+    def summary(self):
+        return {
+            "frames": self.frames,
+            "key_frames": self.key_frames,
+            "skipped_frames": self.frames - self.key_frames,
+        }
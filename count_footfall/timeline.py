@@ -0,0 +1,140 @@
+# 依影片本身的時間軸把越線分到每小時：錄影開始時間 + 影格編號 / fps
+#
+# 錄影開始時間依序取自：
+#   1. 呼叫端指定的 recorded_at
+#   2. 檔名中的時間戳記，例如 record_2025-07-01_20-20-41.mp4
+#   3. 檔案最後修改時間往前推影片長度（錄影結束時寫完檔案）
+#
+# 即時串流沒有影格編號的時間軸，改用 HourlyFlusher 依擷取時間分桶，每跨過整點寫出一次。
+
+import os
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from count_footfall.det_cache import hash_file
+
+FILENAME_TIME_PATTERN = re.compile(r'(\d{4}-\d{2}-\d{2})_(\d{2}-\d{2}-\d{2})')
+
+
+def recording_start(video_path, frame_count, fps, recorded_at=None):
+    if recorded_at is not None:
+        return recorded_at
+
+    m = FILENAME_TIME_PATTERN.search(os.path.basename(video_path))
+    if m:
+        try:
+            return datetime.strptime(f"{m.group(1)} {m.group(2)}", "%Y-%m-%d %H-%M-%S")
+        except ValueError:
+            pass
+
+    mtime = datetime.fromtimestamp(os.path.getmtime(video_path))
+    return mtime - timedelta(seconds=frame_count / fps)
+
+
+def video_source(video_path, start_frame=0, end_frame=None, frame_count=None):
+    """
+    錄影檔寫入 hourly_footfall 時的來源識別（見 app.db.footfall.save_hourly_footfall）：
+    影片內容雜湊，只處理部分影格時加上影格範圍。同一段錄影不論由上傳、回補或分段計數處理，
+    再次寫入都會取代上次的結果
+    """
+    source = f"video:{hash_file(video_path)}"
+    partial_end = end_frame is not None and frame_count is not None and end_frame < frame_count
+    if start_frame > 0 or partial_end:
+        source += f":{start_frame}-{end_frame}"
+    return source
+
+
+class HourlyBuckets:
+    """以 (日期字串, 小時) 為鍵累計越線數"""
+
+    def __init__(self, start, fps):
+        self.start = start
+        self.fps = fps
+        self._counts = OrderedDict()
+
+    def time_of(self, frameIndex):
+        return self.start + timedelta(seconds=frameIndex / self.fps)
+
+    def _key(self, t):
+        return t.strftime("%Y-%m-%d"), t.hour
+
+    def add(self, frameIndex, n=1):
+        key = self._key(self.time_of(frameIndex))
+        self._counts[key] = self._counts.get(key, 0) + n
+
+    def cover(self, first_frame, end_frame):
+        """[first_frame, end_frame) 經過的每個小時都建立桶子，沒有人經過的小時記為 0"""
+        if end_frame <= first_frame:
+            return
+        t = self.time_of(first_frame).replace(minute=0, second=0, microsecond=0)
+        last = self.time_of(end_frame - 1)
+        while t <= last:
+            self._counts.setdefault(self._key(t), 0)
+            t += timedelta(hours=1)
+
+    def items(self):
+        """依時間排序的 [((日期, 小時), 計數), ...]"""
+        return sorted(self._counts.items())
+
+
+class HourlyFlusher:
+    """
+    即時串流的每小時計數：以影格擷取時間（datetime）分桶，只保留還沒寫出的小時。
+    tick(t) 發現進入新的小時，就把之前的小時交給 save(buckets) 寫出；
+    save 的參數格式同 HourlyBuckets.items()，寫入端必須是累加（save_hourly_footfall 不帶 source），
+    因為停止時會連同進行中的小時一起寫出，之後重新啟動再寫入同一小時。
+    save 失敗時保留這些小時，retry_interval 秒後的 tick 再試，不會遺失計數
+    """
+
+    def __init__(self, save, retry_interval=60.0):
+        self.save = save
+        self.retry_interval = retry_interval
+        self.current = None
+        self._counts = OrderedDict()
+        self._retry_at = 0.0
+
+    @staticmethod
+    def _key(t):
+        return t.strftime("%Y-%m-%d"), t.hour
+
+    def add(self, t, n=1):
+        key = self._key(t)
+        self._counts[key] = self._counts.get(key, 0) + n
+
+    def tick(self, t):
+        """每張影格呼叫一次；新的小時即使沒有人經過也會寫出一筆 0"""
+        key = self._key(t)
+        if key != self.current:
+            self.current = key
+            self._counts.setdefault(key, 0)
+        self.flush_due(t)
+
+    def flush_due(self, t):
+        """寫出 t 所在小時之前的所有小時；來源中斷、沒有影格時也要定期呼叫"""
+        key = self._key(t)
+        keys = [k for k in self._counts if k != key]
+        if keys and time.monotonic() >= self._retry_at:
+            self._flush(keys)
+
+    def flush(self):
+        """寫出所有小時（包含進行中的小時），回傳是否成功"""
+        return self._flush(list(self._counts))
+
+    def pending(self):
+        return sorted(self._counts.items())
+
+    def _flush(self, keys):
+        buckets = sorted((k, self._counts[k]) for k in keys)
+        if not buckets:
+            return True
+        try:
+            self.save(buckets)
+        except Exception as e:
+            self._retry_at = time.monotonic() + self.retry_interval
+            print(f"[WARN] hourly flush failed, retrying in {self.retry_interval:.0f}s: {e}")
+            return False
+        for k in keys:
+            del self._counts[k]
+        return True
@@ -5,11 +5,14 @@ import matplotlib.pyplot as plt
 import io
 import os
 import matplotlib
-from count_footfall.process import process_video
 from flask_cors import CORS
 
 from mysql.connector import MySQLConnection
+from app.core.config import settings
 from app.db.connector import pool
+from app.jobs.video_jobs import VideoJobManager, FINISHED_STATUSES, DONE
+from app.jobs.result_cache import ResultCache, save_upload
+from count_footfall.model_registry import model_stats
 from weather import get_weather_main
 
 matplotlib.use('Agg')
@@ -34,6 +37,30 @@ app.config.update({
 os.makedirs(VIDEO_UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(OUTPUT_VIDEO_FOLDER, exist_ok=True)
 
+# 影片處理工作佇列（同時執行數由 MAX_CONCURRENT_JOBS 設定）
+job_manager = VideoJobManager(
+    pool,
+    output_folder=OUTPUT_VIDEO_FOLDER,
+    max_workers=settings.max_concurrent_jobs,
+    process_options={
+        "model_path": settings.detector_models[0],
+        "batch_size": settings.inference_batch_size,
+        "pipelined": settings.pipelined_processing,
+        "queue_size": settings.pipeline_queue_size,
+        "stride": settings.detection_stride,
+        "adaptive_stride": settings.adaptive_stride,
+        "max_stride": settings.max_stride,
+        "motion_gate": settings.motion_gate,
+        "camera": settings.camera,
+        "detection_cache": settings.detection_cache,
+        "backend": settings.detector_backend,
+        "checkpoint_every": settings.checkpoint_every,
+    },
+    preload_models=settings.detector_models,
+    result_cache=(ResultCache(pool, settings.result_cache_max_bytes)
+                  if settings.result_cache_max_bytes > 0 else None),
+)
+
 
 @app.before_request
 def open_db():
@@ -43,6 +70,12 @@ def open_db():
     g.db_conn = conn
     g.db_cursor = conn.cursor(dictionary=True, buffered=True)
 
+@app.before_request
+def start_job_manager():
+    # 第一次收到請求時才啟動 worker 並復原未完成的工作，
+    # 避免 debug reloader 的父行程也跑一份
+    job_manager.start()
+
 @app.teardown_request
 def close_db(exc):
     # 從 g 拿出 cursor & conn
@@ -450,19 +483,94 @@ def upload_video():
     name = os.path.splitext(video.filename)[0]
     new_filename = f"{name}_{ts}{ext}"
     path = os.path.join(app.config['VIDEO_UPLOAD_FOLDER'], new_filename)
-    video.save(path)
+    # 寫入磁碟的同時計算內容雜湊，重複上傳的影片直接沿用之前的結果
+    content_hash = save_upload(video.stream, path)
+
+    # 影片處理改為背景工作，立即回傳 job_id 讓前端輪詢
+    job_id = job_manager.submit(path, content_hash)
+    job = job_manager.get(job_id)
+
+    if job['status'] == DONE:
+        return jsonify({
+            "message": "Identical video already processed, returning cached result",
+            "file_path": job['video_path'],
+            "job_id": job_id,
+            "status_url": f"/api/jobs/{job_id}",
+            "footfall": job['footfall'],
+            "download_url": job.get('download_url'),
+        }), 200
 
-    try:
-        footfall_count, output_path = process_video(path)
-    except Exception as e:
-        return jsonify({"error": "Video processing failed", "details": str(e)}), 500
+    return jsonify({
+        "message": "Video uploaded successfully, processing queued",
+        "file_path": job['video_path'],
+        "job_id": job_id,
+        "status_url": f"/api/jobs/{job_id}"
+    }), 202
+
+# 列出最近的影片處理工作
+@app.route('/api/jobs', methods=['GET'])
+def api_list_jobs():
+    limit = int(request.args.get('limit', 50))
+    return jsonify({"jobs": job_manager.list_jobs(limit)})
+
+# 查詢影片處理工作狀態與進度
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def api_get_job(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+# 取得影片處理結果（完成後才有）
+@app.route('/api/jobs/<job_id>/result', methods=['GET'])
+def api_get_job_result(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    if job['status'] != DONE:
+        return jsonify({
+            "error": "Job has not finished successfully",
+            "status": job['status'],
+            "details": job['error']
+        }), 409
 
     return jsonify({
-        "message": "Video uploaded successfully",
-        "file_path": path,
-        "footfall": footfall_count,
-        "download_url": f"/api/download_video/{output_path}"
-    }), 201
+        "job_id": job_id,
+        "footfall": job['footfall'],
+        "download_url": job.get('download_url'),
+        "output_expired": job['output_expired'],
+        "metrics": job_manager.metrics(job_id)
+    })
+
+# 影片處理工作的效能統計：執行中為即時數據（各階段耗時百分位數、佇列深度、掉格數），
+# 結束後為完成時的數據
+@app.route('/api/jobs/<job_id>/metrics', methods=['GET'])
+def api_get_job_metrics(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify({
+        "job_id": job_id,
+        "status": job['status'],
+        "metrics": job_manager.metrics(job_id)
+    })
+
+# 取消影片處理工作
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def api_cancel_job(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    if job['status'] in FINISHED_STATUSES:
+        return jsonify({"error": "Job already finished", "status": job['status']}), 409
+
+    job = job_manager.cancel(job_id)
+    return jsonify({"message": "Cancellation requested", "job": job}), 202
+
+# 已載入的偵測模型與其載入時間、記憶體用量
+@app.route('/api/models', methods=['GET'])
+def api_list_models():
+    return jsonify({"models": model_stats()})
 
 # 影片下載
 @app.route('/api/download_video/<path:filename>')
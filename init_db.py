@@ -67,6 +67,74 @@ def main():
                 REFERENCES daily_footfall(id)
                 ON DELETE CASCADE
             ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS hourly_footfall_sources (
+              source_key   CHAR(32)     NOT NULL,
+              source       VARCHAR(512) NOT NULL,
+              day_date     DATE         NOT NULL,
+              hour_of_day  TINYINT      NOT NULL,
+              count        INT          NOT NULL,
+              updated_at   TIMESTAMP    NOT NULL
+                            DEFAULT CURRENT_TIMESTAMP
+                            ON UPDATE CURRENT_TIMESTAMP,
+              PRIMARY KEY (source_key, day_date, hour_of_day)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS video_jobs (
+              id           CHAR(32)     PRIMARY KEY,
+              status       VARCHAR(16)  NOT NULL,
+              video_path   VARCHAR(512) NOT NULL,
+              output_path  VARCHAR(512) NOT NULL,
+              frames_done  INT          NOT NULL DEFAULT 0,
+              frames_total INT          NOT NULL DEFAULT 0,
+              footfall     INT          NULL,
+              error        TEXT         NULL,
+              cache_key    CHAR(32)     NULL,
+              metrics      MEDIUMTEXT   NULL,
+              output_expired TINYINT(1) NOT NULL DEFAULT 0,
+              owner        CHAR(32)     NULL,
+              heartbeat_at TIMESTAMP    NULL DEFAULT NULL,
+              cancel_requested TINYINT(1) NOT NULL DEFAULT 0,
+              created_at   TIMESTAMP    NOT NULL
+                            DEFAULT CURRENT_TIMESTAMP,
+              updated_at   TIMESTAMP    NOT NULL
+                            DEFAULT CURRENT_TIMESTAMP
+                            ON UPDATE CURRENT_TIMESTAMP,
+              INDEX idx_video_jobs_status (status),
+              INDEX idx_video_jobs_cache_key (cache_key)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS result_cache (
+              cache_key    CHAR(32)     PRIMARY KEY,
+              video_path   VARCHAR(512) NOT NULL,
+              output_path  VARCHAR(512) NOT NULL,
+              footfall     INT          NOT NULL,
+              size_bytes   BIGINT       NOT NULL DEFAULT 0,
+              created_at   TIMESTAMP    NOT NULL
+                            DEFAULT CURRENT_TIMESTAMP,
+              last_used_at TIMESTAMP(6) NOT NULL
+                            DEFAULT CURRENT_TIMESTAMP(6),
+              INDEX idx_result_cache_last_used (last_used_at)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS backfill_results (
+              id           INT AUTO_INCREMENT PRIMARY KEY,
+              file_path    VARCHAR(512) NOT NULL,
+              camera       VARCHAR(64)  NOT NULL,
+              status       VARCHAR(16)  NOT NULL,
+              footfall     INT          NULL,
+              frames       INT          NOT NULL DEFAULT 0,
+              seconds      DOUBLE       NOT NULL DEFAULT 0,
+              error        TEXT         NULL,
+              processed_at TIMESTAMP    NOT NULL
+                            DEFAULT CURRENT_TIMESTAMP
+                            ON UPDATE CURRENT_TIMESTAMP,
+              UNIQUE KEY uq_backfill_file (file_path, camera)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
             """
         ]
 
@@ -74,8 +142,50 @@ def main():
         for ddl in ddl_statements:
             cursor.execute(ddl)
 
+        # 舊版建立的 video_jobs 沒有 cache_key 欄位，補上
+        cursor.execute("SHOW COLUMNS FROM video_jobs LIKE 'cache_key'")
+        if not cursor.fetchall():
+            cursor.execute("""
+                ALTER TABLE video_jobs
+                ADD COLUMN cache_key CHAR(32) NULL AFTER error,
+                ADD INDEX idx_video_jobs_cache_key (cache_key)
+            """)
+
+        # 舊版建立的 video_jobs 沒有 metrics 欄位（完成時的效能統計 JSON），補上
+        cursor.execute("SHOW COLUMNS FROM video_jobs LIKE 'metrics'")
+        if not cursor.fetchall():
+            cursor.execute("""
+                ALTER TABLE video_jobs
+                ADD COLUMN metrics MEDIUMTEXT NULL AFTER cache_key
+            """)
+
+        # 舊版建立的 video_jobs 沒有 output_expired 欄位（輸出影片已被結果快取淘汰），補上
+        cursor.execute("SHOW COLUMNS FROM video_jobs LIKE 'output_expired'")
+        if not cursor.fetchall():
+            cursor.execute("""
+                ALTER TABLE video_jobs
+                ADD COLUMN output_expired TINYINT(1) NOT NULL DEFAULT 0 AFTER metrics
+            """)
+
+        # 舊版建立的 video_jobs 沒有 owner / heartbeat_at 欄位（執行中工作的所屬服務與心跳），補上
+        cursor.execute("SHOW COLUMNS FROM video_jobs LIKE 'owner'")
+        if not cursor.fetchall():
+            cursor.execute("""
+                ALTER TABLE video_jobs
+                ADD COLUMN owner CHAR(32) NULL AFTER output_expired,
+                ADD COLUMN heartbeat_at TIMESTAMP NULL DEFAULT NULL AFTER owner
+            """)
+
+        # 舊版建立的 video_jobs 沒有 cancel_requested 欄位（跨行程的取消要求），補上
+        cursor.execute("SHOW COLUMNS FROM video_jobs LIKE 'cancel_requested'")
+        if not cursor.fetchall():
+            cursor.execute("""
+                ALTER TABLE video_jobs
+                ADD COLUMN cancel_requested TINYINT(1) NOT NULL DEFAULT 0 AFTER heartbeat_at
+            """)
+
         cnx.commit()
-        print("✓ 表格 daily_footfall, hourly_footfall 已建立或已存在")
+        print("✓ 表格 daily_footfall, hourly_footfall, hourly_footfall_sources, video_jobs, result_cache, backfill_results 已建立或已存在")
 
     except mysql.connector.Error as err:
         print(f"[錯誤] 建表失敗：{err}", file=sys.stderr)
@@ -59,16 +59,23 @@ document.getElementById('uploadBtn').addEventListener('click', () => {
   })
   .then(data => {
     // 後端 JSON 應該長這樣：
-    // { message, file_path, footfall, download_url }
-    const url = data.download_url;
+    // { message, file_path, job_id, status_url }
+    if (!data.status_url) {
+      throw new Error('後端沒有回傳 status_url');
+    }
+    // 3. 影片在背景處理，輪詢工作狀態直到完成
+    return waitForJob(data.status_url);
+  })
+  .then(job => {
+    const url = job.download_url;
     if (!url) {
       alert('後端沒有回傳 download_url');
       return;
     }
 
-    // 3. 指定給 video，並顯示／播放
+    // 4. 指定給 video，並顯示／播放
     const player = document.getElementById('videoPlayer');
-    player.src = url;           // e.g. "/api/download_video/count_footfall/output/highway.mp4"
+    player.src = url;           // e.g. "/api/download_video/output/result_<job_id>.mp4"
     player.style.display = 'block';
     player.load();              // 重新載入新的 src
     player.play().catch(()=>{}); // 自動播放（部分瀏覽器可能需要 user gesture）
@@ -79,4 +86,27 @@ document.getElementById('uploadBtn').addEventListener('click', () => {
   });
 });
 
-
+// 每隔 intervalMs 查一次工作狀態，完成時 resolve，失敗或取消時 reject
+function waitForJob(statusUrl, intervalMs = 2000) {
+  const btn = document.getElementById('uploadBtn');
+  return new Promise((resolve, reject) => {
+    const poll = () => {
+      fetch(statusUrl)
+        .then(res => res.json())
+        .then(job => {
+          if (job.status === 'done') {
+            btn.innerText = '上傳並播放';
+            resolve(job);
+          } else if (job.status === 'failed' || job.status === 'cancelled') {
+            btn.innerText = '上傳並播放';
+            reject(new Error('影片處理' + (job.status === 'failed' ? '失敗: ' + job.error : '已取消')));
+          } else {
+            btn.innerText = `處理中 ${job.progress.percent}%`;
+            setTimeout(poll, intervalMs);
+          }
+        })
+        .catch(reject);
+    };
+    poll();
+  });
+}